@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from .graph.build_graph import build_graph
+from .graph.nodes.ingest import _detect_bib_path
+from .graph.state import AgentConfig, GraphState
+from .main import _add_run_args, _build_config, close_runtime, configure_runtime, write_revised
+from .tools.caching import cache_stats
+from .tools.checkpoint import get_checkpoint_store, new_run_id
+from .tools.http_pool import aclose_http_clients, http_stats
+from .tools.llm_scheduler import get_llm_scheduler
+from .tools.logger import get_logger, setup_logging
+from .tools.metrics import reset_metrics, run_scope
+
+logger = get_logger(__name__)
+
+# Batch mode runs many drafts in one process: the caches, HTTP pools, rate
+# limits and LLM scheduler are configured once and shared by every document,
+# and up to --jobs documents run at a time. Each document gets its own output
+# directory, metrics and checkpoint run id. Drafts that update the same .bib
+# run one after another, so each sees the entries and bibkeys the previous
+# one added instead of overwriting them.
+
+SUMMARY_NAME = "batch_summary.json"
+
+
+def collect_inputs(source: str, exclude: Optional[str] = None) -> List[str]:
+    """The .tex files under a directory, or those listed in a manifest file.
+
+    A manifest has one path per line, relative to the manifest; blank lines
+    and lines starting with `#` are skipped. Files under `exclude` (the
+    output directory, which holds revised copies) are left out of a directory.
+    """
+    if os.path.isdir(source):
+        skip = os.path.abspath(exclude) if exclude else None
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != skip)
+            paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".tex"))
+        return paths
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return paths
+
+
+def output_dirs(inputs: List[str], output_dir: str) -> List[str]:
+    """One output directory per input, named after its path below the inputs' common directory."""
+    if not inputs:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in inputs])
+    dirs, seen = [], set()
+    for path in inputs:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].replace(os.sep, "__")
+        unique, n = name, 1
+        while unique in seen:
+            n += 1
+            unique = f"{name}-{n}"
+        seen.add(unique)
+        dirs.append(os.path.join(output_dir, unique))
+    return dirs
+
+
+def _document_config(base: AgentConfig, input_path: str, output_dir: str) -> AgentConfig:
+    run_id = new_run_id() if base.enable_checkpoints else None
+    return base.model_copy(update={"input_path": input_path, "output_dir": output_dir, "run_id": run_id})
+
+
+def _bib_path(config: AgentConfig) -> str:
+    """The .bib file a document's run will update, resolved as ingest does."""
+    if config.bib_path_override:
+        return os.path.abspath(config.bib_path_override)
+    try:
+        with open(config.input_path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    except OSError:
+        # The run will fail in ingest without touching any .bib.
+        return os.path.abspath(config.input_path)
+    return os.path.abspath(_detect_bib_path(text, config.input_path)[0])
+
+
+def bib_groups(configs: List[AgentConfig]) -> List[List[int]]:
+    """Indexes of the documents sharing each .bib file, in input order."""
+    groups: Dict[str, List[int]] = {}
+    for i, config in enumerate(configs):
+        groups.setdefault(_bib_path(config), []).append(i)
+    return list(groups.values())
+
+
+class _Document:
+    """Bookkeeping for one document of the batch: checkpoint status, timing and its summary item."""
+
+    def __init__(self, config: AgentConfig) -> None:
+        self.config = config
+        self.store = get_checkpoint_store(config.checkpoint_path) if config.run_id else None
+        self.started = 0.0
+
+    def start(self) -> None:
+        logger.info("[batch] Starting %s", self.config.input_path)
+        if self.store:
+            self.store.start_run(self.config.run_id)
+        self.started = time.perf_counter()
+
+    def finish(self, result: Any) -> Dict[str, Any]:
+        write_revised(result, self.config.output_dir)
+        if self.store:
+            self.store.delete_run(self.config.run_id)
+        report = result.get("report", {}) if isinstance(result, dict) else result.report
+        return self._item("done", report=report)
+
+    def fail(self, exc: BaseException) -> Dict[str, Any]:
+        if self.store:
+            self.store.set_status(self.config.run_id, "interrupted")
+        logger.error("[batch] %s failed: %s", self.config.input_path, exc)
+        return self._item("failed", error=f"{type(exc).__name__}: {exc}")
+
+    def _item(self, status: str, report: Optional[Dict[str, Any]] = None, error: str = "") -> Dict[str, Any]:
+        report = report or {}
+        claims = report.get("claims", [])
+        totals = report.get("metrics", {}).get("totals", {})
+        return {
+            "input": self.config.input_path,
+            "output_dir": self.config.output_dir,
+            "status": status,
+            "error": error,
+            "run_id": self.config.run_id,
+            "seconds": round(time.perf_counter() - self.started, 3),
+            "claims": len(claims),
+            "claims_ok": sum(1 for c in claims if c.get("status") == "OK"),
+            "new_entries": report.get("new_entries_added_count", 0),
+            "metrics": {
+                name: totals.get(name, 0)
+                for name in ("llm_calls", "prompt_tokens", "completion_tokens", "http_requests", "cost_usd")
+            },
+        }
+
+
+def _run_document(graph, config: AgentConfig) -> Dict[str, Any]:
+    doc = _Document(config)
+    with run_scope(config.output_dir):
+        doc.start()
+        try:
+            return doc.finish(graph.invoke(GraphState(config=config)))
+        except Exception as exc:
+            return doc.fail(exc)
+        finally:
+            reset_metrics()
+
+
+async def _arun_document(graph, config: AgentConfig, slots: asyncio.Semaphore) -> Dict[str, Any]:
+    async with slots:
+        doc = _Document(config)
+        with run_scope(config.output_dir):
+            doc.start()
+            try:
+                return doc.finish(await graph.ainvoke(GraphState(config=config)))
+            except Exception as exc:
+                return doc.fail(exc)
+            finally:
+                reset_metrics()
+
+
+def _run_group(graph, configs: List[AgentConfig], group: List[int]) -> Dict[int, Dict[str, Any]]:
+    return {i: _run_document(graph, configs[i]) for i in group}
+
+
+async def _arun_group(
+    graph, configs: List[AgentConfig], group: List[int], slots: asyncio.Semaphore
+) -> Dict[int, Dict[str, Any]]:
+    return {i: await _arun_document(graph, configs[i], slots) for i in group}
+
+
+async def _arun_documents(graph, configs: List[AgentConfig], jobs: int) -> List[Dict[str, Any]]:
+    slots = asyncio.Semaphore(jobs)
+    try:
+        done = await asyncio.gather(*(_arun_group(graph, configs, group, slots) for group in bib_groups(configs)))
+    finally:
+        await aclose_http_clients()
+    items = {i: item for group in done for i, item in group.items()}
+    return [items[i] for i in range(len(configs))]
+
+
+def run_batch(base: AgentConfig, inputs: List[str], jobs: int = 4) -> Dict[str, Any]:
+    """Run every input through the pipeline, up to `jobs` at a time, and write the batch summary.
+
+    The process-wide runtime must already be configured (`configure_runtime`).
+    """
+    configs = [_document_config(base, path, out) for path, out in zip(inputs, output_dirs(inputs, base.output_dir))]
+    jobs = max(1, min(jobs, len(configs) or 1))
+    logger.info("[batch] Processing %d documents, %d at a time", len(configs), jobs)
+    graph = build_graph(async_mode=base.async_mode, streaming=base.streaming)
+    start = time.perf_counter()
+    if base.async_mode:
+        items = asyncio.run(_arun_documents(graph, configs, jobs))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            done = list(executor.map(lambda group: _run_group(graph, configs, group), bib_groups(configs)))
+        by_index = {i: item for group in done for i, item in group.items()}
+        items = [by_index[i] for i in range(len(configs))]
+    summary = summarize(items, time.perf_counter() - start)
+    os.makedirs(base.output_dir, exist_ok=True)
+    path = os.path.join(base.output_dir, SUMMARY_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=True, indent=2)
+    logger.info("[batch] Wrote batch summary to %s", path)
+    return summary
+
+
+def summarize(items: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Totals and throughput over the batch's per-document items."""
+    done = [item for item in items if item["status"] == "done"]
+    totals: Dict[str, float] = {
+        "claims": sum(item["claims"] for item in done),
+        "claims_ok": sum(item["claims_ok"] for item in done),
+        "new_entries": sum(item["new_entries"] for item in done),
+    }
+    for item in done:
+        for name, value in item["metrics"].items():
+            totals[name] = totals.get(name, 0) + value
+    if "cost_usd" in totals:
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+    minutes = wall_seconds / 60 if wall_seconds > 0 else 0.0
+
+    def per_minute(value: float) -> float:
+        return round(value / minutes, 2) if minutes else 0.0
+
+    return {
+        "documents": len(items),
+        "succeeded": len(done),
+        "failed": len(items) - len(done),
+        "wall_seconds": round(wall_seconds, 3),
+        # Summed per-document time over wall time: the effective concurrency.
+        "document_seconds": round(sum(item["seconds"] for item in items), 3),
+        "throughput": {
+            "documents_per_minute": per_minute(len(done)),
+            "claims_per_minute": per_minute(totals["claims"]),
+            "llm_calls_per_minute": per_minute(totals.get("llm_calls", 0)),
+        },
+        "totals": totals,
+        "cache": cache_stats(),
+        "http": http_stats(),
+        "llm": get_llm_scheduler().stats(),
+        "items": items,
+    }
+
+
+def main() -> None:
+    load_dotenv()
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Add citations to many LaTeX drafts in one process")
+    parser.add_argument("source", help="Directory of .tex drafts, or a file listing one draft path per line")
+    _add_run_args(parser)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.getenv("BATCH_JOBS", "4")),
+        help="Documents processed at a time (default: $BATCH_JOBS or 4)",
+    )
+    parser.set_defaults(input=None, bib=None)
+    args = parser.parse_args()
+
+    inputs = collect_inputs(args.source, exclude=args.output_dir)
+    if not inputs:
+        parser.error(f"No .tex drafts found in {args.source}")
+    config = _build_config(args)
+    configure_runtime(config)
+    try:
+        summary = run_batch(config, inputs, args.jobs)
+    finally:
+        close_runtime()
+    logger.info(
+        "[batch] %d/%d documents done in %.1fs (%.2f documents/min)",
+        summary["succeeded"],
+        summary["documents"],
+        summary["wall_seconds"],
+        summary["throughput"]["documents_per_minute"],
+    )
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,25 @@ from __future__ import annotations
 from langgraph.graph import StateGraph, END
 
 from .state import GraphState
-from .nodes.anchor import anchor_node
-from .nodes.gen_queries import gen_queries_node
+from ..tools.checkpoint import checkpointed_node
+from ..tools.metrics import metered_node
+from ..tools.progress import reported_node
+from .nodes.anchor import aanchor_node, anchor_node
+from .nodes.gen_queries import agen_queries_node, gen_queries_node
 from .nodes.human_review import human_review_node
+from .nodes.incremental import incremental_node
 from .nodes.ingest import ingest_node
 from .nodes.insert import insert_node
-from .nodes.needs_citation import needs_citation_node
-from .nodes.parse_existing_cites import parse_existing_cites_node
-from .nodes.rank_filter import rank_filter_node
+from .nodes.needs_citation import aneeds_citation_node, needs_citation_node
+from .nodes.parse_existing_cites import aparse_existing_cites_node, parse_existing_cites_node
+from .nodes.rank_filter import arank_filter_node, rank_filter_node
 from .nodes.references import references_node
 from .nodes.report import report_node
-from .nodes.search import search_node
+from .nodes.search import asearch_node, search_node
+from .nodes.seed_expansion import aseed_expansion_node, seed_expansion_node
 from .nodes.segment import segment_node
-from .nodes.synthesize import synthesize_node
+from .nodes.stream_claims import astream_claims_node
+from .nodes.synthesize import asynthesize_node, synthesize_node
 
 
 def _needs_human_review(state: GraphState) -> bool:
@@ -24,37 +30,72 @@ def _needs_human_review(state: GraphState) -> bool:
     return any(s.status == "NEED_MANUAL" for s in state.selected_by_claim.values())
 
 
-def build_graph():
+def build_graph(async_mode: bool = False, streaming: bool = False):
+    """Compile the pipeline graph.
+
+    With `async_mode` the network-bound nodes are coroutines and the graph
+    must be run with `ainvoke` on a single event loop. `streaming` (async
+    only) replaces the gen_queries, search, rank_filter and synthesize stages
+    with one node that moves each claim through them on its own.
+    """
+    if streaming and not async_mode:
+        raise ValueError("Streaming mode needs async_mode")
     graph = StateGraph(GraphState)
-    graph.add_node("ingest", ingest_node)
-    graph.add_node("parse_existing_cites", parse_existing_cites_node)
-    graph.add_node("anchor", anchor_node)
-    graph.add_node("segment", segment_node)
-    graph.add_node("needs_citation", needs_citation_node)
-    graph.add_node("gen_queries", gen_queries_node)
-    graph.add_node("search", search_node)
-    graph.add_node("rank_filter", rank_filter_node)
-    graph.add_node("human_review", human_review_node)
-    graph.add_node("synthesize", synthesize_node)
-    graph.add_node("insert", insert_node)
-    graph.add_node("references", references_node)
-    graph.add_node("report", report_node)
+
+    def add_node(name, node, async_node=None):
+        # Every node is timed and tags the LLM/HTTP calls it makes for the run
+        # metrics, and reports its start and end to any progress sink; with a
+        # run id, the state is checkpointed after it.
+        node = metered_node(name, async_node if async_mode and async_node else node)
+        graph.add_node(name, checkpointed_node(name, reported_node(name, node)))
+
+    add_node("ingest", ingest_node)
+    add_node("parse_existing_cites", parse_existing_cites_node, aparse_existing_cites_node)
+    add_node("anchor", anchor_node, aanchor_node)
+    add_node("segment", segment_node)
+    add_node("incremental", incremental_node)
+    add_node("needs_citation", needs_citation_node, aneeds_citation_node)
+    add_node("seed_expansion", seed_expansion_node, aseed_expansion_node)
+    add_node("human_review", human_review_node)
+    add_node("insert", insert_node)
+    add_node("references", references_node)
+    add_node("report", report_node)
 
     graph.set_entry_point("ingest")
     graph.add_edge("ingest", "parse_existing_cites")
     graph.add_edge("parse_existing_cites", "anchor")
     graph.add_edge("anchor", "segment")
-    graph.add_edge("segment", "needs_citation")
-    graph.add_edge("needs_citation", "gen_queries")
-    graph.add_edge("gen_queries", "search")
-    graph.add_edge("search", "rank_filter")
-    graph.add_conditional_edges(
-        "rank_filter",
-        _needs_human_review,
-        {True: "human_review", False: "synthesize"},
-    )
-    graph.add_edge("human_review", "synthesize")
-    graph.add_edge("synthesize", "insert")
+    graph.add_edge("segment", "incremental")
+    graph.add_edge("incremental", "needs_citation")
+    if streaming:
+        # The per-claim stages run inside `stream_claims`, so manual review
+        # comes after synthesize; the document-level nodes run once every
+        # claim has drained.
+        add_node("stream_claims", astream_claims_node)
+        graph.add_edge("needs_citation", "seed_expansion")
+        graph.add_edge("seed_expansion", "stream_claims")
+        graph.add_conditional_edges(
+            "stream_claims",
+            _needs_human_review,
+            {True: "human_review", False: "insert"},
+        )
+        graph.add_edge("human_review", "insert")
+    else:
+        add_node("gen_queries", gen_queries_node, agen_queries_node)
+        add_node("search", search_node, asearch_node)
+        add_node("rank_filter", rank_filter_node, arank_filter_node)
+        add_node("synthesize", synthesize_node, asynthesize_node)
+        graph.add_edge("needs_citation", "gen_queries")
+        graph.add_edge("gen_queries", "seed_expansion")
+        graph.add_edge("seed_expansion", "search")
+        graph.add_edge("search", "rank_filter")
+        graph.add_conditional_edges(
+            "rank_filter",
+            _needs_human_review,
+            {True: "human_review", False: "synthesize"},
+        )
+        graph.add_edge("human_review", "synthesize")
+        graph.add_edge("synthesize", "insert")
     graph.add_edge("insert", "references")
     graph.add_edge("references", "report")
     graph.add_edge("report", END)
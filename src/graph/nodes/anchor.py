@@ -1,22 +1,32 @@
 from __future__ import annotations
 
 from ..prompts import ANCHOR_SYSTEM, ANCHOR_USER
+from ..schemas import AnchorResult
 from ..state import GraphState
-from ...tools.llm import LlmClient
+from ...tools.llm import AsyncLlmClient, LlmClient
+from ...tools.llm_scheduler import get_llm_scheduler, llm_stage
 from ...tools.logger import get_logger
 
 logger = get_logger(__name__)
 
+_SCHEMA_HINT = '{"topic": "...", "subareas": ["..."], "key_terms": ["..."], "likely_venues": ["..."], "exclusions": ["..."]}'
+
 
 def anchor_node(state: GraphState) -> GraphState:
     logger.info("[anchor] Analyzing document topic and extracting key terms")
-    llm = LlmClient(
-        api_key=state.config.openai_api_key,
-        base_url=state.config.openai_base_url,
-        model=state.config.openai_model,
-    )
-    schema_hint = '{"topic": "...", "subareas": ["..."], "key_terms": ["..."], "likely_venues": ["..."], "exclusions": ["..."]}'
+    llm = LlmClient.shared(state.config, "anchor")
     prompt = ANCHOR_USER.format(text=state.raw_text)
-    result = llm.chat_json(schema_hint, ANCHOR_SYSTEM, prompt)
+    result = get_llm_scheduler().submit(
+        "anchor", llm.chat_json, _SCHEMA_HINT, ANCHOR_SYSTEM, prompt, AnchorResult
+    ).result()
     state.anchor_summary = result
     return state
+
+
+async def aanchor_node(state: GraphState) -> GraphState:
+    logger.info("[anchor] Analyzing document topic and extracting key terms")
+    llm = AsyncLlmClient.shared(state.config, "anchor")
+    prompt = ANCHOR_USER.format(text=state.raw_text)
+    with llm_stage("anchor"):
+        state.anchor_summary = await llm.chat_json(_SCHEMA_HINT, ANCHOR_SYSTEM, prompt, AnchorResult)
+    return state
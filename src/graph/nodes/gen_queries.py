@@ -1,91 +1,170 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from concurrent.futures import as_completed
 
 from tqdm import tqdm
 
 from ..prompts import QUERY_GEN_SYSTEM, QUERY_GEN_USER
+from ..schemas import QueryGenResult
 from ..state import ClaimItem, GraphState, QueryItem
-from ...tools.llm import LlmClient
+from ...tools.checkpoint import claim_checkpoint, record_claim
+from ...tools.llm import AsyncLlmClient, LlmClient
+from ...tools.llm_scheduler import get_llm_scheduler, llm_stage
 from ...tools.logger import get_logger
+from ...tools.metrics import claim_scope
+from ...tools.progress import emit_claim
 
 logger = get_logger(__name__)
 
 
+_SCHEMA_HINT = '{"queries":["..."],"keywords":["..."],"must_include":["..."],"optional":["..."]}'
+
+
+def _claim_for(sentence, anchor_terms) -> ClaimItem:
+    return ClaimItem(cid=f"C{sentence.sid}", sid=sentence.sid, text=sentence.text, anchor_tags=anchor_terms)
+
+
+def _query_items(claim, sentence, result, seed_papers, config):
+    queries = result.get("queries", [])[: config.max_queries_per_claim]
+    query_items = [QueryItem(cid=claim.cid, query=q, type="hybrid") for q in queries]
+
+    if seed_papers:
+        seed_based = []
+        for seed in seed_papers[:2]:
+            if seed.resolved_title:
+                seed_based.append(f"related work to {seed.resolved_title} {sentence.text}")
+            else:
+                seed_based.append(f"extension of {seed.bibkey} {sentence.text}")
+        for q in seed_based[:2]:
+            query_items.append(QueryItem(cid=claim.cid, query=q, type="seed"))
+    return query_items
+
+
+def _checkpointed_queries(claim, config):
+    done = claim_checkpoint(config, "gen_queries", claim.cid)
+    return None if done is None else [QueryItem.model_validate(q) for q in done]
+
+
+def _record_queries(claim, query_items, config):
+    record_claim(config, "gen_queries", claim.cid, [q.model_dump() for q in query_items])
+    emit_claim("gen_queries", claim.cid, queries=len(query_items))
+    return claim, query_items
+
+
 def _generate_queries_for_sentence(sentence, need, anchor_summary, anchor_terms, seed_papers, llm, config):
     """Generate queries for a single sentence."""
-    claim = ClaimItem(cid=f"C{sentence.sid}", sid=sentence.sid, text=sentence.text, anchor_tags=anchor_terms)
+    claim = _claim_for(sentence, anchor_terms)
+    done = _checkpointed_queries(claim, config)
+    if done is not None:
+        return claim, done
     prompt = QUERY_GEN_USER.format(anchor=anchor_summary, claim=sentence.text)
-    schema_hint = '{"queries":["..."],"keywords":["..."],"must_include":["..."],"optional":["..."]}'
     try:
-        result = llm.chat_json(schema_hint, QUERY_GEN_SYSTEM, prompt)
-        queries = result.get("queries", [])[: config.max_queries_per_claim]
-        query_items = [QueryItem(cid=claim.cid, query=q, type="hybrid") for q in queries]
-
-        if seed_papers:
-            seed_based = []
-            for seed in seed_papers[:2]:
-                if seed.resolved_title:
-                    seed_based.append(f"related work to {seed.resolved_title} {sentence.text}")
-                else:
-                    seed_based.append(f"extension of {seed.bibkey} {sentence.text}")
-            for q in seed_based[:2]:
-                query_items.append(QueryItem(cid=claim.cid, query=q, type="seed"))
-        return claim, query_items
+        with claim_scope(claim.cid):
+            result = llm.chat_json(_SCHEMA_HINT, QUERY_GEN_SYSTEM, prompt, QueryGenResult)
+        return _record_queries(claim, _query_items(claim, sentence, result, seed_papers, config), config)
     except Exception as exc:
         logger.warning("[gen_queries] Failed to generate queries for sentence %s: %s", sentence.sid, exc)
         # Return empty queries on error
         return claim, []
 
 
+async def _agenerate_queries_for_sentence(sentence, anchor_summary, anchor_terms, seed_papers, llm, config):
+    claim = _claim_for(sentence, anchor_terms)
+    done = _checkpointed_queries(claim, config)
+    if done is not None:
+        return claim, done
+    prompt = QUERY_GEN_USER.format(anchor=anchor_summary, claim=sentence.text)
+    try:
+        with claim_scope(claim.cid):
+            result = await llm.chat_json(_SCHEMA_HINT, QUERY_GEN_SYSTEM, prompt, QueryGenResult)
+        return _record_queries(claim, _query_items(claim, sentence, result, seed_papers, config), config)
+    except Exception as exc:
+        logger.warning("[gen_queries] Failed to generate queries for sentence %s: %s", sentence.sid, exc)
+        return claim, []
+
+
+def _sentences_needing_cites(state: GraphState):
+    """Sentences that need (more) citations, except those reused from an incremental run."""
+    needs_map = {n.sid: n for n in state.citation_needs}
+    return [
+        s
+        for s in state.sentences
+        if s.sid not in state.reused_sids and needs_map.get(s.sid, None) and needs_map[s.sid].needs_more_citations
+    ]
+
+
+def _merge_claims(state: GraphState, claims, queries_by_claim) -> None:
+    """Set the new claims alongside those reused from an incremental run, in document order."""
+    order = {s.sid: s.index for s in state.sentences}
+    reused = [c for c in state.claims if c.sid in state.reused_sids]
+    state.claims = sorted(reused + list(claims), key=lambda c: order.get(c.sid, 0))
+    kept = {c.cid: state.queries_by_claim.get(c.cid, []) for c in reused}
+    state.queries_by_claim = {c.cid: {**kept, **queries_by_claim}.get(c.cid, []) for c in state.claims}
+
+
 def gen_queries_node(state: GraphState) -> GraphState:
     logger.info("[gen_queries] Generating search queries for claims")
-    llm = LlmClient(
-        api_key=state.config.openai_api_key,
-        base_url=state.config.openai_base_url,
-        model=state.config.openai_model,
-    )
+    llm = LlmClient.shared(state.config, "gen_queries")
     claims = []
     queries_by_claim = {}
     anchor_terms = state.anchor_summary.get("key_terms", []) if state.anchor_summary else []
 
     needs_map = {n.sid: n for n in state.citation_needs}
-    sentences_needing_cites = [s for s in state.sentences if needs_map.get(s.sid, None) and needs_map[s.sid].needs_more_citations]
+    sentences_needing_cites = _sentences_needing_cites(state)
     
-    # Process sentences in parallel
-    max_workers = min(10, len(sentences_needing_cites))
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_sentence = {
-            executor.submit(
-                _generate_queries_for_sentence,
-                sentence,
-                needs_map.get(sentence.sid),
-                state.anchor_summary,
-                anchor_terms,
-                state.seed_papers,
-                llm,
-                state.config,
-            ): sentence
-            for sentence in sentences_needing_cites
-        }
-        
-        # Collect results
-        for future in tqdm(as_completed(future_to_sentence), total=len(future_to_sentence), desc="[gen_queries] Generating queries", unit="claim"):
-            sentence = future_to_sentence[future]
-            try:
-                claim, query_items = future.result()
-                claims.append(claim)
-                queries_by_claim[claim.cid] = query_items
-            except Exception as exc:
-                logger.error("[gen_queries] Error processing sentence %s: %s", sentence.sid, exc)
-                # Create a claim with empty queries on error
-                claim = ClaimItem(cid=f"C{sentence.sid}", sid=sentence.sid, text=sentence.text, anchor_tags=anchor_terms)
-                claims.append(claim)
-                queries_by_claim[claim.cid] = []
+    # Sentences are processed in parallel on the shared LLM scheduler
+    scheduler = get_llm_scheduler()
+    future_to_sentence = {
+        scheduler.submit(
+            "gen_queries",
+            _generate_queries_for_sentence,
+            sentence,
+            needs_map.get(sentence.sid),
+            state.anchor_summary,
+            anchor_terms,
+            state.seed_papers,
+            llm,
+            state.config,
+        ): sentence
+        for sentence in sentences_needing_cites
+    }
+
+    # Collect results
+    for future in tqdm(as_completed(future_to_sentence), total=len(future_to_sentence), desc="[gen_queries] Generating queries", unit="claim"):
+        sentence = future_to_sentence[future]
+        try:
+            claim, query_items = future.result()
+            claims.append(claim)
+            queries_by_claim[claim.cid] = query_items
+        except Exception as exc:
+            logger.error("[gen_queries] Error processing sentence %s: %s", sentence.sid, exc)
+            # Create a claim with empty queries on error
+            claim = _claim_for(sentence, anchor_terms)
+            claims.append(claim)
+            queries_by_claim[claim.cid] = []
     
     total_queries = sum(len(qs) for qs in queries_by_claim.values())
     logger.info("[gen_queries] Generated %d queries for %d claims", total_queries, len(claims))
-    state.claims = claims
-    state.queries_by_claim = queries_by_claim
+    _merge_claims(state, claims, queries_by_claim)
+    return state
+
+
+async def agen_queries_node(state: GraphState) -> GraphState:
+    logger.info("[gen_queries] Generating search queries for claims")
+    llm = AsyncLlmClient.shared(state.config, "gen_queries")
+    anchor_terms = state.anchor_summary.get("key_terms", []) if state.anchor_summary else []
+    with llm_stage("gen_queries"):
+        results = await asyncio.gather(
+            *(
+                _agenerate_queries_for_sentence(
+                    sentence, state.anchor_summary, anchor_terms, state.seed_papers, llm, state.config
+                )
+                for sentence in _sentences_needing_cites(state)
+            )
+        )
+    queries_by_claim = {claim.cid: query_items for claim, query_items in results}
+    total_queries = sum(len(qs) for qs in queries_by_claim.values())
+    logger.info("[gen_queries] Generated %d queries for %d claims", total_queries, len(results))
+    _merge_claims(state, [claim for claim, _ in results], queries_by_claim)
     return state
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from ..state import BibliographyEntry, CitationNeed, GraphState, QueryItem, SelectedForClaim, SentenceItem
+from ...tools.logger import get_logger
+from ...tools.manifest import load_manifest, sentence_hash
+from .gen_queries import _claim_for
+from .synthesize import _known_urls, _record_entry
+
+logger = get_logger(__name__)
+
+
+def _entries_to_restore(state: GraphState, record: Dict[str, Any]) -> Optional[List[BibliographyEntry]]:
+    """Entries a reused sentence needs that the bibliography does not have yet.
+
+    None if one of them can no longer be added under its key; the sentence is
+    then processed again.
+    """
+    entries = []
+    for data in record.get("entries", []):
+        entry = BibliographyEntry(**data)
+        if entry.doi and entry.doi.lower() in state.existing_doi_index:
+            continue
+        if entry.url and entry.url.lower() in state.existing_url_index:
+            continue
+        if entry.bibkey in state.existing_bib_entries:
+            return None
+        other = state.new_bib_entries.get(entry.bibkey)
+        if other is not None and (other.doi, other.url) != (entry.doi, entry.url):
+            return None
+        entries.append(entry)
+    return entries
+
+
+def _reuse(
+    state: GraphState,
+    sentence: SentenceItem,
+    record: Dict[str, Any],
+    anchor_terms: list,
+    existing_urls: set,
+) -> bool:
+    need = CitationNeed(sid=sentence.sid, **record["need"])
+    if not need.needs_more_citations:
+        state.citation_needs.append(need)
+        return True
+    if "selected" not in record:
+        return False
+    entries = _entries_to_restore(state, record)
+    if entries is None:
+        return False
+    claim = _claim_for(sentence, anchor_terms)
+    state.citation_needs.append(need)
+    state.claims.append(claim)
+    state.queries_by_claim[claim.cid] = [QueryItem(cid=claim.cid, **q) for q in record.get("queries", [])]
+    state.selected_by_claim[claim.cid] = SelectedForClaim(cid=claim.cid, **record["selected"])
+    for entry in entries:
+        _record_entry(state, entry, existing_urls)
+    return True
+
+
+def incremental_node(state: GraphState) -> GraphState:
+    """Reuse the previous run's decisions for sentences whose text is unchanged.
+
+    Their citation needs, claims, queries, selected papers and any BibTeX
+    entries those papers need are restored, and their ids are added to
+    `state.reused_sids` so that needs_citation and the per-claim nodes skip
+    them. Does nothing unless `config.incremental` is set.
+    """
+    if not state.config.incremental:
+        return state
+    manifest = load_manifest(state.config)
+    if not manifest:
+        return state
+    records = manifest.get("sentences", {})
+    anchor_terms = state.anchor_summary.get("key_terms", []) if state.anchor_summary else []
+    existing_urls = _known_urls(state)
+    for sentence in state.sentences:
+        record = records.get(sentence_hash(sentence.text))
+        if record and _reuse(state, sentence, record, anchor_terms, existing_urls):
+            state.reused_sids.add(sentence.sid)
+    logger.info(
+        "[incremental] Reusing %d of %d sentences; %d are new or edited",
+        len(state.reused_sids),
+        len(state.sentences),
+        len(state.sentences) - len(state.reused_sids),
+    )
+    return state
@@ -33,8 +33,13 @@ def ingest_node(state: GraphState) -> GraphState:
     input_path = state.config.input_path
     if not input_path:
         raise ValueError("input_path is required")
-    with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.read()
+    if state.raw_text:
+        # Text supplied by the caller (e.g. the server's unsaved editor buffer);
+        # input_path still locates the bibliography.
+        text = state.raw_text
+    else:
+        with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
     state.raw_text = text
 
     if state.config.bib_path_override:
@@ -56,6 +56,7 @@ def insert_node(state: GraphState) -> GraphState:
         
         # If we have valid BibTeX keys, insert citations (even if status is NEED_MANUAL)
         if keys:
+            state.inserted_keys[sid] = keys
             if "\\cite" in sentence.text:
                 new_sentence = append_cite(sentence.text, keys)
                 logger.info("[insert] Appended citations %s to existing cite in sentence %s (status: %s)", 
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import partial
+import asyncio
+import json
+from concurrent.futures import as_completed
+from typing import Dict, List
 
-from ..prompts import NEEDS_CITATION_SYSTEM, NEEDS_CITATION_USER
+from ..prompts import NEEDS_CITATION_BATCH_USER, NEEDS_CITATION_SYSTEM, NEEDS_CITATION_USER
+from ..schemas import NeedsCitationBatch, NeedsCitationResult
 from ..state import CitationNeed, GraphState
 from ...tools.latex_utils import extract_cite_commands, sentence_has_any_cite
-from ...tools.llm import LlmClient
+from ...tools.llm import AsyncLlmClient, LlmClient
+from ...tools.llm_scheduler import get_llm_scheduler, llm_stage
 from ...tools.logger import get_logger
+from ...tools.metrics import record_cascade
+from ...tools.prefilter import SentencePrefilter
+from ...tools.text_utils import estimate_tokens, pack_by_tokens
 
 logger = get_logger(__name__)
 
@@ -25,89 +32,260 @@ def _count_cites(sentence_text: str) -> int:
     return sum(len(span.keys) for span in extract_cite_commands(sentence_text))
 
 
+_SCHEMA_HINT = (
+    '{"needs_citation":true,"already_cited":false,"needs_more_citations":true,'
+    '"claim_type":"prior_work","rationale":"...","scope":"sentence","confidence":0.9}'
+)
+
+
+_BATCH_SCHEMA_HINT = (
+    '{"results":[{"sid":"S1","needs_citation":true,"already_cited":false,"needs_more_citations":true,'
+    '"claim_type":"prior_work","rationale":"...","scope":"sentence","confidence":0.9}]}'
+)
+
+
+def _build_need(sentence, result) -> CitationNeed:
+    already_cited = sentence_has_any_cite(sentence.text)
+    claim_type = result.get("claim_type", "no_cite")
+    needs_citation = bool(result.get("needs_citation", False)) and claim_type != "no_cite"
+    cite_count = _count_cites(sentence.text)
+    threshold = 2 if claim_type == "comparison" else 1
+    needs_more = needs_citation and (not already_cited or cite_count < threshold)
+    return CitationNeed(
+        sid=sentence.sid,
+        needs=needs_citation,
+        already_cited=already_cited,
+        needs_more_citations=needs_more if claim_type in _STRONG_CLAIM_TYPES else needs_more,
+        claim_type=claim_type,
+        rationale=result.get("rationale", ""),
+        scope=result.get("scope", "sentence"),
+        confidence=float(result.get("confidence", 0.0)),
+    )
+
+
+def _error_need(sentence, exc: Exception) -> CitationNeed:
+    return CitationNeed(
+        sid=sentence.sid,
+        needs=False,
+        already_cited=sentence_has_any_cite(sentence.text),
+        needs_more_citations=False,
+        claim_type="no_cite",
+        rationale=f"Error: {exc}",
+        scope="sentence",
+        confidence=0.0,
+    )
+
+
+def _prefiltered_need(sentence, source: str, reason: str) -> CitationNeed:
+    return CitationNeed(
+        sid=sentence.sid,
+        needs=False,
+        already_cited=False,
+        needs_more_citations=False,
+        claim_type="no_cite",
+        rationale=f"Pre-filter: {reason}",
+        scope="sentence",
+        source=source,
+    )
+
+
+def _apply_prefilter(state: GraphState):
+    """Split sentences into decided needs and those for the LLM.
+
+    Needs are decided by an incremental run's manifest (unchanged sentences)
+    or by the pre-filter (plainly non-citable ones).
+    """
+    reused = {n.sid: n for n in state.citation_needs if n.sid in state.reused_sids}
+    pending = [s for s in state.sentences if s.sid not in reused]
+    if reused:
+        logger.info("[needs_citation] Reusing %d decisions for unchanged sentences", len(reused))
+    prefilter = SentencePrefilter.from_config(state.config)
+    if prefilter is None:
+        return reused, pending
+    skipped = dict(reused)
+    remaining = []
+    for sentence in pending:
+        verdict = prefilter.check(sentence.text)
+        if verdict:
+            skipped[sentence.sid] = _prefiltered_need(sentence, *verdict)
+        else:
+            remaining.append(sentence)
+    if len(skipped) > len(reused):
+        logger.info("[needs_citation] Pre-filter marked %d sentences as no-cite", len(skipped) - len(reused))
+    return skipped, remaining
+
+
 def _process_sentence(sentence, anchor, llm):
     """Process a single sentence to determine citation needs."""
     prompt = NEEDS_CITATION_USER.format(anchor=anchor, sentence=sentence.text)
-    schema_hint = (
-        '{"needs_citation":true,"already_cited":false,"needs_more_citations":true,'
-        '"claim_type":"prior_work","rationale":"...","scope":"sentence"}'
-    )
     try:
-        result = llm.chat_json(schema_hint, NEEDS_CITATION_SYSTEM, prompt)
-        already_cited = sentence_has_any_cite(sentence.text)
-        claim_type = result.get("claim_type", "no_cite")
-        needs_citation = bool(result.get("needs_citation", False)) and claim_type != "no_cite"
-        cite_count = _count_cites(sentence.text)
-        threshold = 2 if claim_type == "comparison" else 1
-        needs_more = needs_citation and (not already_cited or cite_count < threshold)
-        return CitationNeed(
-            sid=sentence.sid,
-            needs=needs_citation,
-            already_cited=already_cited,
-            needs_more_citations=needs_more if claim_type in _STRONG_CLAIM_TYPES else needs_more,
-            claim_type=claim_type,
-            rationale=result.get("rationale", ""),
-            scope=result.get("scope", "sentence"),
-        )
+        result = llm.chat_json(_SCHEMA_HINT, NEEDS_CITATION_SYSTEM, prompt, NeedsCitationResult)
+        return _build_need(sentence, result)
     except Exception as exc:
         logger.warning("[needs_citation] Failed to process sentence %s: %s", sentence.sid, exc)
         # Return a default CitationNeed on error
-        already_cited = sentence_has_any_cite(sentence.text)
-        return CitationNeed(
-            sid=sentence.sid,
-            needs=False,
-            already_cited=already_cited,
-            needs_more_citations=False,
-            claim_type="no_cite",
-            rationale=f"Error: {exc}",
-            scope="sentence",
+        return _error_need(sentence, exc)
+
+
+async def _aprocess_sentence(sentence, anchor, llm):
+    prompt = NEEDS_CITATION_USER.format(anchor=anchor, sentence=sentence.text)
+    try:
+        result = await llm.chat_json(_SCHEMA_HINT, NEEDS_CITATION_SYSTEM, prompt, NeedsCitationResult)
+        return _build_need(sentence, result)
+    except Exception as exc:
+        logger.warning("[needs_citation] Failed to process sentence %s: %s", sentence.sid, exc)
+        return _error_need(sentence, exc)
+
+
+def _sentence_batches(sentences, config) -> List[list]:
+    """Group sentences into prompts of at most `needs_citation_batch_size`
+    sentences and roughly `needs_citation_batch_tokens` tokens of text."""
+    return pack_by_tokens(
+        sentences,
+        lambda sentence: estimate_tokens(sentence.text),
+        config.needs_citation_batch_size,
+        config.needs_citation_batch_tokens,
+    )
+
+
+def _batch_prompt(batch, anchor) -> str:
+    sentences = json.dumps([{"sid": s.sid, "text": s.text} for s in batch], ensure_ascii=False, indent=1)
+    return NEEDS_CITATION_BATCH_USER.format(anchor=anchor, sentences=sentences)
+
+
+def _batch_results(batch, result) -> Dict[str, dict]:
+    """Map sids of this batch to their result objects; unknown sids are dropped."""
+    wanted = {s.sid for s in batch}
+    items = result.get("results", []) if isinstance(result, dict) else result
+    by_sid: Dict[str, dict] = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and item.get("sid") in wanted:
+            by_sid.setdefault(item["sid"], item)
+    return by_sid
+
+
+def _process_batch(batch, anchor, llm) -> List[CitationNeed]:
+    """Classify a batch in one call, re-asking per sentence only for sids the model dropped."""
+    if len(batch) == 1:
+        return [_process_sentence(batch[0], anchor, llm)]
+    try:
+        result = llm.chat_json(
+            _BATCH_SCHEMA_HINT, NEEDS_CITATION_SYSTEM, _batch_prompt(batch, anchor), NeedsCitationBatch
+        )
+        by_sid = _batch_results(batch, result)
+    except Exception as exc:
+        logger.warning("[needs_citation] Batch of %d sentences failed, classifying individually: %s", len(batch), exc)
+        by_sid = {}
+    missing = [s for s in batch if s.sid not in by_sid]
+    if missing and by_sid:
+        logger.debug("[needs_citation] Batch response missed %d sentences", len(missing))
+    return [
+        _build_need(s, by_sid[s.sid]) if s.sid in by_sid else _process_sentence(s, anchor, llm) for s in batch
+    ]
+
+
+async def _aprocess_batch(batch, anchor, llm) -> List[CitationNeed]:
+    if len(batch) == 1:
+        return [await _aprocess_sentence(batch[0], anchor, llm)]
+    try:
+        result = await llm.chat_json(
+            _BATCH_SCHEMA_HINT, NEEDS_CITATION_SYSTEM, _batch_prompt(batch, anchor), NeedsCitationBatch
         )
+        by_sid = _batch_results(batch, result)
+    except Exception as exc:
+        logger.warning("[needs_citation] Batch of %d sentences failed, classifying individually: %s", len(batch), exc)
+        by_sid = {}
+    missing = [s for s in batch if s.sid not in by_sid]
+    if missing and by_sid:
+        logger.debug("[needs_citation] Batch response missed %d sentences", len(missing))
+    retried = await asyncio.gather(*(_aprocess_sentence(s, anchor, llm) for s in missing))
+    needs = {need.sid: need for need in retried}
+    return [_build_need(s, by_sid[s.sid]) if s.sid in by_sid else needs[s.sid] for s in batch]
+
+
+def _unsure(batch, needs, config) -> list:
+    return [s for s, need in zip(batch, needs) if need.confidence < config.cascade_min_confidence]
+
+
+def _merge_escalated(needs, escalated) -> List[CitationNeed]:
+    by_sid = {need.sid: need.model_copy(update={"escalated": True}) for need in escalated}
+    return [by_sid.get(need.sid, need) for need in needs]
+
+
+def _cascade_batch(batch, anchor, llm, cheap_llm, config) -> List[CitationNeed]:
+    """Classify on the cheap model, re-running low-confidence sentences on `llm`."""
+    if cheap_llm is None:
+        return _process_batch(batch, anchor, llm)
+    needs = _process_batch(batch, anchor, cheap_llm)
+    unsure = _unsure(batch, needs, config)
+    record_cascade(len(batch), len(unsure))
+    if not unsure:
+        return needs
+    return _merge_escalated(needs, _process_batch(unsure, anchor, llm))
+
+
+async def _acascade_batch(batch, anchor, llm, cheap_llm, config) -> List[CitationNeed]:
+    if cheap_llm is None:
+        return await _aprocess_batch(batch, anchor, llm)
+    needs = await _aprocess_batch(batch, anchor, cheap_llm)
+    unsure = _unsure(batch, needs, config)
+    record_cascade(len(batch), len(unsure))
+    if not unsure:
+        return needs
+    return _merge_escalated(needs, await _aprocess_batch(unsure, anchor, llm))
 
 
 def needs_citation_node(state: GraphState) -> GraphState:
     logger.info("[needs_citation] Classifying sentences for citation needs")
-    llm = LlmClient(
-        api_key=state.config.openai_api_key,
-        base_url=state.config.openai_base_url,
-        model=state.config.openai_model,
-    )
+    llm = LlmClient.shared(state.config, "needs_citation")
+    cheap_llm = LlmClient.shared(state.config, model=state.config.cascade_model) if state.config.cascade_model else None
     anchor = state.anchor_summary
-    needs = []
-    
-    # Process sentences in parallel
-    max_workers = min(10, len(state.sentences))  # Limit concurrent requests
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_sentence = {
-            executor.submit(_process_sentence, sentence, anchor, llm): sentence
-            for sentence in state.sentences
-        }
-        
-        # Collect results as they complete, maintaining order
-        results = {}
-        for future in as_completed(future_to_sentence):
-            sentence = future_to_sentence[future]
-            try:
-                result = future.result()
-                results[sentence.sid] = result
-            except Exception as exc:
-                logger.error("[needs_citation] Error processing sentence %s: %s", sentence.sid, exc)
-                # Create a default CitationNeed on error
-                already_cited = sentence_has_any_cite(sentence.text)
-                results[sentence.sid] = CitationNeed(
-                    sid=sentence.sid,
-                    needs=False,
-                    already_cited=already_cited,
-                    needs_more_citations=False,
-                    claim_type="no_cite",
-                    rationale=f"Error: {exc}",
-                    scope="sentence",
-                )
-    
+    results, remaining = _apply_prefilter(state)
+    batches = _sentence_batches(remaining, state.config)
+    logger.info("[needs_citation] Classifying %d sentences in %d requests", len(remaining), len(batches))
+
+    scheduler = get_llm_scheduler()
+    future_to_batch = {
+        scheduler.submit("needs_citation", _cascade_batch, batch, anchor, llm, cheap_llm, state.config): batch
+        for batch in batches
+    }
+    for future in as_completed(future_to_batch):
+        batch = future_to_batch[future]
+        try:
+            for need in future.result():
+                results[need.sid] = need
+        except Exception as exc:
+            logger.error("[needs_citation] Error processing batch starting at %s: %s", batch[0].sid, exc)
+            for sentence in batch:
+                results[sentence.sid] = _error_need(sentence, exc)
+
     # Maintain original order
     needs = [results[sentence.sid] for sentence in state.sentences]
-    
+
     needs_count = sum(1 for n in needs if n.needs_more_citations)
     logger.info("[needs_citation] Found %d sentences needing citations (out of %d total)", needs_count, len(needs))
     state.citation_needs = needs
     return state
+
+
+async def aneeds_citation_node(state: GraphState) -> GraphState:
+    logger.info("[needs_citation] Classifying sentences for citation needs")
+    llm = AsyncLlmClient.shared(state.config, "needs_citation")
+    cheap_llm = (
+        AsyncLlmClient.shared(state.config, model=state.config.cascade_model) if state.config.cascade_model else None
+    )
+    anchor = state.anchor_summary
+    results, remaining = _apply_prefilter(state)
+    batches = _sentence_batches(remaining, state.config)
+    logger.info("[needs_citation] Classifying %d sentences in %d requests", len(remaining), len(batches))
+    with llm_stage("needs_citation"):
+        batch_results = await asyncio.gather(
+            *(_acascade_batch(batch, anchor, llm, cheap_llm, state.config) for batch in batches)
+        )
+    for batch_needs in batch_results:
+        results.update((need.sid, need) for need in batch_needs)
+    needs = [results[sentence.sid] for sentence in state.sentences]
+    needs_count = sum(1 for n in needs if n.needs_more_citations)
+    logger.info("[needs_citation] Found %d sentences needing citations (out of %d total)", needs_count, len(needs))
+    state.citation_needs = list(needs)
+    return state
@@ -1,17 +1,49 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+from typing import Dict, List, Optional, Tuple
 
-from ..state import GraphState, SeedPaper
+from ..state import GraphState, PaperCandidate, SeedPaper
 from ...tools.bibtex_io import read_bibtex
 from ...tools.latex_utils import extract_cite_commands, normalize_bibkeys
 from ...tools.logger import get_logger
-from ...tools.semantic_scholar import SemanticScholarClient
+from ...tools.semantic_scholar import AsyncSemanticScholarClient, SemanticScholarClient
 from ...tools.text_utils import normalize_title
 
 logger = get_logger(__name__)
 
 
+def _split_bib_entries(state: GraphState):
+    doi_seeds: List[SeedPaper] = []
+    title_lookups: List[Tuple[str, str]] = []
+    for bibkey, entry in state.existing_bib_entries.items():
+        if entry.doi:
+            doi_seeds.append(SeedPaper(bibkey=bibkey, resolved_doi=entry.doi, source="crossref"))
+        elif entry.title:
+            title_lookups.append((bibkey, entry.title))
+    return doi_seeds, title_lookups
+
+
+def _attach_paper_ids(seeds: List[SeedPaper], records: Dict[str, Optional[dict]]) -> None:
+    for seed in seeds:
+        record = records.get(seed.resolved_doi or "")
+        if record:
+            seed.paper_id = record.get("paperId")
+            seed.resolved_title = seed.resolved_title or record.get("title")
+
+
+def _seed_from_match(bibkey: str, title: str, candidate: Optional[PaperCandidate]) -> Optional[SeedPaper]:
+    if candidate and candidate.title and normalize_title(candidate.title) == normalize_title(title):
+        return SeedPaper(
+            bibkey=bibkey,
+            resolved_doi=candidate.doi,
+            resolved_title=candidate.title,
+            paper_id=candidate.paper_id,
+            source="s2",
+        )
+    return None
+
+
 def _build_seed_papers(state: GraphState) -> List[SeedPaper]:
     if not state.config.enable_seed_expansion:
         return []
@@ -22,28 +54,49 @@ def _build_seed_papers(state: GraphState) -> List[SeedPaper]:
         api_key=state.config.semantic_scholar_api_key,
         cache_dir=state.config.cache_dir,
     )
-    seeds: List[SeedPaper] = []
-    for bibkey, entry in state.existing_bib_entries.items():
-        if entry.doi:
-            seeds.append(SeedPaper(bibkey=bibkey, resolved_doi=entry.doi, source="crossref"))
-            continue
-        title = entry.title
-        if not title:
-            continue
-        candidate = client.lookup_by_title(title)
-        if candidate and candidate.title and normalize_title(candidate.title) == normalize_title(title):
-            seeds.append(
-                SeedPaper(
-                    bibkey=bibkey,
-                    resolved_doi=candidate.doi,
-                    resolved_title=candidate.title,
-                    source="s2",
-                )
-            )
+    seeds, lookups = _split_bib_entries(state)
+    if seeds:
+        try:
+            _attach_paper_ids(seeds, client.resolve_dois([seed.resolved_doi for seed in seeds]))
+        except Exception as exc:
+            logger.warning("[parse_existing_cites] Batch DOI resolution failed: %s", exc)
+    matches = client.lookup_titles([title for _, title in lookups], max_workers=state.config.seed_lookup_workers)
+    for (bibkey, title), match in zip(lookups, matches):
+        seed = _seed_from_match(bibkey, title, match)
+        if seed:
+            seeds.append(seed)
     return seeds
 
 
-def parse_existing_cites_node(state: GraphState) -> GraphState:
+async def _abuild_seed_papers(state: GraphState) -> List[SeedPaper]:
+    if not state.config.enable_seed_expansion:
+        return []
+    if not state.existing_bib_entries:
+        return []
+    client = AsyncSemanticScholarClient(
+        base_url=state.config.s2_base_url,
+        api_key=state.config.semantic_scholar_api_key,
+        cache_dir=state.config.cache_dir,
+    )
+    seeds, lookups = _split_bib_entries(state)
+
+    async def _resolve() -> None:
+        if not seeds:
+            return
+        try:
+            _attach_paper_ids(seeds, await client.resolve_dois([seed.resolved_doi for seed in seeds]))
+        except Exception as exc:
+            logger.warning("[parse_existing_cites] Batch DOI resolution failed: %s", exc)
+
+    _, matches = await asyncio.gather(_resolve(), client.lookup_titles([title for _, title in lookups]))
+    for (bibkey, title), match in zip(lookups, matches):
+        seed = _seed_from_match(bibkey, title, match)
+        if seed:
+            seeds.append(seed)
+    return seeds
+
+
+def _parse_existing(state: GraphState) -> None:
     logger.info("[parse_existing_cites] Extracting existing citations and BibTeX entries")
     state.existing_cites = extract_cite_commands(state.raw_text)
     keys = []
@@ -58,7 +111,19 @@ def parse_existing_cites_node(state: GraphState) -> GraphState:
             state.existing_doi_index[entry.doi.lower()] = bibkey
         if entry.url:
             state.existing_url_index[entry.url.lower()] = bibkey
+
+
+def parse_existing_cites_node(state: GraphState) -> GraphState:
+    _parse_existing(state)
     state.seed_papers = _build_seed_papers(state)
     if state.seed_papers:
         logger.info("[parse_existing_cites] Resolved %d seed papers for expansion", len(state.seed_papers))
     return state
+
+
+async def aparse_existing_cites_node(state: GraphState) -> GraphState:
+    _parse_existing(state)
+    state.seed_papers = await _abuild_seed_papers(state)
+    if state.seed_papers:
+        logger.info("[parse_existing_cites] Resolved %d seed papers for expansion", len(state.seed_papers))
+    return state
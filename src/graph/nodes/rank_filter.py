@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
 
+import openai
+from pydantic import ValidationError
 from tqdm import tqdm
 
-from ..prompts import SCORER_SYSTEM, SCORER_USER
+from ..prompts import SCORER_MULTI_USER, SCORER_SYSTEM, SCORER_USER
+from ..schemas import ScoreBatch
 from ..state import GraphState, PaperCandidate, SelectedForClaim
-from ...tools.llm import LlmClient
+from ...tools.checkpoint import claim_checkpoint, record_claim
+from ...tools.dedupe import paper_key
+from ...tools.llm import AsyncLlmClient, LlmClient
+from ...tools.llm_scheduler import LlmScheduler, get_llm_scheduler, llm_stage
 from ...tools.logger import get_logger
+from ...tools.metrics import claim_scope, record_cascade
+from ...tools.prerank import prerank_candidates
+from ...tools.progress import emit_claim
+from ...tools.score_cache import ScoreCache
+from ...tools.text_utils import estimate_tokens, pack_by_tokens, truncate_to_tokens
 
 logger = get_logger(__name__)
 
@@ -46,58 +60,235 @@ def _authority_score(paper: PaperCandidate, year_min: int) -> float:
     return max(0.0, min(1.0, score))
 
 
-def _score_batch(llm: LlmClient, claim_text: str, batch: List[PaperCandidate]) -> List[dict]:
-    payload = []
-    for p in batch:
-        payload.append(
-            {
-                "paper_id": p.paper_id,
-                "title": p.title,
-                "year": p.year,
-                "venue": p.venue,
-                "citation_count": p.citation_count,
-                "abstract": p.abstract,
-            }
+_SCHEMA_HINT = (
+    '{"scores":[{"paper_id":"...","relevance":0.5,"support":0.5,"authority":0.2,"evidence_snippet":"","why":"..."}]}'
+)
+_MULTI_SCHEMA_HINT = (
+    '{"scores":[{"paper_id":"P0","claim_id":"...","relevance":0.5,"support":0.5,"authority":0.2,'
+    '"evidence_snippet":"","why":"..."}]}'
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt_version(abstract_tokens: int) -> str:
+    """Version of the scorer prompts for the score cache: editing a prompt or the
+    abstract budget changes it, so old scores are not reused."""
+    material = "\n".join(
+        [SCORER_SYSTEM, SCORER_USER, SCORER_MULTI_USER, _SCHEMA_HINT, _MULTI_SCHEMA_HINT, str(abstract_tokens)]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def _score_cache(config, llm) -> ScoreCache:
+    version = _prompt_version(config.scoring_abstract_tokens)
+    return ScoreCache(config.cache_dir, config.score_cache_mode, llm.model, version)
+
+
+# A cross-claim batch: each unique paper with every claim's own copy of it.
+PairBatch = List[Tuple[PaperCandidate, Dict[str, PaperCandidate]]]
+
+
+def _paper_payload(p: PaperCandidate, config) -> dict:
+    # Scores come back keyed by this id, so papers without an S2 id (Perplexity
+    # results) are sent with their DOI or title key instead of a shared None.
+    return {
+        "paper_id": paper_key(p),
+        "title": p.title,
+        "year": p.year,
+        "venue": p.venue,
+        "citation_count": p.citation_count,
+        "abstract": truncate_to_tokens(p.abstract, config.scoring_abstract_tokens),
+    }
+
+
+def _paper_tokens(p: PaperCandidate, config) -> int:
+    return estimate_tokens(str(_paper_payload(p, config)))
+
+
+def _score_prompt(claim_text: str, batch: List[PaperCandidate], config) -> str:
+    payload = [_paper_payload(p, config) for p in batch]
+    return SCORER_USER.format(claim=claim_text, papers=payload)
+
+
+def _multi_score_prompt(group, batch: PairBatch, config, start: int = 0) -> str:
+    claims = [{"claim_id": claim.cid, "text": claim.text} for claim in group]
+    # Papers are numbered by position in the batch (S2 ids can be missing or
+    # shared by copies); `start` keeps the numbers when a batch is split.
+    papers = [
+        dict(_paper_payload(paper, config), paper_id=f"P{start + i}", claim_ids=list(copies))
+        for i, (paper, copies) in enumerate(batch)
+    ]
+    return SCORER_MULTI_USER.format(claims=claims, papers=papers)
+
+
+def _splittable(exc: Exception) -> bool:
+    """Whether a smaller batch can fix the failure: a prompt over the context
+    window, or a reply that could not be parsed or validated. Anything else
+    (another 400, auth, outages) would fail the halves too."""
+    if isinstance(exc, openai.BadRequestError):
+        message = str(exc).lower()
+        return exc.code == "context_length_exceeded" or "context length" in message or "maximum context" in message
+    return isinstance(exc, (ValidationError, ValueError))
+
+
+def _with_split_retry(score, batch: list, label: str) -> List[dict]:
+    """Score a batch; if it is too long or its reply is malformed, score each half instead."""
+    try:
+        return score(batch)
+    except Exception as exc:
+        if not _splittable(exc):
+            raise
+        if len(batch) == 1:
+            logger.warning("[rank_filter] Could not score a paper for %s: %s", label, exc)
+            return []
+        logger.warning("[rank_filter] Batch of %d papers for %s failed, splitting: %s", len(batch), label, exc)
+        mid = len(batch) // 2
+        return _with_split_retry(score, batch[:mid], label) + _with_split_retry(score, batch[mid:], label)
+
+
+async def _awith_split_retry(score, batch: list, label: str) -> List[dict]:
+    try:
+        return await score(batch)
+    except Exception as exc:
+        if not _splittable(exc):
+            raise
+        if len(batch) == 1:
+            logger.warning("[rank_filter] Could not score a paper for %s: %s", label, exc)
+            return []
+        logger.warning("[rank_filter] Batch of %d papers for %s failed, splitting: %s", len(batch), label, exc)
+        mid = len(batch) // 2
+        halves = await asyncio.gather(
+            _awith_split_retry(score, batch[:mid], label), _awith_split_retry(score, batch[mid:], label)
         )
-    prompt = SCORER_USER.format(claim=claim_text, papers=payload)
-    schema_hint = '[{"paper_id":"...","relevance":0.5,"support":0.5,"authority":0.2,"evidence_snippet":"","why":"..."}]'
-    result = llm.chat_json(schema_hint, SCORER_SYSTEM, prompt)
-    return result if isinstance(result, list) else []
+        return halves[0] + halves[1]
 
 
-def _score_claim_candidates(claim, candidates, llm, config):
-    """Score and filter candidates for a single claim."""
-    logger.info("[rank_filter] Scoring %d candidates for claim %s", len(candidates), claim.cid)
+def _score_batch(llm: LlmClient, claim, batch: List[PaperCandidate], config) -> List[dict]:
+    def score(part):
+        prompt = _score_prompt(claim.text, part, config)
+        return llm.chat_json(_SCHEMA_HINT, SCORER_SYSTEM, prompt, ScoreBatch)["scores"]
+
+    scores = _with_split_retry(score, batch, f"claim {claim.cid}")
+    _score_cache(config, llm).store(claim.text, batch, scores)
+    return scores
+
+
+async def _ascore_batch(llm: AsyncLlmClient, claim, batch: List[PaperCandidate], config) -> List[dict]:
+    async def score(part):
+        prompt = _score_prompt(claim.text, part, config)
+        return (await llm.chat_json(_SCHEMA_HINT, SCORER_SYSTEM, prompt, ScoreBatch))["scores"]
+
+    scores = await _awith_split_retry(score, batch, f"claim {claim.cid}")
+    _score_cache(config, llm).store(claim.text, batch, scores)
+    return scores
+
+
+def _part_start(batch: PairBatch, part: PairBatch) -> int:
+    return next(i for i, entry in enumerate(batch) if entry is part[0])
+
+
+def _score_pair_batch(llm: LlmClient, group, batch: PairBatch, config) -> List[dict]:
+    def score(part):
+        prompt = _multi_score_prompt(group, part, config, _part_start(batch, part))
+        return llm.chat_json(_MULTI_SCHEMA_HINT, SCORER_SYSTEM, prompt, ScoreBatch)["scores"]
+
+    return _with_split_retry(score, batch, "a claim group")
+
+
+async def _ascore_pair_batch(llm: AsyncLlmClient, group, batch: PairBatch, config) -> List[dict]:
+    async def score(part):
+        prompt = _multi_score_prompt(group, part, config, _part_start(batch, part))
+        return (await llm.chat_json(_MULTI_SCHEMA_HINT, SCORER_SYSTEM, prompt, ScoreBatch))["scores"]
+
+    return await _awith_split_retry(score, batch, "a claim group")
+
+
+def _batches(candidates: List[PaperCandidate], config) -> List[List[PaperCandidate]]:
+    """Pack a claim's candidates into batches that fit the scoring token budget."""
+    return pack_by_tokens(
+        candidates, lambda p: _paper_tokens(p, config), config.scoring_batch_size, config.scoring_batch_tokens
+    )
+
+
+def _claim_groups(claims, candidates_by_claim, max_claims: int) -> List[list]:
+    """Greedily group claims that share candidate papers, at most `max_claims` per group."""
+    groups: List[Tuple[list, set]] = []
+    for claim in claims:
+        keys = {paper_key(p) for p in candidates_by_claim.get(claim.cid, [])}
+        best, best_overlap = None, 0
+        for members, group_keys in groups:
+            overlap = len(keys & group_keys)
+            if len(members) < max_claims and overlap > best_overlap:
+                best, best_overlap = (members, group_keys), overlap
+        if best is None:
+            groups.append(([claim], keys))
+        else:
+            best[0].append(claim)
+            best[1].update(keys)
+    return [members for members, _ in groups]
+
+
+def _pair_batches(group, candidates_by_claim, config) -> List[PairBatch]:
+    """Unique papers of a claim group, each listed once with the claims it was retrieved for."""
+    pool: Dict[str, Tuple[PaperCandidate, Dict[str, PaperCandidate]]] = {}
+    for claim in group:
+        for paper in candidates_by_claim.get(claim.cid, []):
+            pool.setdefault(paper_key(paper), (paper, {}))[1][claim.cid] = paper
+    return pack_by_tokens(
+        list(pool.values()),
+        lambda entry: _paper_tokens(entry[0], config) + estimate_tokens(str(list(entry[1]))),
+        config.scoring_batch_size,
+        config.scoring_batch_tokens,
+    )
+
+
+def _split_pair_scores(batch: PairBatch, scores: List[dict]) -> Dict[str, Tuple[List[PaperCandidate], List[dict]]]:
+    """Turn a cross-claim reply into per-claim (papers, scores) batch results."""
+    by_pair = {(s.get("paper_id"), s.get("claim_id")): s for s in scores}
+    results: Dict[str, Tuple[List[PaperCandidate], List[dict]]] = {}
+    for i, (_, copies) in enumerate(batch):
+        for cid, paper in copies.items():
+            papers, claim_scores = results.setdefault(cid, ([], []))
+            papers.append(paper)
+            score = by_pair.get((f"P{i}", cid))
+            if score is not None:
+                claim_scores.append(dict(score, paper_id=paper_key(paper)))
+    return results
+
+
+def _cross_claim_jobs(state: GraphState, candidates_by_claim) -> List[Tuple[list, PairBatch]]:
+    groups = _claim_groups(state.claims, candidates_by_claim, state.config.cross_claim_max_claims)
+    jobs = [(group, batch) for group in groups for batch in _pair_batches(group, candidates_by_claim, state.config)]
+    pairs = sum(len(candidates_by_claim.get(claim.cid, [])) for claim in state.claims)
+    papers = sum(len(batch) for _, batch in jobs)
+    logger.info(
+        "[rank_filter] Cross-claim scoring: %d claims in %d groups, %d papers for %d claim-paper pairs",
+        len(state.claims), len(groups), papers, pairs,
+    )
+    return jobs
+
+
+def _cross_claim_scored(state: GraphState, jobs, replies, llm) -> Dict[str, List[PaperCandidate]]:
+    cache = _score_cache(state.config, llm)
+    texts = {claim.cid: claim.text for claim in state.claims}
+    batch_results: Dict[str, list] = {claim.cid: [] for claim in state.claims}
+    for (_, batch), scores in zip(jobs, replies):
+        if isinstance(scores, Exception):
+            logger.warning("[rank_filter] Error scoring cross-claim batch: %s", scores)
+            scores = []
+        for cid, result in _split_pair_scores(batch, scores).items():
+            cache.store(texts[cid], *result)
+            batch_results[cid].append(result)
+    return {cid: _apply_scores(results, state.config) for cid, results in batch_results.items()}
+
+
+def _apply_scores(batch_results, config) -> List[PaperCandidate]:
+    """Merge LLM scores into candidates, in batch order, and compute final scores."""
     scored = []
-    batch_size = 8
-    num_batches = (len(candidates) + batch_size - 1) // batch_size
-    
-    # Process batches in parallel
-    max_workers = min(5, num_batches)  # Limit concurrent batches
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_batch = {}
-        for i in range(0, len(candidates), batch_size):
-            batch = candidates[i : i + batch_size]
-            future = executor.submit(_score_batch, llm, claim.text, batch)
-            future_to_batch[future] = (i, batch)
-        
-        # Collect results and maintain order
-        batch_results = {}
-        for future in as_completed(future_to_batch):
-            i, batch = future_to_batch[future]
-            try:
-                scores = future.result()
-                batch_results[i] = (batch, scores)
-            except Exception as exc:
-                logger.warning("[rank_filter] Error scoring batch for claim %s: %s", claim.cid, exc)
-                batch_results[i] = (batch, [])
-    
-    # Process results in order
-    for i in sorted(batch_results.keys()):
-        batch, scores = batch_results[i]
+    for batch, scores in batch_results:
         score_map = {s.get("paper_id"): s for s in scores}
         for p in batch:
-            score = score_map.get(p.paper_id, {})
+            score = score_map.get(paper_key(p), {})
             p.relevance = float(score.get("relevance", 0.0))
             p.support = float(score.get("support", 0.0))
             p.authority = float(score.get("authority", 0.0))
@@ -113,7 +304,63 @@ def _score_claim_candidates(claim, candidates, llm, config):
                 + (p.seed_boost or 0.0)
             )
             scored.append(p)
-    
+    return scored
+
+
+def _split_cached(state: GraphState, candidates_by_claim, llm):
+    """Look up persisted scores; returns (cached batch result, candidates left to score) per claim."""
+    cache = _score_cache(state.config, llm)
+    cached, missing = {}, {}
+    for claim in state.claims:
+        with claim_scope(claim.cid):
+            cached[claim.cid], missing[claim.cid] = cache.split(claim.text, candidates_by_claim.get(claim.cid, []))
+    hits = sum(len(papers) for papers, _ in cached.values())
+    if hits:
+        logger.info("[rank_filter] Reusing %d cached claim-paper scores", hits)
+    return cached, missing
+
+
+def _finish_scores(state: GraphState, cid: str, scored, cached):
+    """A claim's new scores plus its cached ones, recorded so a resumed run need not score it again."""
+    if isinstance(scored, Exception):
+        return scored
+    result = cached.get(cid)
+    if result and result[0]:
+        scored = _apply_scores([result], state.config) + scored
+    record_claim(state.config, "rank_filter", cid, [p.model_dump() for p in scored])
+    return scored
+
+
+def _checkpointed_scores(state: GraphState) -> Tuple[GraphState, Dict[str, object]]:
+    """`state` without the claims scored before a resume, and the first-pass scores recorded for those."""
+    done: Dict[str, object] = {}
+    for claim in state.claims:
+        saved = claim_checkpoint(state.config, "rank_filter", claim.cid)
+        if saved is not None:
+            done[claim.cid] = [PaperCandidate.model_validate(p) for p in saved]
+    if not done:
+        return state, done
+    logger.info("[rank_filter] Reusing the scores of %d claims from before the resume", len(done))
+    return state.model_copy(update={"claims": [c for c in state.claims if c.cid not in done]}), done
+
+
+def _ambiguous(scored: List[PaperCandidate], config) -> List[PaperCandidate]:
+    """Papers whose support or final score sits within the cascade band of its threshold."""
+    band = config.cascade_score_band
+    return [
+        p
+        for p in scored
+        if abs(p.support - config.support_score_min) <= band or abs(p.final - config.final_score_threshold) <= band
+    ]
+
+
+def _apply_escalated(batch: List[PaperCandidate], scores: List[dict], config) -> None:
+    """Overwrite the cheap-model scores of papers the stage model scored; others keep theirs."""
+    scored_keys = {s.get("paper_id") for s in scores}
+    _apply_scores([([p for p in batch if paper_key(p) in scored_keys], scores)], config)
+
+
+def _select(claim, scored: List[PaperCandidate], config) -> SelectedForClaim:
     scored.sort(key=lambda x: x.final, reverse=True)
     chosen = [
         p
@@ -136,40 +383,222 @@ def _score_claim_candidates(claim, candidates, llm, config):
         return SelectedForClaim(cid=claim.cid, papers=chosen, status="OK", notes="")
 
 
-def rank_filter_node(state: GraphState) -> GraphState:
-    logger.info("[rank_filter] Scoring and filtering paper candidates")
-    llm = LlmClient(
-        api_key=state.config.openai_api_key,
-        base_url=state.config.openai_base_url,
-        model=state.config.openai_model,
+def _submit_claim_batches(
+    scheduler: LlmScheduler, claim, candidates, llm, config
+) -> List[Tuple[List[PaperCandidate], Future]]:
+    """Queue one scoring request per batch of a claim's candidates."""
+    logger.info("[rank_filter] Scoring %d candidates for claim %s", len(candidates), claim.cid)
+    with claim_scope(claim.cid):
+        return [
+            (batch, scheduler.submit("rank_filter", _score_batch, llm, claim, batch, config))
+            for batch in _batches(candidates, config)
+        ]
+
+
+def _collect_claim_scores(claim, submitted, config) -> List[PaperCandidate]:
+    """Wait for a claim's scoring batches and merge the scores, in batch order."""
+    batch_results = []
+    for batch, future in submitted:
+        try:
+            scores = future.result()
+        except Exception as exc:
+            logger.warning("[rank_filter] Error scoring batch for claim %s: %s", claim.cid, exc)
+            scores = []
+        batch_results.append((batch, scores))
+    return _apply_scores(batch_results, config)
+
+
+async def _ascore_claim_candidates(claim, candidates, llm, config):
+    logger.info("[rank_filter] Scoring %d candidates for claim %s", len(candidates), claim.cid)
+    batches = _batches(candidates, config)
+    results = await asyncio.gather(
+        *(_ascore_batch(llm, claim, batch, config) for batch in batches), return_exceptions=True
     )
-    selected = {}
-    
-    # Process claims in parallel
-    max_workers = min(5, len(state.claims))  # Limit concurrent claims
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_claim = {
-            executor.submit(
-                _score_claim_candidates,
-                claim,
-                state.candidates_by_claim.get(claim.cid, []),
-                llm,
-                state.config,
-            ): claim
-            for claim in state.claims
-        }
-        
-        # Collect results
-        for future in tqdm(as_completed(future_to_claim), total=len(future_to_claim), desc="[rank_filter] Scoring candidates", unit="claim"):
-            claim = future_to_claim[future]
+    batch_results = []
+    for batch, scores in zip(batches, results):
+        if isinstance(scores, Exception):
+            logger.warning("[rank_filter] Error scoring batch for claim %s: %s", claim.cid, scores)
+            scores = []
+        batch_results.append((batch, scores))
+    return _apply_scores(batch_results, config)
+
+
+def _prerank(state: GraphState):
+    """Keep only the lexically closest candidates of each claim for LLM scoring."""
+    ranked = prerank_candidates(state.claims, state.candidates_by_claim, state.config.prerank_top_m)
+    total = sum(len(state.candidates_by_claim.get(claim.cid, [])) for claim in state.claims)
+    kept = sum(len(candidates) for candidates in ranked.values())
+    if kept < total:
+        logger.info("[rank_filter] Pre-ranking kept %d of %d candidates for LLM scoring", kept, total)
+    return ranked
+
+
+def _score_cross_claim(state: GraphState, candidates_by_claim, llm, scheduler) -> Dict[str, List[PaperCandidate]]:
+    jobs = _cross_claim_jobs(state, candidates_by_claim)
+    futures = [
+        scheduler.submit("rank_filter", _score_pair_batch, llm, group, batch, state.config) for group, batch in jobs
+    ]
+    replies = []
+    for future in futures:
+        try:
+            replies.append(future.result())
+        except Exception as exc:
+            replies.append(exc)
+    return _cross_claim_scored(state, jobs, replies, llm)
+
+
+def _score_per_claim(state: GraphState, candidates_by_claim, cached, llm, scheduler) -> Dict[str, object]:
+    # Every batch of every claim is queued up front; the scheduler caps how
+    # many run at once.
+    submitted = {
+        claim.cid: _submit_claim_batches(scheduler, claim, candidates_by_claim[claim.cid], llm, state.config)
+        for claim in state.claims
+    }
+    scored: Dict[str, object] = {}
+    for claim in tqdm(state.claims, desc="[rank_filter] Scoring candidates", unit="claim"):
+        try:
+            collected = _collect_claim_scores(claim, submitted[claim.cid], state.config)
+        except Exception as exc:
+            scored[claim.cid] = exc
+        else:
+            scored[claim.cid] = _finish_scores(state, claim.cid, collected, cached)
+    return scored
+
+
+def _escalate(state: GraphState, scored_by_claim, llm, scheduler) -> None:
+    """Re-score papers near the selection thresholds with the stage model."""
+    cache = _score_cache(state.config, llm)
+    submitted = []
+    for claim in state.claims:
+        scored = scored_by_claim.get(claim.cid)
+        if isinstance(scored, Exception):
+            continue
+        unsure = _ambiguous(scored, state.config)
+        with claim_scope(claim.cid):
+            record_cascade(len(scored), len(unsure))
+            cached, unsure = cache.split(claim.text, unsure)
+        _apply_escalated(*cached, state.config)
+        if unsure:
+            submitted.append((claim, _submit_claim_batches(scheduler, claim, unsure, llm, state.config)))
+    for claim, batches in submitted:
+        for batch, future in batches:
             try:
-                result = future.result()
-                selected[claim.cid] = result
+                _apply_escalated(batch, future.result(), state.config)
             except Exception as exc:
-                logger.error("[rank_filter] Error processing claim %s: %s", claim.cid, exc)
-                selected[claim.cid] = SelectedForClaim(
-                    cid=claim.cid, papers=[], status="NEED_MANUAL", notes=f"Error: {exc}"
-                )
-    
-    state.selected_by_claim = selected
+                logger.warning("[rank_filter] Escalated scoring failed for claim %s: %s", claim.cid, exc)
+
+
+async def _aescalate(state: GraphState, scored_by_claim, llm) -> None:
+    cache = _score_cache(state.config, llm)
+
+    async def _one(claim):
+        scored = scored_by_claim.get(claim.cid)
+        if isinstance(scored, Exception):
+            return
+        unsure = _ambiguous(scored, state.config)
+        with claim_scope(claim.cid):
+            record_cascade(len(scored), len(unsure))
+            cached, unsure = cache.split(claim.text, unsure)
+            _apply_escalated(*cached, state.config)
+            for batch in _batches(unsure, state.config):
+                try:
+                    _apply_escalated(batch, await _ascore_batch(llm, claim, batch, state.config), state.config)
+                except Exception as exc:
+                    logger.warning("[rank_filter] Escalated scoring failed for claim %s: %s", claim.cid, exc)
+
+    await asyncio.gather(*(_one(claim) for claim in state.claims))
+
+
+def _select_all(state: GraphState, scored_by_claim) -> Dict[str, SelectedForClaim]:
+    selected = {}
+    for claim in state.claims:
+        scored = scored_by_claim.get(claim.cid, [])
+        if isinstance(scored, Exception):
+            logger.error("[rank_filter] Error processing claim %s: %s", claim.cid, scored)
+            selected[claim.cid] = SelectedForClaim(
+                cid=claim.cid, papers=[], status="NEED_MANUAL", notes=f"Error: {scored}"
+            )
+        else:
+            selected[claim.cid] = _select(claim, scored, state.config)
+        emit_claim("rank_filter", claim.cid, status=selected[claim.cid].status, papers=len(selected[claim.cid].papers))
+    return selected
+
+
+def _pending(state: GraphState) -> GraphState:
+    """`state` without the claims reused from an incremental run, which are already selected."""
+    if not state.reused_sids:
+        return state
+    return state.model_copy(update={"claims": [c for c in state.claims if c.sid not in state.reused_sids]})
+
+
+def _with_reused(state: GraphState, selected: Dict[str, SelectedForClaim]) -> Dict[str, SelectedForClaim]:
+    merged = {**state.selected_by_claim, **selected}
+    return {claim.cid: merged[claim.cid] for claim in state.claims if claim.cid in merged}
+
+
+def _rank_claims(state: GraphState, llm, first_llm) -> Dict[str, SelectedForClaim]:
+    """Score and select the candidates of `state.claims`."""
+    scheduler = get_llm_scheduler()
+    todo, scored_by_claim = _checkpointed_scores(state)
+    cached, candidates_by_claim = _split_cached(todo, _prerank(todo), first_llm)
+    if state.config.enable_cross_claim_scoring:
+        scored = _score_cross_claim(todo, candidates_by_claim, first_llm, scheduler)
+        scored_by_claim.update({cid: _finish_scores(todo, cid, s, cached) for cid, s in scored.items()})
+    else:
+        scored_by_claim.update(_score_per_claim(todo, candidates_by_claim, cached, first_llm, scheduler))
+    if first_llm is not llm:
+        _escalate(state, scored_by_claim, llm, scheduler)
+    return _select_all(state, scored_by_claim)
+
+
+def rank_filter_node(state: GraphState) -> GraphState:
+    logger.info("[rank_filter] Scoring and filtering paper candidates")
+    llm = LlmClient.shared(state.config, "rank_filter")
+    # With a cascade, the cheap model scores everything and `llm` only re-scores
+    # papers near the thresholds.
+    first_llm = LlmClient.shared(state.config, model=state.config.cascade_model) if state.config.cascade_model else llm
+    state.selected_by_claim = _with_reused(state, _rank_claims(_pending(state), llm, first_llm))
+    return state
+
+
+def _async_clients(config) -> Tuple[AsyncLlmClient, AsyncLlmClient]:
+    """The stage model's client and the client for the first scoring pass (the cascade model, if set)."""
+    llm = AsyncLlmClient.shared(config, "rank_filter")
+    first_llm = AsyncLlmClient.shared(config, model=config.cascade_model) if config.cascade_model else llm
+    return llm, first_llm
+
+
+async def _arank_claims(state: GraphState, llm, first_llm) -> Dict[str, SelectedForClaim]:
+    """Score and select the candidates of `state.claims`."""
+    todo, scored_by_claim = _checkpointed_scores(state)
+    cached, candidates_by_claim = _split_cached(todo, _prerank(todo), first_llm)
+
+    async def _one(claim):
+        try:
+            with claim_scope(claim.cid):
+                scored = await _ascore_claim_candidates(claim, candidates_by_claim[claim.cid], first_llm, state.config)
+        except Exception as exc:
+            return claim.cid, exc
+        return claim.cid, _finish_scores(todo, claim.cid, scored, cached)
+
+    with llm_stage("rank_filter"):
+        if state.config.enable_cross_claim_scoring:
+            jobs = _cross_claim_jobs(todo, candidates_by_claim)
+            replies = await asyncio.gather(
+                *(_ascore_pair_batch(first_llm, group, batch, state.config) for group, batch in jobs),
+                return_exceptions=True,
+            )
+            scored = _cross_claim_scored(todo, jobs, replies, first_llm)
+            scored_by_claim.update({cid: _finish_scores(todo, cid, s, cached) for cid, s in scored.items()})
+        else:
+            scored_by_claim.update(await asyncio.gather(*(_one(c) for c in todo.claims)))
+        if first_llm is not llm:
+            await _aescalate(state, scored_by_claim, llm)
+    return _select_all(state, scored_by_claim)
+
+
+async def arank_filter_node(state: GraphState) -> GraphState:
+    logger.info("[rank_filter] Scoring and filtering paper candidates")
+    selected = await _arank_claims(_pending(state), *_async_clients(state.config))
+    state.selected_by_claim = _with_reused(state, selected)
     return state
@@ -4,7 +4,12 @@ import json
 import os
 
 from ..state import GraphState
+from ...tools.caching import cache_stats
+from ...tools.http_pool import http_stats
+from ...tools.llm_scheduler import get_llm_scheduler
 from ...tools.logger import get_logger
+from ...tools.manifest import write_manifest
+from ...tools.metrics import in_run_scope, metrics_summary
 
 logger = get_logger(__name__)
 
@@ -39,23 +44,58 @@ def report_node(state: GraphState) -> GraphState:
             }
         )
 
+    prefiltered = {"rule": 0, "model": 0}
+    for need in state.citation_needs:
+        if need.source in prefiltered and need.sid not in state.reused_sids:
+            prefiltered[need.source] += 1
+    sentence_text = {s.sid: s.text for s in state.sentences}
+    # Per-sentence decisions double as training data for the pre-filter model.
+    decisions = [
+        {
+            "sid": n.sid,
+            "text": sentence_text.get(n.sid, ""),
+            "needs": n.needs,
+            "claim_type": n.claim_type,
+            "source": n.source,
+        }
+        for n in state.citation_needs
+    ]
+
     state.report = {
         "anchor_summary": state.anchor_summary,
         "existing_citations_count": len(state.existing_cites),
         "seed_expansion_used": bool(state.seed_papers),
+        "seed_pool_size": len(state.seed_pool),
         "bib_path": state.bib_path,
         "existing_entries_count": existing_bib_count,
         "new_entries_added_count": len(state.new_bib_entries),
         "new_bibkeys_added": new_bib_keys,
         "warnings": warnings,
+        "metrics": metrics_summary(),
+        "needs_citation": {
+            "sentences": len(state.citation_needs),
+            "prefiltered_by_rule": prefiltered["rule"],
+            "prefiltered_by_model": prefiltered["model"],
+            "reused_from_manifest": len(state.reused_sids),
+        },
         "claims": items,
+        "sentence_decisions": decisions,
     }
+    # Cache, backend and scheduler counters are process-wide. In batch and
+    # server mode other documents share them, so they go in the batch summary
+    # instead; the per-run metrics above still count this document's share.
+    if not in_run_scope():
+        state.report.update(cache=cache_stats(), http=http_stats(), llm=get_llm_scheduler().stats())
 
     json_path = os.path.join(state.config.output_dir, "report.json")
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(state.report, f, ensure_ascii=True, indent=2)
     logger.info("[report] Wrote JSON report to %s", json_path)
 
+    metrics_path = os.path.join(state.config.output_dir, "metrics.json")
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump(state.report["metrics"], f, ensure_ascii=True, indent=2)
+
     md_path = os.path.join(state.config.output_dir, "report.md")
     with open(md_path, "w", encoding="utf-8") as f:
         f.write("# Citation Report\n\n")
@@ -69,6 +109,51 @@ def report_node(state: GraphState) -> GraphState:
         f.write(f"- new_bibkeys_added: {', '.join(new_bib_keys) if new_bib_keys else 'none'}\n")
         if warnings:
             f.write(f"- warnings: {', '.join(warnings)}\n")
+        f.write("\n## Citation-need classification\n\n")
+        f.write(
+            f"- sentences: {len(state.citation_needs)}, pre-filtered: "
+            f"{prefiltered['rule']} by rule, {prefiltered['model']} by model\n"
+        )
+        if state.reused_sids:
+            f.write(f"- unchanged since the last run (decisions reused): {len(state.reused_sids)}\n")
+        totals = state.report["metrics"]["totals"]
+        f.write("\n## Cache\n\n")
+        f.write(
+            f"- hits: {totals['cache_hits']}, misses: {totals['cache_misses']}, "
+            f"coalesced: {totals['cache_coalesced']}\n"
+        )
+        cache = state.report.get("cache")
+        if cache:
+            f.write(f"- memory_hits: {cache['memory_hits']}, disk_hits: {cache['disk_hits']}\n")
+        http = state.report.get("http")
+        if http:
+            f.write("\n## Backend requests\n\n")
+            for backend, stats in sorted(http.items()):
+                f.write(
+                    f"- {backend}: requests={stats['requests']}, retries={stats['retries']}, "
+                    f"retry_wait={stats['retry_wait_seconds']}s, "
+                    f"rate_limit_wait={stats['rate_limit_wait_seconds']}s\n"
+                )
+        metrics = state.report["metrics"]
+        f.write("\n## Run metrics\n\n")
+        for name, stats in list(metrics["nodes"].items()) + [("total", metrics["totals"])]:
+            f.write(
+                f"- {name}: wall={stats['wall_seconds']}s, llm_calls={stats['llm_calls']}, "
+                f"tokens={stats['prompt_tokens']}+{stats['completion_tokens']}, "
+                f"json_reasked={stats['json_reasked']}, json_failed={stats['json_failed']}, "
+                f"http_requests={stats['http_requests']}, http_retries={stats['http_retries']}, "
+                f"cost=${stats['cost_usd']}\n"
+            )
+        for name, stats in metrics["nodes"].items():
+            if stats["cascade_checked"]:
+                rate = stats["cascade_escalated"] / stats["cascade_checked"]
+                f.write(
+                    f"- {name} cascade: escalated {stats['cascade_escalated']} of "
+                    f"{stats['cascade_checked']} ({rate:.0%})\n"
+                )
+            if stats["score_cache_hits"]:
+                looked_up = stats["score_cache_hits"] + stats["score_cache_misses"]
+                f.write(f"- {name} score cache: reused {stats['score_cache_hits']} of {looked_up} claim-paper scores\n")
         f.write("\n## Claims\n\n")
         for item in items:
             f.write(f"### {item['sid']}\n\n")
@@ -85,5 +170,6 @@ def report_node(state: GraphState) -> GraphState:
                 )
             f.write("\n")
     logger.info("[report] Wrote Markdown report to %s", md_path)
+    logger.info("[report] Wrote sentence manifest to %s", write_manifest(state))
 
     return state
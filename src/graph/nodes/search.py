@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from tqdm import tqdm
 
-from ..state import GraphState
+from ..state import GraphState, PaperCandidate
+from ...tools.checkpoint import claim_checkpoint, record_claim
 from ...tools.dedupe import dedupe_candidates
 from ...tools.logger import get_logger
-from ...tools.perplexity import PerplexityClient
-from ...tools.semantic_scholar import SemanticScholarClient
+from ...tools.metrics import claim_scope, in_current_context
+from ...tools.perplexity import AsyncPerplexityClient, PerplexityClient
+from ...tools.progress import emit_claim
+from ...tools.semantic_scholar import AsyncSemanticScholarClient, SemanticScholarClient
 
 logger = get_logger(__name__)
 
@@ -31,7 +35,7 @@ def _search_single_query(query_item, perplexity, s2_client, top_k, use_perplexit
         with ThreadPoolExecutor(max_workers=2) as executor:
             future_to_name = {}
             for name, (func, *args) in futures.items():
-                future = executor.submit(func, *args)
+                future = executor.submit(in_current_context(func), *args)
                 future_to_name[future] = name
             
             for future in as_completed(future_to_name):
@@ -55,8 +59,17 @@ def _search_single_query(query_item, perplexity, s2_client, top_k, use_perplexit
     return items
 
 
-def _search_claim_queries(claim, queries, perplexity, s2_client, config, seed_papers):
+def _search_claim_queries(claim, queries, perplexity, s2_client, config, seed_pool):
     """Search all queries for a single claim in parallel."""
+    done = _checkpointed_candidates(claim, config)
+    if done is not None:
+        return done
+    with claim_scope(claim.cid):
+        candidates = _search_claim_queries_scoped(claim, queries, perplexity, s2_client, config, seed_pool)
+    return _record_candidates(claim, candidates, config)
+
+
+def _search_claim_queries_scoped(claim, queries, perplexity, s2_client, config, seed_pool):
     items = []
     use_perplexity = bool(perplexity)
     use_s2 = bool(config.semantic_scholar_api_key)
@@ -65,7 +78,10 @@ def _search_claim_queries(claim, queries, perplexity, s2_client, config, seed_pa
     max_workers = min(10, len(queries))
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_query = {
-            executor.submit(_search_single_query, q, perplexity, s2_client, config.top_k_per_query, use_perplexity, use_s2): q
+            executor.submit(
+                in_current_context(_search_single_query),
+                q, perplexity, s2_client, config.top_k_per_query, use_perplexity, use_s2,
+            ): q
             for q in queries
         }
         
@@ -77,17 +93,35 @@ def _search_claim_queries(claim, queries, perplexity, s2_client, config, seed_pa
             except Exception as exc:
                 logger.warning("[search] Error searching query '%s': %s", query_item.query, exc)
     
-    # Seed expansion (sequential for now, as it's already fast)
-    if config.enable_seed_expansion and seed_papers:
-        logger.debug("[search] Expanding search using seed papers for claim %s", claim.cid)
-        for seed in seed_papers[:3]:
-            try:
-                related = s2_client.related_from_seed(seed.resolved_doi, seed.resolved_title, limit=8)
-                items.extend(related)
-                logger.debug("[search] Seed expansion for %s returned %d papers", seed.bibkey, len(related))
-            except Exception as exc:
-                logger.warning("[search] Seed expansion failed for %s: %s", seed.bibkey, exc)
-    
+    items.extend(_seed_candidates(claim, seed_pool))
+    return _finalize_candidates(items, config)
+
+
+def _seed_candidates(claim, seed_pool):
+    """Per-claim copies of the shared seed pool (later stages score candidates in place)."""
+    if not seed_pool:
+        return []
+    logger.debug("[search] Adding %d seed-neighbourhood papers to claim %s", len(seed_pool), claim.cid)
+    return [paper.model_copy() for paper in seed_pool]
+
+
+def _checkpointed_candidates(claim, config):
+    done = claim_checkpoint(config, "search", claim.cid)
+    return None if done is None else [PaperCandidate.model_validate(p) for p in done]
+
+
+def _record_candidates(claim, candidates, config):
+    record_claim(config, "search", claim.cid, [p.model_dump() for p in candidates])
+    emit_claim("search", claim.cid, candidates=len(candidates))
+    return candidates
+
+
+def _pending_claims(state: GraphState):
+    """Claims to search for; those reused from an incremental run already have their papers."""
+    return [c for c in state.claims if c.sid not in state.reused_sids]
+
+
+def _finalize_candidates(items, config):
     deduped = dedupe_candidates(items)
     final_count = min(len(deduped), config.max_papers_per_claim)
     return deduped[:final_count]
@@ -112,22 +146,23 @@ def search_node(state: GraphState) -> GraphState:
     )
     
     candidates_by_claim = {}
+    claims = _pending_claims(state)
     
     # Process claims in parallel
-    max_workers = min(5, len(state.claims))  # Limit concurrent claims to avoid overwhelming APIs
+    max_workers = max(1, min(5, len(claims)))  # Limit concurrent claims to avoid overwhelming APIs
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit all claim searches
         future_to_claim = {
             executor.submit(
-                _search_claim_queries,
+                in_current_context(_search_claim_queries),
                 claim,
                 state.queries_by_claim.get(claim.cid, []),
                 perplexity,
                 s2_client,
                 state.config,
-                state.seed_papers,
+                state.seed_pool,
             ): claim
-            for claim in state.claims
+            for claim in claims
         }
         
         # Collect results
@@ -143,3 +178,74 @@ def search_node(state: GraphState) -> GraphState:
     
     state.candidates_by_claim = candidates_by_claim
     return state
+
+
+async def _asearch_backend(name, func, query, top_k):
+    try:
+        results = await func(query, top_k)
+        logger.debug("[search] %s query '%s' returned %d results", name, query, len(results))
+        return results
+    except Exception as exc:
+        logger.warning("[search] %s search failed for query '%s': %s", name, query, exc)
+        return []
+
+
+async def _asearch_claim_queries(claim, queries, perplexity, s2_client, config, seed_pool):
+    done = _checkpointed_candidates(claim, config)
+    if done is not None:
+        return done
+    use_s2 = bool(config.semantic_scholar_api_key)
+    calls = []
+    for q in queries:
+        if perplexity:
+            calls.append(_asearch_backend("perplexity", perplexity.search_papers, q.query, config.top_k_per_query))
+        if use_s2:
+            calls.append(_asearch_backend("s2", s2_client.search_papers, q.query, config.top_k_per_query))
+    items = []
+    for results in await asyncio.gather(*calls):
+        items.extend(results)
+    items.extend(_seed_candidates(claim, seed_pool))
+    return _record_candidates(claim, _finalize_candidates(items, config), config)
+
+
+def _async_clients(config):
+    perplexity = None
+    if config.perplexity_api_key:
+        logger.info("[search] Using Perplexity as primary search backend")
+        perplexity = AsyncPerplexityClient(
+            api_key=config.perplexity_api_key,
+            base_url=config.perplexity_base_url,
+            model=config.perplexity_model,
+            cache_dir=config.cache_dir,
+        )
+    s2_client = AsyncSemanticScholarClient(
+        base_url=config.s2_base_url,
+        api_key=config.semantic_scholar_api_key,
+        cache_dir=config.cache_dir,
+    )
+    return perplexity, s2_client
+
+
+async def asearch_node(state: GraphState) -> GraphState:
+    logger.info("[search] Querying search backends for paper candidates")
+    perplexity, s2_client = _async_clients(state.config)
+
+    async def _one(claim):
+        try:
+            with claim_scope(claim.cid):
+                candidates = await _asearch_claim_queries(
+                    claim,
+                    state.queries_by_claim.get(claim.cid, []),
+                    perplexity,
+                    s2_client,
+                    state.config,
+                    state.seed_pool,
+                )
+            logger.info("[search] Claim %s: collected %d unique candidates (after deduplication)", claim.cid, len(candidates))
+            return claim.cid, candidates
+        except Exception as exc:
+            logger.error("[search] Error processing claim %s: %s", claim.cid, exc)
+            return claim.cid, []
+
+    state.candidates_by_claim = dict(await asyncio.gather(*(_one(c) for c in _pending_claims(state))))
+    return state
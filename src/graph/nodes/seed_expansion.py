@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from ..state import GraphState, PaperCandidate
+from ...tools.dedupe import dedupe_candidates
+from ...tools.logger import get_logger
+from ...tools.metrics import in_current_context
+from ...tools.semantic_scholar import AsyncSemanticScholarClient, SemanticScholarClient
+
+logger = get_logger(__name__)
+
+
+def _seeds_to_expand(state: GraphState):
+    if not state.config.enable_seed_expansion:
+        return []
+    return state.seed_papers[: max(0, state.config.seed_expansion_count)]
+
+
+def _expand_seed(s2_client, seed, config) -> List[PaperCandidate]:
+    try:
+        related = s2_client.related_from_seed(
+            seed.resolved_doi,
+            seed.resolved_title,
+            limit=config.seed_references_limit,
+            paper_id=seed.paper_id,
+            citations_limit=config.seed_citations_limit,
+        )
+        logger.debug("[seed_expansion] Seed %s returned %d papers", seed.bibkey, len(related))
+        return related
+    except Exception as exc:
+        logger.warning("[seed_expansion] Seed expansion failed for %s: %s", seed.bibkey, exc)
+        return []
+
+
+async def _aexpand_seed(s2_client, seed, config) -> List[PaperCandidate]:
+    try:
+        related = await s2_client.related_from_seed(
+            seed.resolved_doi,
+            seed.resolved_title,
+            limit=config.seed_references_limit,
+            paper_id=seed.paper_id,
+            citations_limit=config.seed_citations_limit,
+        )
+        logger.debug("[seed_expansion] Seed %s returned %d papers", seed.bibkey, len(related))
+        return related
+    except Exception as exc:
+        logger.warning("[seed_expansion] Seed expansion failed for %s: %s", seed.bibkey, exc)
+        return []
+
+
+def _store_pool(state: GraphState, results: List[List[PaperCandidate]]) -> GraphState:
+    pool: List[PaperCandidate] = []
+    for related in results:
+        pool.extend(related)
+    state.seed_pool = dedupe_candidates(pool)
+    logger.info("[seed_expansion] Built a shared pool of %d papers from %d seeds", len(state.seed_pool), len(results))
+    return state
+
+
+def seed_expansion_node(state: GraphState) -> GraphState:
+    """Fetch the seed papers' neighbourhood once; `search` hands it to every claim."""
+    seeds = _seeds_to_expand(state)
+    if not seeds:
+        state.seed_pool = []
+        return state
+    s2_client = SemanticScholarClient(
+        base_url=state.config.s2_base_url,
+        api_key=state.config.semantic_scholar_api_key,
+        cache_dir=state.config.cache_dir,
+    )
+    with ThreadPoolExecutor(max_workers=min(4, len(seeds))) as executor:
+        expand = in_current_context(lambda seed: _expand_seed(s2_client, seed, state.config))
+        results = list(executor.map(expand, seeds))
+    return _store_pool(state, results)
+
+
+async def aseed_expansion_node(state: GraphState) -> GraphState:
+    seeds = _seeds_to_expand(state)
+    if not seeds:
+        state.seed_pool = []
+        return state
+    s2_client = AsyncSemanticScholarClient(
+        base_url=state.config.s2_base_url,
+        api_key=state.config.semantic_scholar_api_key,
+        cache_dir=state.config.cache_dir,
+    )
+    results = await asyncio.gather(*(_aexpand_seed(s2_client, seed, state.config) for seed in seeds))
+    return _store_pool(state, list(results))
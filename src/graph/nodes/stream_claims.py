@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..state import ClaimItem, GraphState, SelectedForClaim
+from ...tools.crossref import AsyncCrossrefClient
+from ...tools.llm import AsyncLlmClient
+from ...tools.llm_scheduler import llm_stage
+from ...tools.logger import get_logger
+from ...tools.metrics import claim_scope, node_scope
+from . import gen_queries, rank_filter, search, synthesize
+
+logger = get_logger(__name__)
+
+# Streaming mode runs gen_queries -> search -> rank_filter -> synthesize per
+# claim instead of stage by stage: a claim moves on as soon as the previous
+# stage is done with it, so one slow LLM call or search only holds up its own
+# claim. Stages are joined by bounded queues and each has a fixed number of
+# workers; LLM and HTTP concurrency stay capped by the shared scheduler and
+# backend limits.
+
+_DONE = object()
+
+
+async def _run_stage(
+    name: str,
+    inbox: asyncio.Queue,
+    outbox: Optional[asyncio.Queue],
+    workers: int,
+    handle: Callable[[Any], Awaitable[Any]],
+    on_error: Optional[Callable[[Any, Exception], None]] = None,
+) -> None:
+    """Feed items from `inbox` through `handle` into `outbox` until the end marker.
+
+    An item whose `handle` raises goes to `on_error` and not downstream.
+    """
+
+    async def work() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Put the marker back for the other workers of this stage.
+                await inbox.put(_DONE)
+                return
+            # Each stage's calls are attributed to its node in the run metrics
+            # (wall time goes to `stream_claims`) and queued at the stage's
+            # priority by the LLM scheduler.
+            with node_scope(name, timed=False), llm_stage(name):
+                try:
+                    result = await handle(item)
+                except Exception as exc:
+                    logger.error("[stream] %s failed for %s: %s", name, getattr(item, "cid", item), exc)
+                    if on_error is not None:
+                        on_error(item, exc)
+                    continue
+            if outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(work() for _ in range(max(1, workers))))
+    if outbox is not None:
+        await outbox.put(_DONE)
+
+
+async def astream_claims_node(state: GraphState) -> GraphState:
+    """Find, rank and resolve citations for every claim, streaming claims through the stages.
+
+    Fills the same state fields as the gen_queries, search, rank_filter and
+    synthesize nodes. Two things differ from the staged graph: BM25
+    pre-ranking only sees the claim's own candidates, and cross-claim scoring
+    is not available because claims are ranked on their own.
+    """
+    config = state.config
+    sentences = gen_queries._sentences_needing_cites(state)
+    logger.info("[stream] Streaming %d claims through the per-claim stages", len(sentences))
+    if config.enable_cross_claim_scoring:
+        logger.info("[stream] Cross-claim scoring needs every claim at once; scoring claims one by one")
+        config = config.model_copy(update={"enable_cross_claim_scoring": False})
+
+    anchor_terms = state.anchor_summary.get("key_terms", []) if state.anchor_summary else []
+    query_llm = AsyncLlmClient.shared(config, "gen_queries")
+    rank_llm, first_llm = rank_filter._async_clients(config)
+    perplexity, s2_client = search._async_clients(config)
+    crossref = AsyncCrossrefClient(config.crossref_base_url, config.cache_dir, mailto=config.crossref_mailto)
+    existing_urls = synthesize._known_urls(state)
+
+    # Claims reused from an incremental run are already in the state and are
+    # not streamed.
+    claims: Dict[str, ClaimItem] = {}
+    state.candidates_by_claim = {}
+
+    async def generate(sentence) -> ClaimItem:
+        claim, query_items = await gen_queries._agenerate_queries_for_sentence(
+            sentence, state.anchor_summary, anchor_terms, state.seed_papers, query_llm, config
+        )
+        claims[sentence.sid] = claim
+        state.queries_by_claim[claim.cid] = query_items
+        return claim
+
+    async def find(claim: ClaimItem) -> ClaimItem:
+        with claim_scope(claim.cid):
+            candidates = await search._asearch_claim_queries(
+                claim, state.queries_by_claim[claim.cid], perplexity, s2_client, config, state.seed_pool
+            )
+        logger.info("[search] Claim %s: collected %d unique candidates", claim.cid, len(candidates))
+        state.candidates_by_claim[claim.cid] = candidates
+        return claim
+
+    async def rank(claim: ClaimItem) -> ClaimItem:
+        candidates = {claim.cid: state.candidates_by_claim[claim.cid]}
+        single = GraphState(config=config, claims=[claim], candidates_by_claim=candidates)
+        state.selected_by_claim.update(await rank_filter._arank_claims(single, rank_llm, first_llm))
+        return claim
+
+    async def resolve(claim: ClaimItem) -> None:
+        selected = state.selected_by_claim[claim.cid]
+        await synthesize._aresolve_claim(state, crossref, existing_urls, claim.cid, selected)
+
+    def failed(stage: str) -> Callable[[Any, Exception], None]:
+        """Keep a claim whose stage failed in the results as NEED_MANUAL, with the error."""
+
+        def record(item: Any, exc: Exception) -> None:
+            if isinstance(item, ClaimItem):
+                claim = item
+            else:
+                claim = claims[item.sid] = gen_queries._claim_for(item, anchor_terms)
+                state.queries_by_claim[claim.cid] = []
+            notes = f"Error in {stage}: {exc}"
+            selected = state.selected_by_claim.get(claim.cid)
+            if selected is None:
+                state.selected_by_claim[claim.cid] = SelectedForClaim(cid=claim.cid, status="NEED_MANUAL", notes=notes)
+            else:
+                selected.status, selected.notes = "NEED_MANUAL", notes
+
+        return record
+
+    size = max(1, config.stream_queue_size)
+    queues = [asyncio.Queue(maxsize=size) for _ in range(4)]
+
+    async def feed() -> None:
+        for sentence in sentences:
+            await queues[0].put(sentence)
+        await queues[0].put(_DONE)
+
+    workers = config.stream_stage_workers
+    await asyncio.gather(
+        feed(),
+        _run_stage("gen_queries", queues[0], queues[1], workers, generate, failed("gen_queries")),
+        _run_stage("search", queues[1], queues[2], workers, find, failed("search")),
+        _run_stage("rank_filter", queues[2], queues[3], workers, rank, failed("rank_filter")),
+        # Claims are resolved one at a time so bibkey de-duplication sees
+        # every earlier entry, as in `asynthesize_node`.
+        _run_stage("synthesize", queues[3], None, 1, resolve, failed("synthesize")),
+    )
+
+    # Restore document order; claims finish in whatever order their stages did.
+    streamed = [claims[sentence.sid] for sentence in sentences if sentence.sid in claims]
+    gen_queries._merge_claims(state, streamed, state.queries_by_claim)
+    selected = state.selected_by_claim
+    state.selected_by_claim = {claim.cid: selected[claim.cid] for claim in state.claims if claim.cid in selected}
+    logger.info(
+        "[stream] Finished %d claims; created %d new BibTeX entries", len(streamed), len(state.new_bib_entries)
+    )
+    return state
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
@@ -9,8 +10,11 @@ from tqdm import tqdm
 
 from ..state import BibliographyEntry, GraphState, PaperCandidate, SelectedForClaim
 from ...tools.bibtex_io import create_misc_bibtex, dedupe_bibkey, make_bibkey
-from ...tools.crossref import CrossrefClient
+from ...tools.checkpoint import claim_checkpoint, record_claim
+from ...tools.crossref import AsyncCrossrefClient, CrossrefClient
 from ...tools.logger import get_logger
+from ...tools.metrics import claim_scope, in_current_context
+from ...tools.progress import emit_claim
 from ...tools.text_utils import normalize_title, parse_bibtex_entries
 
 logger = get_logger(__name__)
@@ -32,7 +36,16 @@ def _title_word(title: str) -> str:
 def _resolve_doi_by_title(
     client: CrossrefClient, title: str, year: Optional[int]
 ) -> Optional[str]:
-    data = client.search_title(title, rows=3)
+    return _pick_doi(client.search_title(title, rows=3), title, year)
+
+
+async def _aresolve_doi_by_title(
+    client: AsyncCrossrefClient, title: str, year: Optional[int]
+) -> Optional[str]:
+    return _pick_doi(await client.search_title(title, rows=3), title, year)
+
+
+def _pick_doi(data: dict, title: str, year: Optional[int]) -> Optional[str]:
     items = data.get("message", {}).get("items", [])
     if not items:
         return None
@@ -48,64 +61,53 @@ def _resolve_doi_by_title(
     return best.get("DOI")
 
 
-def _process_paper(paper, client, existing_doi_index, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls):
-    """Process a single paper to resolve DOI and create BibTeX entry."""
-    doi = paper.doi
-    if not doi and paper.title:
-        doi = _resolve_doi_by_title(client, paper.title, paper.year)
-        paper.doi = doi
+def _doi_entry(paper, doi, bibtex, existing_bib_entries, new_bib_entries):
+    """Build a BibTeX entry from Crossref BibTeX for a paper with a DOI."""
+    # Extract bibkey from BibTeX (preferred method)
+    parsed = parse_bibtex_entries(bibtex)
+    bibkey = None
+    if parsed:
+        # Use the first (and usually only) key from the BibTeX
+        bibkey = list(parsed.keys())[0]
+        # Also update paper metadata from BibTeX if missing
+        fields = list(parsed.values())[0]
+        if not paper.authors and fields.get("author"):
+            # Parse authors from BibTeX format (e.g., "Last, First and Last2, First2")
+            authors_str = fields.get("author", "")
+            paper.authors = [a.strip() for a in authors_str.split(" and ")]
+        if not paper.year and fields.get("year"):
+            try:
+                paper.year = int(fields.get("year"))
+            except (ValueError, TypeError):
+                pass
     
-    # Case 1: Has DOI - try to get BibTeX from Crossref
-    if doi:
-        if doi.lower() in existing_doi_index:
-            return paper, None  # Already exists, no new entry needed
-        
-        try:
-            bibtex = client.bibtex_from_doi(doi)
-        except Exception as exc:
-            logger.warning("[synthesize] Failed to fetch BibTeX for DOI %s: %s", doi, exc)
-            bibtex = None
-        
-        if bibtex:
-            # Extract bibkey from BibTeX (preferred method)
-            parsed = parse_bibtex_entries(bibtex)
-            bibkey = None
-            if parsed:
-                # Use the first (and usually only) key from the BibTeX
-                bibkey = list(parsed.keys())[0]
-                # Also update paper metadata from BibTeX if missing
-                fields = list(parsed.values())[0]
-                if not paper.authors and fields.get("author"):
-                    # Parse authors from BibTeX format (e.g., "Last, First and Last2, First2")
-                    authors_str = fields.get("author", "")
-                    paper.authors = [a.strip() for a in authors_str.split(" and ")]
-                if not paper.year and fields.get("year"):
-                    try:
-                        paper.year = int(fields.get("year"))
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Fallback: generate bibkey if not found in BibTeX
-            if not bibkey:
-                author_last = _first_author_last(paper.authors)
-                year = str(paper.year or "")
-                title_word = _title_word(paper.title or "")
-                bibkey = make_bibkey(author_last, year, title_word)
-            
-            all_bibkeys = list(existing_bib_entries.keys()) + list(new_bib_entries.keys())
-            bibkey = dedupe_bibkey(bibkey, all_bibkeys)
-            entry = BibliographyEntry(
-                bibkey=bibkey,
-                doi=doi,
-                bibtex=bibtex,
-                title=paper.title,
-                year=str(paper.year or ""),
-                authors="; ".join(paper.authors) if paper.authors else None,
-                url=paper.url,
-            )
-            logger.debug("[synthesize] Created BibTeX entry from DOI: %s", bibkey)
-            return paper, entry
+    # Fallback: generate bibkey if not found in BibTeX
+    if not bibkey:
+        author_last = _first_author_last(paper.authors)
+        year = str(paper.year or "")
+        title_word = _title_word(paper.title or "")
+        bibkey = make_bibkey(author_last, year, title_word)
     
+    all_bibkeys = list(existing_bib_entries.keys()) + list(new_bib_entries.keys())
+    bibkey = dedupe_bibkey(bibkey, all_bibkeys)
+    entry = BibliographyEntry(
+        bibkey=bibkey,
+        doi=doi,
+        bibtex=bibtex,
+        title=paper.title,
+        year=str(paper.year or ""),
+        authors="; ".join(paper.authors) if paper.authors else None,
+        url=paper.url,
+    )
+    logger.debug("[synthesize] Created BibTeX entry from DOI: %s", bibkey)
+    return entry
+
+
+def _url_entry(paper, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls):
+    """Handle a paper without usable DOI BibTeX: create an @misc entry from its URL.
+
+    Returns the same (paper, entry) pair as `_process_paper`.
+    """
     # Case 2: No DOI but has URL - create @misc entry
     if paper.url and paper.title:
         url_lower = paper.url.lower()
@@ -171,24 +173,126 @@ def _process_paper(paper, client, existing_doi_index, existing_url_index, existi
     return None, None
 
 
+def _process_paper(paper, client, existing_doi_index, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls):
+    """Process a single paper to resolve DOI and create BibTeX entry."""
+    doi = paper.doi
+    if not doi and paper.title:
+        doi = _resolve_doi_by_title(client, paper.title, paper.year)
+        paper.doi = doi
+    
+    # Case 1: Has DOI - try to get BibTeX from Crossref
+    if doi:
+        if doi.lower() in existing_doi_index:
+            return paper, None  # Already exists, no new entry needed
+        
+        try:
+            bibtex = client.bibtex_from_doi(doi)
+        except Exception as exc:
+            logger.warning("[synthesize] Failed to fetch BibTeX for DOI %s: %s", doi, exc)
+            bibtex = None
+        
+        if bibtex:
+            return paper, _doi_entry(paper, doi, bibtex, existing_bib_entries, new_bib_entries)
+    
+    return _url_entry(paper, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls)
+
+
+async def _aprocess_paper(paper, client, existing_doi_index, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls):
+    doi = paper.doi
+    if not doi and paper.title:
+        doi = await _aresolve_doi_by_title(client, paper.title, paper.year)
+        paper.doi = doi
+    if doi:
+        if doi.lower() in existing_doi_index:
+            return paper, None
+        try:
+            bibtex = await client.bibtex_from_doi(doi)
+        except Exception as exc:
+            logger.warning("[synthesize] Failed to fetch BibTeX for DOI %s: %s", doi, exc)
+            bibtex = None
+        if bibtex:
+            return paper, _doi_entry(paper, doi, bibtex, existing_bib_entries, new_bib_entries)
+    return _url_entry(paper, existing_url_index, existing_bib_entries, new_bib_entries, existing_urls)
+
+
+def _known_urls(state: GraphState) -> set:
+    """Lowercased URLs of existing and already created entries."""
+    urls = set(state.existing_url_index.keys())
+    urls.update({entry.url.lower() for entry in state.new_bib_entries.values() if entry.url})
+    return urls
+
+
+def _record_entry(state: GraphState, entry: BibliographyEntry, existing_urls: set) -> None:
+    state.new_bib_entries[entry.bibkey] = entry
+    if entry.doi:
+        state.bib_entries_by_doi[entry.doi.lower()] = entry
+    if entry.url:
+        state.bib_entries_by_url[entry.url.lower()] = entry
+        existing_urls.add(entry.url.lower())
+
+
+def _finish_claim(state: GraphState, claim_id: str, selected: SelectedForClaim, valid_papers: list) -> None:
+    if not valid_papers:
+        logger.warning("[synthesize] Claim %s: No valid BibTeX entries (all papers missing DOI and URL)", claim_id)
+        selected.status = "NEED_MANUAL"
+        selected.notes = "No reliable BibTeX (missing DOI and URL)."
+    else:
+        logger.info("[synthesize] Claim %s: Resolved %d/%d papers with BibTeX", 
+                  claim_id, len(valid_papers), len(selected.papers))
+    selected.papers = valid_papers
+    state.selected_by_claim[claim_id] = selected
+    emit_claim("synthesize", claim_id, status=selected.status, papers=len(valid_papers))
+
+
+def _restore_claim(state: GraphState, claim_id: str, existing_urls: set) -> bool:
+    """Reapply a claim resolved earlier in this run (when resuming); returns whether there was one."""
+    done = claim_checkpoint(state.config, "synthesize", claim_id)
+    if done is None:
+        return False
+    for entry in done["entries"]:
+        _record_entry(state, BibliographyEntry.model_validate(entry), existing_urls)
+    state.selected_by_claim[claim_id] = SelectedForClaim.model_validate(done["selected"])
+    return True
+
+
+def _pending_selections(state: GraphState) -> list:
+    """(claim id, selection) pairs to resolve; those reused from an incremental run are already resolved."""
+    reused = {c.cid for c in state.claims if c.sid in state.reused_sids}
+    return [(cid, selected) for cid, selected in state.selected_by_claim.items() if cid not in reused]
+
+
+def _checkpoint_claim(state: GraphState, claim_id: str, entries: list) -> None:
+    payload = {
+        "selected": state.selected_by_claim[claim_id].model_dump(),
+        "entries": [entry.model_dump() for entry in entries],
+    }
+    record_claim(state.config, "synthesize", claim_id, payload)
+
+
 def synthesize_node(state: GraphState) -> GraphState:
     logger.info("[synthesize] Resolving DOIs and creating BibTeX entries")
-    client = CrossrefClient(state.config.crossref_base_url, state.config.cache_dir)
+    client = CrossrefClient(
+        state.config.crossref_base_url,
+        state.config.cache_dir,
+        mailto=state.config.crossref_mailto,
+    )
     
     # Track URLs to avoid duplicates (from existing and new entries)
-    existing_urls = set(state.existing_url_index.keys())
-    existing_urls.update({entry.url.lower() for entry in state.new_bib_entries.values() if entry.url})
+    existing_urls = _known_urls(state)
     
-    for claim_id, selected in tqdm(state.selected_by_claim.items(), desc="[synthesize] Resolving DOIs", unit="claim"):
+    for claim_id, selected in tqdm(_pending_selections(state), desc="[synthesize] Resolving DOIs", unit="claim"):
+        if _restore_claim(state, claim_id, existing_urls):
+            continue
         logger.debug("[synthesize] Processing %d papers for claim %s", len(selected.papers), claim_id)
         valid_papers = []
+        entries = []
         
         # Process papers in parallel
-        max_workers = min(10, len(selected.papers))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        max_workers = max(1, min(10, len(selected.papers)))
+        with claim_scope(claim_id), ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_paper = {
                 executor.submit(
-                    _process_paper,
+                    in_current_context(_process_paper),
                     paper,
                     client,
                     state.existing_doi_index,
@@ -208,23 +312,67 @@ def synthesize_node(state: GraphState) -> GraphState:
                         valid_papers.append(processed_paper)
                     if entry:
                         # Thread-safe: update state dictionaries
-                        state.new_bib_entries[entry.bibkey] = entry
-                        if entry.doi:
-                            state.bib_entries_by_doi[entry.doi.lower()] = entry
-                        if entry.url:
-                            state.bib_entries_by_url[entry.url.lower()] = entry
-                            existing_urls.add(entry.url.lower())
+                        _record_entry(state, entry, existing_urls)
+                        entries.append(entry)
                 except Exception as exc:
                     logger.warning("[synthesize] Error processing paper %s: %s", paper.title, exc)
         
-        if not valid_papers:
-            logger.warning("[synthesize] Claim %s: No valid BibTeX entries (all papers missing DOI and URL)", claim_id)
-            selected.status = "NEED_MANUAL"
-            selected.notes = "No reliable BibTeX (missing DOI and URL)."
-        else:
-            logger.info("[synthesize] Claim %s: Resolved %d/%d papers with BibTeX", 
-                      claim_id, len(valid_papers), len(selected.papers))
-        selected.papers = valid_papers
-        state.selected_by_claim[claim_id] = selected
+        _finish_claim(state, claim_id, selected, valid_papers)
+        _checkpoint_claim(state, claim_id, entries)
+    logger.info("[synthesize] Created %d new BibTeX entries", len(state.new_bib_entries))
+    return state
+
+
+async def _aresolve_claim(
+    state: GraphState, client: AsyncCrossrefClient, existing_urls: set, claim_id: str, selected: SelectedForClaim
+) -> None:
+    """Resolve BibTeX for one claim's selected papers, concurrently."""
+    if _restore_claim(state, claim_id, existing_urls):
+        return
+    with claim_scope(claim_id):
+        results = await asyncio.gather(
+            *(
+                _aprocess_paper(
+                    paper,
+                    client,
+                    state.existing_doi_index,
+                    state.existing_url_index,
+                    state.existing_bib_entries,
+                    state.new_bib_entries,
+                    existing_urls,
+                )
+                for paper in selected.papers
+            ),
+            return_exceptions=True,
+        )
+    valid_papers = []
+    entries = []
+    for paper, result in zip(selected.papers, results):
+        if isinstance(result, Exception):
+            logger.warning("[synthesize] Error processing paper %s: %s", paper.title, result)
+            continue
+        processed_paper, entry = result
+        if processed_paper:
+            valid_papers.append(processed_paper)
+        if entry:
+            _record_entry(state, entry, existing_urls)
+            entries.append(entry)
+    _finish_claim(state, claim_id, selected, valid_papers)
+    _checkpoint_claim(state, claim_id, entries)
+
+
+async def asynthesize_node(state: GraphState) -> GraphState:
+    logger.info("[synthesize] Resolving DOIs and creating BibTeX entries")
+    client = AsyncCrossrefClient(
+        state.config.crossref_base_url,
+        state.config.cache_dir,
+        mailto=state.config.crossref_mailto,
+    )
+    existing_urls = _known_urls(state)
+
+    # Claims are resolved one at a time (papers within a claim concurrently) so
+    # bibkey de-duplication sees the entries created for earlier claims.
+    for claim_id, selected in _pending_selections(state):
+        await _aresolve_claim(state, client, existing_urls, claim_id, selected)
     logger.info("[synthesize] Created %d new BibTeX entries", len(state.new_bib_entries))
     return state
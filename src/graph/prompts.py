@@ -32,7 +32,8 @@ Return JSON:
   "needs_more_citations": true/false,
   "claim_type": "background_fact|prior_work|method_description|performance_claim|dataset_stat|definition|comparison|speculation|no_cite",
   "rationale": "short",
-  "scope": "sentence|clause|paragraph"
+  "scope": "sentence|clause|paragraph",
+  "confidence": 0-1
 }}
 
 Rules:
@@ -41,6 +42,35 @@ Rules:
 - Do NOT set needs_citation=false only because already_cited is true.
 """
 
+NEEDS_CITATION_BATCH_USER = """Anchor context:
+{anchor}
+
+Sentences (JSON list with ids):
+{sentences}
+
+Classify every sentence independently. Return JSON:
+{{
+  "results": [
+    {{
+      "sid": "id of the sentence",
+      "needs_citation": true/false,
+      "already_cited": true/false,
+      "needs_more_citations": true/false,
+      "claim_type": "background_fact|prior_work|method_description|performance_claim|dataset_stat|definition|comparison|speculation|no_cite",
+      "rationale": "short",
+      "scope": "sentence|clause|paragraph",
+      "confidence": 0-1
+    }}
+  ]
+}}
+
+Rules:
+- Return exactly one result per input sid.
+- factual claims, prior work, numbers/statistics, SOTA comparisons need citation.
+- roadmap/self-referential statements typically do not.
+- Do NOT set needs_citation=false only because already_cited is true.
+"""
+
 QUERY_GEN_SYSTEM = "You generate search queries for Semantic Scholar. Return JSON only."
 
 QUERY_GEN_USER = """Anchor context:
@@ -71,18 +101,45 @@ SCORER_USER = """Claim:
 Candidate papers:
 {papers}
 
-Return JSON as a list of objects with fields:
-[
-  {{
-    "paper_id": "...",
-    "relevance": 0-1,
-    "support": 0-1,
-    "authority": 0-1,
-    "evidence_snippet": "short quote/paraphrase from abstract or empty",
-    "why": "1-2 sentences"
-  }}
-]
+Return JSON with one object per paper:
+{{
+  "scores": [
+    {{
+      "paper_id": "...",
+      "relevance": 0-1,
+      "support": 0-1,
+      "authority": 0-1,
+      "evidence_snippet": "short quote/paraphrase from abstract or empty",
+      "why": "1-2 sentences"
+    }}
+  ]
+}}
 
 Compute final = 0.5*support + 0.35*relevance + 0.15*authority (without seed_boost).
 If evidence_snippet is empty but abstract exists, keep support modest.
 """
+
+SCORER_MULTI_USER = """Claims:
+{claims}
+
+Candidate papers (each lists the claim_ids to score it against):
+{papers}
+
+Return JSON with one object per (paper, claim) pair listed above:
+{{
+  "scores": [
+    {{
+      "paper_id": "...",
+      "claim_id": "...",
+      "relevance": 0-1,
+      "support": 0-1,
+      "authority": 0-1,
+      "evidence_snippet": "short quote/paraphrase from abstract or empty",
+      "why": "1-2 sentences"
+    }}
+  ]
+}}
+
+Score each pair independently; authority does not depend on the claim.
+If evidence_snippet is empty but abstract exists, keep support modest.
+"""
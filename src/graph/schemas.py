@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, field_validator, model_validator
+
+# Result schemas for the nodes' JSON LLM calls. `LlmClient.chat_json` validates
+# replies against them and hands the nodes `model_dump()` dicts. Fields are
+# lenient (defaults everywhere they can be); a reply only fails validation
+# when it has the wrong shape, which triggers one corrective re-ask.
+
+
+class _Lenient(BaseModel):
+    @field_validator("*", mode="before")
+    @classmethod
+    def _none_to_default(cls, value: Any, info) -> Any:
+        if value is None:
+            return cls.model_fields[info.field_name].get_default(call_default_factory=True)
+        return value
+
+
+class AnchorResult(_Lenient):
+    topic: str = ""
+    subareas: List[str] = []
+    key_terms: List[str] = []
+    likely_venues: List[str] = []
+    exclusions: List[str] = []
+
+
+class NeedsCitationResult(_Lenient):
+    needs_citation: bool = False
+    already_cited: bool = False
+    needs_more_citations: bool = False
+    claim_type: str = "no_cite"
+    rationale: str = ""
+    scope: str = "sentence"
+    # A reply without a confidence is treated as unsure, so the cascade escalates it.
+    confidence: float = 0.0
+
+
+class NeedsCitationItem(NeedsCitationResult):
+    sid: str
+
+
+class NeedsCitationBatch(BaseModel):
+    results: List[NeedsCitationItem] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _wrap_list(cls, value: Any) -> Any:
+        return {"results": value} if isinstance(value, list) else value
+
+
+class QueryGenResult(_Lenient):
+    queries: List[str] = []
+    keywords: List[str] = []
+    must_include: List[str] = []
+    optional: List[str] = []
+
+
+class PaperScore(_Lenient):
+    paper_id: Optional[str] = None
+    claim_id: Optional[str] = None
+    relevance: float = 0.0
+    support: float = 0.0
+    authority: float = 0.0
+    evidence_snippet: str = ""
+    why: str = ""
+
+
+class ScoreBatch(BaseModel):
+    scores: List[PaperScore] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _wrap_list(cls, value: Any) -> Any:
+        # JSON mode needs an object at the top level; older prompts asked for a bare list.
+        return {"scores": value} if isinstance(value, list) else value
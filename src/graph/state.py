@@ -9,9 +9,18 @@ class AgentConfig(BaseModel):
     openai_api_key: Optional[str] = None
     openai_base_url: str = "https://api.zhizengzeng.com/v1"
     openai_model: str = "gpt-5.2"
+    openai_json_mode: bool = True
+    # Per-stage model overrides (anchor, needs_citation, gen_queries, rank_filter).
+    stage_models: Dict[str, str] = Field(default_factory=dict)
+    # Cheap first-pass model for needs_citation and rank_filter; unsure results
+    # are re-run on the stage model. Unset disables the cascade.
+    cascade_model: Optional[str] = None
+    cascade_min_confidence: float = 0.7
+    cascade_score_band: float = 0.1
     semantic_scholar_api_key: Optional[str] = None
     s2_base_url: str = "https://api.semanticscholar.org/graph/v1"
     crossref_base_url: str = "https://api.crossref.org"
+    crossref_mailto: Optional[str] = None
     perplexity_api_key: Optional[str] = None
     perplexity_base_url: str = "https://api.perplexity.ai"
     perplexity_model: str = "sonar"
@@ -19,6 +28,15 @@ class AgentConfig(BaseModel):
     top_k_per_query: int = 8
     max_queries_per_claim: int = 6
     max_papers_per_claim: int = 25
+    # Candidates per claim kept by the BM25 pre-ranker for LLM scoring (0 = all).
+    prerank_top_m: int = 12
+    # Score each unique paper once against a group of claims that share it.
+    enable_cross_claim_scoring: bool = False
+    cross_claim_max_claims: int = 4
+    # LLM scoring batches: max papers, paper-payload token budget, abstract cap.
+    scoring_batch_size: int = 12
+    scoring_batch_tokens: int = 3000
+    scoring_abstract_tokens: int = 300
     select_top_n: int = 3
     final_score_threshold: float = 0.72
     support_score_min: float = 0.60
@@ -26,7 +44,60 @@ class AgentConfig(BaseModel):
     year_max: int = 2026
     enable_human_review: bool = False
     enable_seed_expansion: bool = False
+    seed_lookup_workers: int = 8
+    needs_citation_batch_size: int = 20
+    needs_citation_batch_tokens: int = 2000
+    enable_prefilter: bool = True
+    prefilter_model_path: Optional[str] = None
+    prefilter_threshold: float = 0.95
+    seed_expansion_count: int = 3
+    seed_references_limit: int = 8
+    seed_citations_limit: int = 0
     cache_dir: str = ".cache"
+    cache_backend: Literal["sqlite", "files"] = "sqlite"
+    cache_max_bytes: int = 512 * 1024 * 1024
+    cache_ttl_days: Dict[str, float] = Field(
+        default_factory=lambda: {"s2": 30.0, "crossref": 180.0, "pplx": 7.0}
+    )
+    memory_cache_max_entries: int = 4096
+    memory_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_mode: Literal["off", "read", "readwrite"] = "off"
+    score_cache_mode: Literal["off", "read", "readwrite"] = "readwrite"
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    http_max_retries: int = 4
+    http_backoff_base: float = 1.0
+    http_backoff_max: float = 30.0
+    # Requests per second, shared by all threads in the process.
+    s2_rate_limit: float = 1.0
+    s2_public_rate_limit: float = 0.3
+    crossref_rate_limit: float = 5.0
+    crossref_polite_rate_limit: float = 10.0
+    perplexity_rate_limit: float = 3.0
+    openai_rate_limit: float = 10.0
+    # Run the graph on asyncio with the async clients instead of worker threads.
+    async_mode: bool = False
+    # Streaming (async only): claims flow through the per-claim stages independently.
+    streaming: bool = False
+    stream_stage_workers: int = 4
+    stream_queue_size: int = 8
+    # Max in-flight requests per backend in async mode.
+    s2_max_concurrency: int = 4
+    crossref_max_concurrency: int = 8
+    perplexity_max_concurrency: int = 4
+    openai_max_concurrency: int = 16
+    openai_tokens_per_minute: int = 0
+    openai_price_prompt_per_1k: float = 0.0
+    openai_price_completion_per_1k: float = 0.0
+    # Checkpoints for --resume: main sets run_id when enabled; nothing is saved without one.
+    enable_checkpoints: bool = True
+    run_id: Optional[str] = None
+    checkpoint_path: str = ".cache/checkpoints.sqlite3"
+    # Incremental runs reuse decisions for sentences unchanged since the last
+    # run, from the manifest in output_dir.
+    incremental: bool = False
     input_path: Optional[str] = None
     output_dir: str = "out"
     bib_path_override: Optional[str] = None
@@ -52,6 +123,9 @@ class CitationNeed(BaseModel):
     claim_type: str
     rationale: str
     scope: str
+    source: Literal["llm", "rule", "model"] = "llm"
+    confidence: float = 1.0
+    escalated: bool = False
 
 
 class ClaimItem(BaseModel):
@@ -79,6 +153,7 @@ class PaperCandidate(BaseModel):
     citation_count: Optional[int] = None
     source: str = "s2"
     seed_boost: float = 0.0
+    prerank_score: Optional[float] = None
 
     relevance: float = 0.0
     support: float = 0.0
@@ -116,6 +191,7 @@ class SeedPaper(BaseModel):
     bibkey: str
     resolved_doi: Optional[str] = None
     resolved_title: Optional[str] = None
+    paper_id: Optional[str] = None
     source: Literal["crossref", "s2", "unknown"] = "unknown"
 
 
@@ -138,6 +214,7 @@ class GraphState(BaseModel):
     existing_cites: List[CiteSpan] = Field(default_factory=list)
     existing_bibkeys: Set[str] = Field(default_factory=set)
     seed_papers: List[SeedPaper] = Field(default_factory=list)
+    seed_pool: List[PaperCandidate] = Field(default_factory=list)
 
     bib_path: str = ""
     existing_bib_entries: Dict[str, BibliographyEntry] = Field(default_factory=dict)
@@ -145,3 +222,8 @@ class GraphState(BaseModel):
     existing_url_index: Dict[str, str] = Field(default_factory=dict)
     new_bib_entries: Dict[str, BibliographyEntry] = Field(default_factory=dict)
     bib_write_mode: Literal["inplace", "output_dir_only"] = "inplace"
+
+    # Sentences whose decisions come from the incremental manifest; the
+    # per-sentence and per-claim nodes skip them.
+    reused_sids: Set[str] = Field(default_factory=set)
+    inserted_keys: Dict[str, List[str]] = Field(default_factory=dict)
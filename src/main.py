@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import os
 
 from dotenv import load_dotenv
 
 from .graph.build_graph import build_graph
 from .graph.state import AgentConfig, GraphState
+from .tools.caching import close_caches, configure_cache
+from .tools.checkpoint import SECRET_CONFIG_FIELDS, close_checkpoint_stores, get_checkpoint_store, new_run_id
+from .tools.http_pool import aclose_http_clients, close_http_clients, configure_http
+from .tools.llm_scheduler import configure_llm_scheduler
+from .tools.metrics import configure_metrics
 from .tools.logger import get_logger, setup_logging
+from .tools.rate_limit import configure_concurrency, configure_rate_limits
 
 logger = get_logger(__name__)
 
@@ -32,15 +39,31 @@ def _build_config(args: argparse.Namespace) -> AgentConfig:
         openai_api_key=_normalize_key(os.getenv("OPENAI_API_KEY")),
         openai_base_url=os.getenv("OPENAI_BASE_URL", "https://api.zhizengzeng.com/v1"),
         openai_model=os.getenv("OPENAI_MODEL", args.model or "gpt-5.2"),
+        openai_json_mode=_env_bool("OPENAI_JSON_MODE", True),
+        stage_models={
+            stage: os.environ[f"OPENAI_MODEL_{stage.upper()}"]
+            for stage in ("anchor", "needs_citation", "gen_queries", "rank_filter")
+            if os.getenv(f"OPENAI_MODEL_{stage.upper()}")
+        },
+        cascade_model=os.getenv("OPENAI_CASCADE_MODEL") or None,
+        cascade_min_confidence=float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7")),
+        cascade_score_band=float(os.getenv("CASCADE_SCORE_BAND", "0.1")),
         perplexity_api_key=_normalize_key(os.getenv("PERPLEXITY_API_KEY")),
         perplexity_base_url=os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai"),
         perplexity_model=os.getenv("PERPLEXITY_MODEL", "sonar"),
         semantic_scholar_api_key=_normalize_key(os.getenv("SEMANTIC_SCHOLAR_API_KEY")),
         s2_base_url=os.getenv("S2_BASE_URL", "https://api.semanticscholar.org/graph/v1"),
         crossref_base_url=os.getenv("CROSSREF_BASE_URL", "https://api.crossref.org"),
+        crossref_mailto=os.getenv("CROSSREF_MAILTO") or None,
         top_k_per_query=int(os.getenv("TOP_K_PER_QUERY", "8")),
         max_queries_per_claim=int(os.getenv("MAX_QUERIES_PER_CLAIM", "6")),
         max_papers_per_claim=int(os.getenv("MAX_PAPERS_PER_CLAIM", "25")),
+        prerank_top_m=int(os.getenv("PRERANK_TOP_M", "12")),
+        enable_cross_claim_scoring=_env_bool("ENABLE_CROSS_CLAIM_SCORING", False),
+        cross_claim_max_claims=int(os.getenv("CROSS_CLAIM_MAX_CLAIMS", "4")),
+        scoring_batch_size=int(os.getenv("SCORING_BATCH_SIZE", "12")),
+        scoring_batch_tokens=int(os.getenv("SCORING_BATCH_TOKENS", "3000")),
+        scoring_abstract_tokens=int(os.getenv("SCORING_ABSTRACT_TOKENS", "300")),
         select_top_n=int(os.getenv("SELECT_TOP_N", "3")),
         final_score_threshold=float(os.getenv("FINAL_SCORE_THRESHOLD", "0.72")),
         support_score_min=float(os.getenv("SUPPORT_SCORE_MIN", "0.60")),
@@ -48,46 +71,236 @@ def _build_config(args: argparse.Namespace) -> AgentConfig:
         year_max=int(os.getenv("YEAR_MAX", "2026")),
         enable_human_review=_env_bool("ENABLE_HUMAN_REVIEW", False),
         enable_seed_expansion=_env_bool("ENABLE_SEED_EXPANSION", False),
+        seed_lookup_workers=int(os.getenv("SEED_LOOKUP_WORKERS", "8")),
+        needs_citation_batch_size=int(os.getenv("NEEDS_CITATION_BATCH_SIZE", "20")),
+        needs_citation_batch_tokens=int(os.getenv("NEEDS_CITATION_BATCH_TOKENS", "2000")),
+        enable_prefilter=_env_bool("ENABLE_PREFILTER", True),
+        prefilter_model_path=os.getenv("PREFILTER_MODEL") or None,
+        prefilter_threshold=float(os.getenv("PREFILTER_THRESHOLD", "0.95")),
+        seed_expansion_count=int(os.getenv("SEED_EXPANSION_COUNT", "3")),
+        seed_references_limit=int(os.getenv("SEED_REFERENCES_LIMIT", "8")),
+        seed_citations_limit=int(os.getenv("SEED_CITATIONS_LIMIT", "0")),
         cache_dir=os.getenv("CACHE_DIR", ".cache"),
+        cache_backend=os.getenv("CACHE_BACKEND", "sqlite"),
+        cache_max_bytes=int(float(os.getenv("CACHE_MAX_MB", "512")) * 1024 * 1024),
+        cache_ttl_days={
+            "s2": float(os.getenv("CACHE_TTL_S2_DAYS", "30")),
+            "crossref": float(os.getenv("CACHE_TTL_CROSSREF_DAYS", "180")),
+            "pplx": float(os.getenv("CACHE_TTL_PPLX_DAYS", "7")),
+        },
+        memory_cache_max_entries=int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "4096")),
+        memory_cache_max_bytes=int(float(os.getenv("MEMORY_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        llm_cache_mode=args.llm_cache or os.getenv("LLM_CACHE", "off"),
+        score_cache_mode=os.getenv("SCORE_CACHE", "readwrite"),
+        http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        http_max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "10")),
+        http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        http2=_env_bool("HTTP2", False),
+        http_max_retries=int(os.getenv("HTTP_MAX_RETRIES", "4")),
+        http_backoff_base=float(os.getenv("HTTP_BACKOFF_BASE", "1.0")),
+        http_backoff_max=float(os.getenv("HTTP_BACKOFF_MAX", "30")),
+        s2_rate_limit=float(os.getenv("S2_RATE_LIMIT", "1.0")),
+        s2_public_rate_limit=float(os.getenv("S2_PUBLIC_RATE_LIMIT", "0.3")),
+        crossref_rate_limit=float(os.getenv("CROSSREF_RATE_LIMIT", "5")),
+        crossref_polite_rate_limit=float(os.getenv("CROSSREF_POLITE_RATE_LIMIT", "10")),
+        perplexity_rate_limit=float(os.getenv("PERPLEXITY_RATE_LIMIT", "3")),
+        openai_rate_limit=float(os.getenv("OPENAI_RATE_LIMIT", "10")),
+        async_mode=args.async_mode or _env_bool("ASYNC_MODE", False),
+        streaming=args.stream or _env_bool("STREAMING", False),
+        stream_stage_workers=int(os.getenv("STREAM_STAGE_WORKERS", "4")),
+        stream_queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "8")),
+        s2_max_concurrency=int(os.getenv("S2_MAX_CONCURRENCY", "4")),
+        crossref_max_concurrency=int(os.getenv("CROSSREF_MAX_CONCURRENCY", "8")),
+        perplexity_max_concurrency=int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "4")),
+        openai_max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+        openai_tokens_per_minute=int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0")),
+        openai_price_prompt_per_1k=float(os.getenv("OPENAI_PRICE_PROMPT_PER_1K", "0")),
+        openai_price_completion_per_1k=float(os.getenv("OPENAI_PRICE_COMPLETION_PER_1K", "0")),
+        enable_checkpoints=_env_bool("ENABLE_CHECKPOINTS", True),
+        checkpoint_path=os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite3"),
+        incremental=args.incremental or _env_bool("INCREMENTAL", False),
         input_path=args.input,
         output_dir=args.output_dir,
         bib_path_override=args.bib,
     )
     if args.bib:
         config.enable_seed_expansion = True
+    if config.streaming:
+        config.async_mode = True
     return config
 
 
+def _resume_state(config: AgentConfig, run_id: str) -> GraphState:
+    """The state saved after the last completed node of `run_id`.
+
+    The run keeps its original settings; credentials come from this process.
+    """
+    loaded = get_checkpoint_store(config.checkpoint_path).load(run_id)
+    if loaded is None:
+        raise SystemExit(f"No checkpointed run {run_id} in {config.checkpoint_path}")
+    completed, state_json, status = loaded
+    if not state_json:
+        # Interrupted before the first node finished: start over under the same id.
+        if not config.input_path:
+            raise SystemExit(f"Run {run_id} has no checkpoint yet; pass --input to restart it")
+        return GraphState(config=config.model_copy(update={"run_id": run_id}))
+    state = GraphState.model_validate_json(state_json)
+    update = {field: getattr(config, field) for field in SECRET_CONFIG_FIELDS}
+    update.update(run_id=run_id, checkpoint_path=config.checkpoint_path)
+    state.config = state.config.model_copy(update=update)
+    logger.info("Resuming run %s (%s) after %s", run_id, status, ", ".join(completed))
+    return state
+
+
+async def _run_async(graph, state: GraphState):
+    try:
+        return await graph.ainvoke(state)
+    finally:
+        await aclose_http_clients()
+
+
+def _add_run_args(parser: argparse.ArgumentParser) -> None:
+    """Options shared by the single-document and batch entry points."""
+    parser.add_argument("--output_dir", default="out", help="Output directory")
+    parser.add_argument("--model", default=None, help="OpenAI model name")
+    parser.add_argument(
+        "--llm_cache",
+        "--llm-cache",
+        choices=["off", "read", "readwrite"],
+        default=None,
+        help="Reuse cached LLM responses (default: $LLM_CACHE or off)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="async_mode",
+        action="store_true",
+        help="Run network-bound nodes on a single asyncio event loop",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream each claim through query generation, search, ranking and DOI resolution (implies --async)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process sentences that are new or edited since the last run into --output_dir",
+    )
+
+
+def configure_runtime(config: AgentConfig) -> None:
+    """Set up the process-wide caches, HTTP pools, rate limits, LLM scheduler and metrics prices."""
+    configure_cache(
+        backend=config.cache_backend,
+        max_bytes=config.cache_max_bytes,
+        ttls={ns: days * 24 * 60 * 60 for ns, days in config.cache_ttl_days.items()},
+        memory_max_entries=config.memory_cache_max_entries,
+        memory_max_bytes=config.memory_cache_max_bytes,
+    )
+    configure_http(
+        max_connections=config.http_max_connections,
+        max_keepalive_connections=config.http_max_keepalive_connections,
+        keepalive_expiry=config.http_keepalive_expiry,
+        http2=config.http2,
+        max_retries=config.http_max_retries,
+        backoff_base=config.http_backoff_base,
+        backoff_max=config.http_backoff_max,
+    )
+    configure_rate_limits(
+        {
+            "s2": config.s2_rate_limit,
+            "s2_public": config.s2_public_rate_limit,
+            "crossref": config.crossref_rate_limit,
+            "crossref_polite": config.crossref_polite_rate_limit,
+            "perplexity": config.perplexity_rate_limit,
+            "openai": config.openai_rate_limit,
+        }
+    )
+    configure_concurrency(
+        {
+            "s2": config.s2_max_concurrency,
+            "crossref": config.crossref_max_concurrency,
+            "perplexity": config.perplexity_max_concurrency,
+        }
+    )
+    configure_llm_scheduler(
+        max_in_flight=config.openai_max_concurrency,
+        tokens_per_minute=config.openai_tokens_per_minute,
+    )
+    configure_metrics(
+        prompt_price_per_1k=config.openai_price_prompt_per_1k,
+        completion_price_per_1k=config.openai_price_completion_per_1k,
+    )
+
+
+def close_runtime() -> None:
+    close_http_clients()
+    close_caches()
+    close_checkpoint_stores()
+
+
+def write_revised(result, output_dir: str) -> str:
+    # LangGraph returns a dict, not the GraphState object
+    if isinstance(result, dict):
+        revised_text = result.get("revised_text", "")
+    else:
+        revised_text = result.revised_text
+
+    os.makedirs(output_dir, exist_ok=True)
+    revised_path = os.path.join(output_dir, "revised.tex")
+    with open(revised_path, "w", encoding="utf-8") as f:
+        f.write(revised_text)
+    logger.info("Wrote revised LaTeX to %s", revised_path)
+    return revised_path
+
+
 def main() -> None:
     load_dotenv()
     setup_logging()
     
     parser = argparse.ArgumentParser()
-    parser.add_argument("--input", required=True, help="Path to LaTeX draft")
+    parser.add_argument("--input", required=False, help="Path to LaTeX draft")
     parser.add_argument("--bib", required=False, help="Path to existing .bib file")
-    parser.add_argument("--output_dir", default="out", help="Output directory")
-    parser.add_argument("--model", default=None, help="OpenAI model name")
+    _add_run_args(parser)
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="Resume a checkpointed run")
     args = parser.parse_args()
+    if not args.input and not args.resume:
+        parser.error("--input is required unless --resume is given")
 
     config = _build_config(args)
+    if args.resume:
+        state = _resume_state(config, args.resume)
+        config = state.config
+    else:
+        if config.enable_checkpoints:
+            config.run_id = new_run_id()
+        state = GraphState(config=config)
+    configure_runtime(config)
     logger.info("Starting citation agent pipeline")
     logger.info("Input: %s, Output: %s", config.input_path, config.output_dir)
-    
-    state = GraphState(config=config)
-    graph = build_graph()
-    result = graph.invoke(state)
+    store = get_checkpoint_store(config.checkpoint_path) if config.run_id else None
+    if store:
+        store.start_run(config.run_id)
+        logger.info("Run id: %s (checkpoints in %s)", config.run_id, config.checkpoint_path)
 
-    # LangGraph returns a dict, not the GraphState object
-    if isinstance(result, dict):
-        revised_text = result.get("revised_text", "")
+    graph = build_graph(async_mode=config.async_mode, streaming=config.streaming)
+    try:
+        if config.async_mode:
+            result = asyncio.run(_run_async(graph, state))
+        else:
+            result = graph.invoke(state)
+    except BaseException:
+        if store:
+            store.set_status(config.run_id, "interrupted")
+            logger.error("Run %s stopped; continue it with --resume %s", config.run_id, config.run_id)
+        raise
     else:
-        revised_text = result.revised_text
+        if store:
+            store.delete_run(config.run_id)
+    finally:
+        close_runtime()
 
-    os.makedirs(config.output_dir, exist_ok=True)
-    revised_path = os.path.join(config.output_dir, "revised.tex")
-    with open(revised_path, "w", encoding="utf-8") as f:
-        f.write(revised_text)
-    logger.info("Wrote revised LaTeX to %s", revised_path)
+    write_revised(result, config.output_dir)
     logger.info("Pipeline completed successfully")
 
 
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from .graph.build_graph import build_graph
+from .graph.state import AgentConfig, GraphState
+from .main import _add_run_args, _build_config, _env_bool, close_runtime, configure_runtime, write_revised
+from .tools.caching import cache_stats
+from .tools.checkpoint import SECRET_CONFIG_FIELDS, get_checkpoint_store, new_run_id
+from .tools.http_pool import aclose_http_clients, http_stats
+from .tools.llm_scheduler import get_llm_scheduler
+from .tools.logger import get_logger, setup_logging
+from .tools.metrics import metrics_summary, reset_metrics, run_scope
+from .tools.progress import progress_scope
+
+logger = get_logger(__name__)
+
+# Server mode keeps one process warm for editor integrations: the compiled
+# graph, pooled HTTP clients, caches and LLM scheduler are set up once, and
+# each request runs the async pipeline as a task on the server's event loop.
+# The protocol is plain HTTP/1.1 with JSON bodies over TCP or a Unix socket;
+# a run streams newline-delimited JSON events until it is done.
+
+# Settings fixed by the warm runtime; a request cannot override them.
+RUNTIME_CONFIG_FIELDS = frozenset(
+    {
+        "async_mode",
+        "streaming",
+        "run_id",
+        "checkpoint_path",
+        "cache_dir",
+        "cache_backend",
+        "cache_max_bytes",
+        "cache_ttl_days",
+        "memory_cache_max_entries",
+        "memory_cache_max_bytes",
+        "http_max_connections",
+        "http_max_keepalive_connections",
+        "http_keepalive_expiry",
+        "http2",
+        "http_max_retries",
+        "http_backoff_base",
+        "http_backoff_max",
+        "s2_max_concurrency",
+        "crossref_max_concurrency",
+        "perplexity_max_concurrency",
+        "openai_max_concurrency",
+        "openai_tokens_per_minute",
+        "openai_price_prompt_per_1k",
+        "openai_price_completion_per_1k",
+    }
+) | SECRET_CONFIG_FIELDS
+# The server's API keys go to these hosts, and these paths are written or
+# loaded; output and .bib paths are only taken from the request's top level,
+# where they are checked.
+REQUEST_PROTECTED_FIELDS = frozenset(
+    {name for name in AgentConfig.model_fields if name.endswith("_base_url")}
+    | {"input_path", "output_dir", "bib_path_override", "prefilter_model_path"}
+)
+
+_MAX_BODY_BYTES = 16 * 1024 * 1024
+_FINAL_EVENTS = ("done", "error", "cancelled")
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+}
+
+
+class RequestError(ValueError):
+    """A bad request; the message is returned to the client with `status` (400 by default)."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _within(path: str, roots) -> bool:
+    real = os.path.realpath(path)
+    for root in roots:
+        root = os.path.realpath(root)
+        if os.path.commonpath([real, root]) == root:
+            return True
+    return False
+
+
+class CitationServer:
+    """Runs pipeline requests on one event loop against a shared, warm runtime.
+
+    A request names a `session` (e.g. the editor buffer); a new request for
+    the same session cancels the one still running, since its result would
+    be stale.
+    """
+
+    def __init__(self, base: AgentConfig) -> None:
+        self.base = base.model_copy(update={"async_mode": True})
+        self.graph = build_graph(async_mode=True, streaming=self.base.streaming)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._sessions: Dict[str, str] = {}
+        self._cancel_reasons: Dict[str, str] = {}
+
+    def request_config(self, request: Dict[str, Any], run_id: str) -> AgentConfig:
+        """The base config with the request's input, output directory and overrides applied."""
+        overrides = request.get("config") or {}
+        if not isinstance(overrides, dict):
+            raise RequestError("config must be an object")
+        unknown = sorted(set(overrides) - set(AgentConfig.model_fields))
+        if unknown:
+            raise RequestError(f"Unknown config fields: {', '.join(unknown)}")
+        fixed = sorted(set(overrides) & (RUNTIME_CONFIG_FIELDS | REQUEST_PROTECTED_FIELDS))
+        if fixed:
+            raise RequestError(f"Fixed by the server, cannot be overridden: {', '.join(fixed)}")
+        input_path = request.get("input_path")
+        if not input_path or not isinstance(input_path, str):
+            raise RequestError("input_path is required (it also locates the .bib file)")
+        # Runs of one session share an output directory, so --incremental
+        # reuses the previous save's manifest.
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", request.get("session") or run_id).lstrip(".") or run_id
+        # Files are only written below the server's output directory or next
+        # to the draft (where the .bib lives).
+        roots = (self.base.output_dir, os.path.dirname(os.path.abspath(input_path)))
+        for key in ("output_dir", "bib_path"):
+            path = request.get(key)
+            if path is not None and (not isinstance(path, str) or not _within(path, roots)):
+                raise RequestError(f"{key} must be under the server's output directory or the draft's directory")
+        update = dict(overrides)
+        update.update(
+            input_path=input_path,
+            output_dir=request.get("output_dir") or os.path.join(self.base.output_dir, name),
+            run_id=run_id if self.base.enable_checkpoints else None,
+        )
+        if request.get("bib_path"):
+            update["bib_path_override"] = request["bib_path"]
+        try:
+            return AgentConfig.model_validate({**self.base.model_dump(), **update})
+        except ValidationError as exc:
+            raise RequestError(str(exc)) from exc
+
+    def start(self, request: Dict[str, Any], sink) -> Tuple[str, asyncio.Task]:
+        """Start a run as a task; events go to `sink`. Supersedes the session's previous run."""
+        run_id = new_run_id()
+        config = self.request_config(request, run_id)
+        draft = request.get("draft")
+        if draft is not None and not isinstance(draft, str):
+            raise RequestError("draft must be a string")
+        session = request.get("session")
+        if session:
+            previous = self._sessions.get(session)
+            if previous:
+                self.cancel(previous, "superseded")
+            self._sessions[session] = run_id
+        task = asyncio.get_running_loop().create_task(self._run(run_id, config, draft or "", sink))
+        self._tasks[run_id] = task
+
+        def forget(_task: asyncio.Task) -> None:
+            self._tasks.pop(run_id, None)
+            self._cancel_reasons.pop(run_id, None)
+            if session and self._sessions.get(session) == run_id:
+                del self._sessions[session]
+
+        task.add_done_callback(forget)
+        return run_id, task
+
+    def cancel(self, run_id: str, reason: str = "cancelled") -> bool:
+        task = self._tasks.get(run_id)
+        if task is None or task.done():
+            return False
+        logger.info("[server] Cancelling run %s (%s)", run_id, reason)
+        self._cancel_reasons[run_id] = reason
+        task.cancel()
+        return True
+
+    def running(self) -> Dict[str, Any]:
+        sessions = {run_id: session for session, run_id in self._sessions.items()}
+        return {run_id: {"session": sessions.get(run_id)} for run_id in self._tasks}
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness plus the cache, backend and scheduler counters shared by every run since start."""
+        return {
+            "status": "ok",
+            "runs": len(self._tasks),
+            "cache": cache_stats(),
+            "http": http_stats(),
+            "llm": get_llm_scheduler().stats(),
+        }
+
+    async def _run(self, run_id: str, config: AgentConfig, draft: str, sink) -> Dict[str, Any]:
+        store = get_checkpoint_store(config.checkpoint_path) if config.run_id else None
+        start = time.perf_counter()
+        with run_scope(run_id), progress_scope(sink):
+            sink({"event": "started", "run_id": run_id, "output_dir": config.output_dir})
+            if store:
+                store.start_run(run_id)
+            try:
+                result = await self.graph.ainvoke(GraphState(config=config, raw_text=draft))
+                write_revised(result, config.output_dir)
+            except asyncio.CancelledError:
+                # A cancelled run is superseded or abandoned by its client; nothing will resume it.
+                if store:
+                    store.delete_run(run_id)
+                sink({"event": "cancelled", "run_id": run_id, "reason": self._cancel_reasons.get(run_id, "cancelled")})
+                raise
+            except Exception as exc:
+                if store:
+                    store.set_status(run_id, "interrupted")
+                logger.error("[server] Run %s failed: %s", run_id, exc)
+                event = {"event": "error", "run_id": run_id, "error": f"{type(exc).__name__}: {exc}"}
+                sink(event)
+                return event
+            else:
+                if store:
+                    store.delete_run(run_id)
+                event = _done_event(run_id, result, metrics_summary(), time.perf_counter() - start)
+                sink(event)
+                return event
+            finally:
+                reset_metrics()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, headers, body = await _read_request(reader)
+        except RequestError as exc:
+            await _respond(writer, exc.status, {"error": str(exc)})
+            return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        try:
+            _check_origin(headers)
+            if method == "POST" and path == "/runs":
+                _check_json(headers)
+                await self._stream_run(body, reader, writer)
+            elif method == "POST" and path.startswith("/runs/") and path.endswith("/cancel"):
+                run_id = path[len("/runs/") : -len("/cancel")]
+                await _respond(writer, 200, {"run_id": run_id, "cancelled": self.cancel(run_id)})
+            elif method == "GET" and path == "/runs":
+                await _respond(writer, 200, {"runs": self.running()})
+            elif method == "GET" and path == "/health":
+                await _respond(writer, 200, self.health())
+            elif path in ("/runs", "/health") or path.startswith("/runs/"):
+                await _respond(writer, 405, {"error": f"{method} not allowed on {path}"})
+            else:
+                await _respond(writer, 404, {"error": f"No route for {path}"})
+        except RequestError as exc:
+            await _respond(writer, exc.status, {"error": str(exc)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _stream_run(self, body: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError as exc:
+            raise RequestError(f"Invalid JSON body: {exc}") from exc
+        if not isinstance(request, dict):
+            raise RequestError("The body must be a JSON object")
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def sink(event: Dict[str, Any]) -> None:
+            # Nodes may emit from worker threads.
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        run_id, task = self.start(request, sink)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+
+        async def send(event: Dict[str, Any]) -> bool:
+            writer.write(json.dumps(event, ensure_ascii=True).encode("utf-8") + b"\n")
+            await writer.drain()
+            return event["event"] in _FINAL_EVENTS
+
+        # The client closing the connection cancels its run.
+        watcher = loop.create_task(reader.read(1024))
+        getter = loop.create_task(events.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({getter, watcher, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    if await send(getter.result()):
+                        return
+                    getter = loop.create_task(events.get())
+                elif watcher in done:
+                    if watcher.exception() is not None or not watcher.result():
+                        self.cancel(run_id, "client disconnected")
+                        return
+                    # Stray bytes from the client; keep watching for EOF.
+                    watcher = loop.create_task(reader.read(1024))
+                elif task in done:
+                    # Send what the run emitted before it ended; a run
+                    # cancelled before it started has emitted nothing.
+                    while (await asyncio.wait({getter}, timeout=0.1))[0]:
+                        if await send(getter.result()):
+                            return
+                        getter = loop.create_task(events.get())
+                    reason = self._cancel_reasons.get(run_id, "cancelled")
+                    await send({"event": "cancelled", "run_id": run_id, "reason": reason})
+                    return
+        except ConnectionError:
+            self.cancel(run_id, "client disconnected")
+        finally:
+            getter.cancel()
+            watcher.cancel()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None) -> None:
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            logger.info("[server] Listening on unix:%s", socket_path)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+            logger.info("[server] Listening on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for run_id in list(self._tasks):
+                self.cancel(run_id, "server shutdown")
+            await aclose_http_clients()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def _done_event(run_id: str, result: Any, metrics: Dict[str, Any], seconds: float) -> Dict[str, Any]:
+    state = GraphState.model_validate(result) if isinstance(result, dict) else result
+    return {
+        "event": "done",
+        "run_id": run_id,
+        "output_dir": state.config.output_dir,
+        "seconds": round(seconds, 3),
+        "revised_text": state.revised_text,
+        "inserted_keys": state.inserted_keys,
+        "new_bibkeys": list(state.new_bib_entries),
+        "claims": [
+            {"cid": cid, "status": selected.status, "papers": len(selected.papers)}
+            for cid, selected in state.selected_by_claim.items()
+        ],
+        "reused_sentences": len(state.reused_sids),
+        "metrics": metrics["totals"],
+    }
+
+
+def _check_origin(headers: Dict[str, str]) -> None:
+    """Refuse requests made by web pages.
+
+    Browsers send an Origin header with them and editor clients do not. The
+    server serves no pages, so no origin is its own; this also covers pages
+    that reach it through DNS rebinding, whose Origin matches the Host.
+    """
+    origin = headers.get("origin")
+    if origin:
+        raise RequestError(f"Requests from web pages are not allowed (Origin: {origin})", status=403)
+
+
+def _check_json(headers: Dict[str, str]) -> None:
+    # Browsers can send text/plain or form bodies cross-site without a preflight; not JSON.
+    content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type != "application/json":
+        raise RequestError("Content-Type must be application/json", status=415)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise RequestError(f"Malformed request line: {request_line!r}")
+    method, target, _version = parts
+    headers: Dict[str, str] = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError as exc:
+        raise RequestError("Invalid Content-Length") from exc
+    if length > _MAX_BODY_BYTES:
+        raise RequestError(f"Body larger than {_MAX_BODY_BYTES} bytes", status=413)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0].rstrip("/") or "/", headers, body
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+def main() -> None:
+    load_dotenv()
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Serve the citation pipeline over local HTTP/JSON")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"), help="Address to listen on")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8765")), help="TCP port")
+    parser.add_argument("--socket", default=os.getenv("SERVER_SOCKET") or None, help="Listen on a Unix socket instead")
+    _add_run_args(parser)
+    parser.set_defaults(input=None, bib=None)
+    args = parser.parse_args()
+
+    config = _build_config(args)
+    # Server runs are short-lived and resubmitted rather than resumed; checkpoint them only on request.
+    config.enable_checkpoints = _env_bool("ENABLE_CHECKPOINTS", False)
+    configure_runtime(config)
+    server = CitationServer(config)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        logger.info("[server] Shutting down")
+    finally:
+        close_runtime()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,479 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import glob
 import hashlib
 import json
 import os
-from typing import Any, Optional
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import record_cache
+
+_DAY = 24 * 60 * 60
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_MAX_ENTRIES = 4096
+DEFAULT_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTLS: Dict[str, float] = {
+    "s2": 30 * _DAY,
+    "crossref": 180 * _DAY,
+    "pplx": 7 * _DAY,
+}
+
+_DB_FILENAME = "cache.sqlite3"
+# Only refresh the LRU timestamp when it is older than this, so hot keys do
+# not turn every read into a write.
+_TOUCH_INTERVAL = 60.0
 
 
 def _hash_key(key: str) -> str:
     return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
 
-def _cache_path(cache_dir: str, key: str) -> str:
-    os.makedirs(cache_dir, exist_ok=True)
-    return os.path.join(cache_dir, f"{_hash_key(key)}.json")
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0] if ":" in key else ""
 
 
-def cache_get(cache_dir: str, key: str) -> Optional[Any]:
-    path = _cache_path(cache_dir, key)
-    if not os.path.exists(path):
-        return None
+def _approx_size(value: Any) -> int:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (OSError, json.JSONDecodeError):
+        return len(json.dumps(value, ensure_ascii=True, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU bounded by entry count and approximate bytes.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, scope: str, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return False, None
+            value, size, expires_at = entry
+            if expires_at and expires_at < now:
+                del self._entries[(scope, key)]
+                self._bytes -= size
+                return False, None
+            self._entries.move_to_end((scope, key))
+            return True, value
+
+    def set(self, scope: str, key: str, value: Any, size: int, expires_at: float = 0.0) -> None:
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((scope, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(scope, key)] = (value, size, expires_at)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheBackend:
+    """Storage interface behind `cache_get`/`cache_set`."""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        return None
+
+
+class FileCacheBackend(CacheBackend):
+    """Legacy layout: one JSON file per hashed key. No TTL or eviction."""
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{_hash_key(key)}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            with open(self._path(key), "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=True)
+        except OSError:
+            return
+
+
+class SqliteCacheBackend(CacheBackend):
+    """Single-file SQLite (WAL) store with per-namespace TTLs and LRU eviction.
+
+    TTLs are evaluated at read time against the entry's creation time, so
+    changing a namespace TTL applies to entries that are already stored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self._total_bytes = int(row[0])
+
+    def _expired(self, namespace: str, created_at: float, now: float) -> bool:
+        ttl = self.ttls.get(namespace)
+        return bool(ttl) and created_at + ttl < now
+
+    def get(self, key: str) -> Optional[Any]:
+        hashed = _hash_key(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT namespace, value, size, created_at, accessed_at FROM entries WHERE key = ?",
+                (hashed,),
+            ).fetchone()
+            if row is None:
+                return None
+            namespace, value, size, created_at, accessed_at = row
+            if self._expired(namespace, created_at, now):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (hashed,))
+                self._total_bytes -= size
+                return None
+            if now - accessed_at > _TOUCH_INTERVAL:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, hashed))
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        self._put(_hash_key(key), _namespace(key), payload, time.time())
+
+    def _put(self, hashed: str, namespace: str, payload: str, created_at: float) -> None:
+        size = len(payload)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (hashed,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (hashed, namespace, payload, size, created_at, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        for namespace, ttl in self.ttls.items():
+            if ttl:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND created_at < ?",
+                    (namespace, now - ttl),
+                )
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self._total_bytes = int(row[0])
+        # Evict down to 90% of the cap so we do not evict on every write.
+        target = int(self.max_bytes * 0.9)
+        if self._total_bytes <= target:
+            return
+        victims = []
+        freed = 0
+        for hashed, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            victims.append((hashed,))
+            freed += size
+            if self._total_bytes - freed <= target:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._total_bytes -= freed
+
+    def import_file_cache(self, cache_dir: str, remove: bool = False) -> int:
+        """Import a legacy one-file-per-key cache directory.
+
+        Legacy files are named by the hash of their key, so the original
+        namespace is unknown and imported entries never expire by TTL; they
+        are still subject to LRU eviction.
+        """
+        count = 0
+        for path in glob.glob(os.path.join(cache_dir, "*.json")):
+            hashed = os.path.splitext(os.path.basename(path))[0]
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                created_at = os.path.getmtime(path)
+            except (OSError, json.JSONDecodeError):
+                continue
+            payload = json.dumps(value, ensure_ascii=True, separators=(",", ":"))
+            self._put(hashed, "", payload, created_at)
+            count += 1
+            if remove:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_settings: Dict[str, Any] = {
+    "backend": "sqlite",
+    "max_bytes": DEFAULT_MAX_BYTES,
+    "ttls": dict(DEFAULT_TTLS),
+}
+_backends: Dict[str, CacheBackend] = {}
+_backends_lock = threading.Lock()
+_memory = MemoryCache(DEFAULT_MEMORY_MAX_ENTRIES, DEFAULT_MEMORY_MAX_BYTES)
+_stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "coalesced": 0}
+_stats_lock = threading.Lock()
+_flights: Dict[Tuple[str, str], "_Flight"] = {}
+_flights_lock = threading.Lock()
+_async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def configure_cache(
+    backend: str = "sqlite",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    ttls: Optional[Dict[str, float]] = None,
+    memory_max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+    memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+) -> None:
+    """Set the process-wide cache backend and memory tier. Open backends are closed."""
+    global _memory
+    if backend not in {"sqlite", "files"}:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    close_caches()
+    _settings["backend"] = backend
+    _settings["max_bytes"] = max_bytes
+    _settings["ttls"] = dict(DEFAULT_TTLS if ttls is None else ttls)
+    _memory = MemoryCache(memory_max_entries, memory_max_bytes)
+
+
+def get_cache_backend(cache_dir: str) -> CacheBackend:
+    with _backends_lock:
+        backend = _backends.get(cache_dir)
+        if backend is None:
+            if _settings["backend"] == "files":
+                backend = FileCacheBackend(cache_dir)
+            else:
+                backend = SqliteCacheBackend(
+                    os.path.join(cache_dir, _DB_FILENAME),
+                    max_bytes=_settings["max_bytes"],
+                    ttls=_settings["ttls"],
+                )
+            _backends[cache_dir] = backend
+        return backend
+
+
+def close_caches() -> None:
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
+
+
+def _memory_expiry(key: str) -> float:
+    ttl = _settings["ttls"].get(_namespace(key))
+    return time.time() + ttl if ttl else 0.0
+
+
+def cache_get(cache_dir: str, key: str) -> Optional[Any]:
+    found, value = _memory.get(cache_dir, key)
+    if found:
+        _count("memory_hits")
+        return value
+    value = get_cache_backend(cache_dir).get(key)
+    if value is None:
+        _count("misses")
         return None
+    _count("disk_hits")
+    _memory.set(cache_dir, key, value, _approx_size(value), _memory_expiry(key))
+    return value
 
 
 def cache_set(cache_dir: str, key: str, value: Any) -> None:
-    path = _cache_path(cache_dir, key)
+    _count("sets")
+    _memory.set(cache_dir, key, value, _approx_size(value), _memory_expiry(key))
+    get_cache_backend(cache_dir).set(key, value)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def cache_get_or_fetch(cache_dir: str, key: str, fetch: Callable[[], Any]) -> Any:
+    """Return the cached value for `key`, calling `fetch` on a miss.
+
+    Concurrent misses for the same key are coalesced: one thread runs
+    `fetch` and the others wait for its result (or exception). `fetch` is
+    responsible for storing what it fetched with `cache_set`.
+    """
+    cached = cache_get(cache_dir, key)
+    if cached is not None:
+        record_cache("hit")
+        return cached
+    flight_key = (cache_dir, key)
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[flight_key] = _Flight()
+    if not leader:
+        _count("coalesced")
+        record_cache("coalesced")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(value, f, ensure_ascii=True, indent=2)
-    except OSError:
-        return
+        # A flight that finished between our miss and registering has
+        # already populated the memory tier.
+        found, value = _memory.get(cache_dir, key)
+        record_cache("hit" if found else "miss")
+        flight.value = value if found else fetch()
+        return flight.value
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(flight_key, None)
+        flight.done.set()
+
+
+# Result a cancelled leader hands its waiters: they retry the fetch themselves
+# rather than being cancelled along with it.
+_LEADER_CANCELLED = object()
+
+
+async def acache_get_or_fetch(cache_dir: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Async `cache_get_or_fetch`; coalesces concurrent misses on the running loop."""
+    cached = cache_get(cache_dir, key)
+    if cached is not None:
+        record_cache("hit")
+        return cached
+    loop = asyncio.get_running_loop()
+    flight_key = (cache_dir, key)
+    flights = _async_flights.setdefault(loop, {})
+    future = flights.get(flight_key)
+    if future is not None:
+        _count("coalesced")
+        record_cache("coalesced")
+        value = await asyncio.shield(future)
+        if value is _LEADER_CANCELLED:
+            return await acache_get_or_fetch(cache_dir, key, fetch)
+        return value
+    record_cache("miss")
+    future = flights[flight_key] = loop.create_future()
+    try:
+        value = await fetch()
+    except asyncio.CancelledError:
+        future.set_result(_LEADER_CANCELLED)
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        # Mark the exception as retrieved in case nobody was waiting.
+        future.exception()
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        flights.pop(flight_key, None)
+
+
+def cache_stats() -> Dict[str, int]:
+    """Hit/miss counters for the memory and disk tiers since process start."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["memory_entries"] = len(_memory)
+    stats["memory_evictions"] = _memory.evictions
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cache maintenance for auto_citation_agent.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import a legacy JSON-file cache into SQLite")
+    migrate.add_argument("--cache_dir", default=os.getenv("CACHE_DIR", ".cache"))
+    migrate.add_argument("--remove", action="store_true", help="Delete JSON files after import")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = SqliteCacheBackend(os.path.join(args.cache_dir, _DB_FILENAME), max_bytes=0)
+        try:
+            count = store.import_file_cache(args.cache_dir, remove=args.remove)
+        finally:
+            store.close()
+        print(f"Imported {count} entries into {store.path}")
+
+
+if __name__ == "__main__":
+    main()
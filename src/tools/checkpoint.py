@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Config fields that are never written to the checkpoint store; a resumed run
+# takes them from the current environment instead.
+SECRET_CONFIG_FIELDS = frozenset({"openai_api_key", "semantic_scholar_api_key", "perplexity_api_key"})
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class CheckpointStore:
+    """SQLite store of run checkpoints: the state after the last completed node,
+    the nodes completed so far, and per-claim results of the fan-out nodes."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " completed_nodes TEXT NOT NULL,"
+            " state TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS claim_progress ("
+            " run_id TEXT NOT NULL,"
+            " node TEXT NOT NULL,"
+            " cid TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, node, cid))"
+        )
+
+    def start_run(self, run_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, status, completed_nodes, created_at, updated_at)"
+                " VALUES (?, 'running', '[]', ?, ?)",
+                (run_id, now, now),
+            )
+            self._conn.execute("UPDATE runs SET status = 'running', updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def set_status(self, run_id: str, status: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+            )
+
+    def save_node(self, run_id: str, node: str, state_json: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT completed_nodes FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            completed = json.loads(row[0]) if row else []
+            if node not in completed:
+                completed.append(node)
+            # One transaction, so the node list and the state always match.
+            self._conn.execute(
+                "INSERT INTO runs (run_id, status, completed_nodes, state, created_at, updated_at)"
+                " VALUES (?, 'running', ?, ?, ?, ?)"
+                " ON CONFLICT(run_id) DO UPDATE SET completed_nodes = excluded.completed_nodes,"
+                " state = excluded.state, updated_at = excluded.updated_at",
+                (run_id, json.dumps(completed), state_json, time.time(), time.time()),
+            )
+
+    def load(self, run_id: str) -> Optional[Tuple[List[str], Optional[str], str]]:
+        """(completed nodes, state JSON, status) of a run, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completed_nodes, state, status FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def completed_nodes(self, run_id: str) -> List[str]:
+        loaded = self.load(run_id)
+        return loaded[0] if loaded else []
+
+    def get_claim(self, run_id: str, node: str, cid: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM claim_progress WHERE run_id = ? AND node = ? AND cid = ?", (run_id, node, cid)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_claim(self, run_id: str, node: str, cid: str, payload: Any) -> None:
+        data = json.dumps(payload, ensure_ascii=True, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO claim_progress (run_id, node, cid, payload) VALUES (?, ?, ?, ?)",
+                (run_id, node, cid, data),
+            )
+
+    def delete_run(self, run_id: str) -> None:
+        """Drop a finished run; only interrupted runs are kept for --resume."""
+        with self._lock:
+            self._conn.execute("DELETE FROM claim_progress WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_stores: Dict[str, CheckpointStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_checkpoint_store(path: str) -> CheckpointStore:
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = CheckpointStore(path)
+        return store
+
+
+def close_checkpoint_stores() -> None:
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+def _store_for(config: Any) -> Optional[CheckpointStore]:
+    if not getattr(config, "run_id", None):
+        return None
+    return get_checkpoint_store(config.checkpoint_path)
+
+
+def dump_state(state: Any) -> str:
+    return state.model_dump_json(exclude={"config": set(SECRET_CONFIG_FIELDS)})
+
+
+def claim_checkpoint(config: Any, node: str, cid: str) -> Optional[Any]:
+    """Result a fan-out node recorded for a claim earlier in this run, if any."""
+    store = _store_for(config)
+    return store.get_claim(config.run_id, node, cid) if store else None
+
+
+def record_claim(config: Any, node: str, cid: str, payload: Any) -> None:
+    """Record a claim's finished result so a resumed run can skip it."""
+    store = _store_for(config)
+    if store:
+        store.set_claim(config.run_id, node, cid, payload)
+
+
+def checkpointed_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a graph node (sync or async) to save the state after it and skip it on resume.
+
+    Does nothing unless `state.config.run_id` is set.
+    """
+
+    def skip(state: Any) -> bool:
+        store = _store_for(state.config)
+        if store and name in store.completed_nodes(state.config.run_id):
+            logger.info("[checkpoint] Skipping %s, completed before the resume", name)
+            return True
+        return False
+
+    def save(state: Any) -> None:
+        store = _store_for(state.config)
+        if store:
+            store.save_node(state.config.run_id, name, dump_state(state))
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def arun(state: Any) -> Any:
+            if skip(state):
+                return state
+            state = await fn(state)
+            save(state)
+            return state
+
+        return arun
+
+    @functools.wraps(fn)
+    def run(state: Any) -> Any:
+        if skip(state):
+            return state
+        state = fn(state)
+        save(state)
+        return state
+
+    return run
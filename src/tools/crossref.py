@@ -1,53 +1,141 @@
 from __future__ import annotations
 
-import time
 from typing import Optional
 
 import httpx
 
-from .caching import cache_get, cache_set
+from .caching import acache_get_or_fetch, cache_get_or_fetch, cache_set
+from .http_pool import arequest_with_retry, get_async_http_client, get_http_client, request_with_retry
+from .rate_limit import get_rate_limiter
 
 
-class CrossrefClient:
-    def __init__(self, base_url: str, cache_dir: str) -> None:
+class _CrossrefBase:
+    def __init__(self, base_url: str, cache_dir: str, mailto: Optional[str] = None) -> None:
         self.base_url = base_url.rstrip("/")
         self.cache_dir = cache_dir
+        self.mailto = mailto
+        # Crossref routes requests that identify a contact address to its
+        # "polite" pool, which allows a higher request rate.
+        self.limiter = get_rate_limiter("crossref_polite" if mailto else "crossref")
+
+    def _headers(self) -> dict:
+        agent = "auto-citation-agent/0.1"
+        if self.mailto:
+            agent = f"{agent} (mailto:{self.mailto})"
+        return {"User-Agent": agent}
+
+    def _json_key(self, url: str, params: Optional[dict]) -> str:
+        return f"crossref:{url}:{sorted((params or {}).items())}"
+
+    @staticmethod
+    def _bibtex_key(doi: str) -> str:
+        return f"crossref:bibtex:{doi}"
+
+    def _bibtex_url(self, doi: str) -> str:
+        return f"{self.base_url}/works/{doi}/transform/application/x-bibtex"
+
+    @staticmethod
+    def _bibtex_text(resp: httpx.Response) -> str:
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError:
+            if resp.status_code == 404:
+                return ""
+            raise
+        return resp.text
+
+
+class CrossrefClient(_CrossrefBase):
+    def __init__(
+        self,
+        base_url: str,
+        cache_dir: str,
+        http_client: Optional[httpx.Client] = None,
+        mailto: Optional[str] = None,
+    ) -> None:
+        super().__init__(base_url, cache_dir, mailto)
+        self.http = http_client or get_http_client("crossref")
 
     def _get_json(self, path: str, params: Optional[dict] = None) -> dict:
         url = f"{self.base_url}{path}"
-        key = f"crossref:{url}:{sorted((params or {}).items())}"
-        cached = cache_get(self.cache_dir, key)
-        if cached is not None:
-            return cached
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.get(url, params=params)
+        key = self._json_key(url, params)
+
+        def _fetch() -> dict:
+            resp = request_with_retry(
+                self.http, "GET", url, "crossref", self.limiter, params=params, headers=self._headers()
+            )
             resp.raise_for_status()
             data = resp.json()
-        cache_set(self.cache_dir, key, data)
-        time.sleep(0.2)
-        return data
+            cache_set(self.cache_dir, key, data)
+            return data
+
+        return cache_get_or_fetch(self.cache_dir, key, _fetch)
 
     def lookup_by_doi(self, doi: str) -> dict:
         return self._get_json(f"/works/{doi}")
 
     def bibtex_from_doi(self, doi: str) -> str:
-        url = f"{self.base_url}/works/{doi}/transform/application/x-bibtex"
-        key = f"crossref:bibtex:{doi}"
-        cached = cache_get(self.cache_dir, key)
-        if cached is not None:
-            return cached
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.get(url)
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError:
-                if resp.status_code == 404:
-                    return ""
-                raise
-            text = resp.text
-        cache_set(self.cache_dir, key, text)
-        time.sleep(0.2)
-        return text
+        key = self._bibtex_key(doi)
+
+        def _fetch() -> str:
+            resp = request_with_retry(
+                self.http, "GET", self._bibtex_url(doi), "crossref", self.limiter, headers=self._headers()
+            )
+            text = self._bibtex_text(resp)
+            if text:
+                cache_set(self.cache_dir, key, text)
+            return text
+
+        return cache_get_or_fetch(self.cache_dir, key, _fetch)
 
     def search_title(self, title: str, rows: int = 3) -> dict:
         return self._get_json("/works", params={"query.title": title, "rows": rows})
+
+
+class AsyncCrossrefClient(_CrossrefBase):
+    """asyncio counterpart of `CrossrefClient` sharing its cache keys."""
+
+    def __init__(
+        self,
+        base_url: str,
+        cache_dir: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        mailto: Optional[str] = None,
+    ) -> None:
+        super().__init__(base_url, cache_dir, mailto)
+        self.http = http_client or get_async_http_client("crossref")
+
+    async def _get_json(self, path: str, params: Optional[dict] = None) -> dict:
+        url = f"{self.base_url}{path}"
+        key = self._json_key(url, params)
+
+        async def _fetch() -> dict:
+            resp = await arequest_with_retry(
+                self.http, "GET", url, "crossref", self.limiter, params=params, headers=self._headers()
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            cache_set(self.cache_dir, key, data)
+            return data
+
+        return await acache_get_or_fetch(self.cache_dir, key, _fetch)
+
+    async def lookup_by_doi(self, doi: str) -> dict:
+        return await self._get_json(f"/works/{doi}")
+
+    async def bibtex_from_doi(self, doi: str) -> str:
+        key = self._bibtex_key(doi)
+
+        async def _fetch() -> str:
+            resp = await arequest_with_retry(
+                self.http, "GET", self._bibtex_url(doi), "crossref", self.limiter, headers=self._headers()
+            )
+            text = self._bibtex_text(resp)
+            if text:
+                cache_set(self.cache_dir, key, text)
+            return text
+
+        return await acache_get_or_fetch(self.cache_dir, key, _fetch)
+
+    async def search_title(self, title: str, rows: int = 3) -> dict:
+        return await self._get_json("/works", params={"query.title": title, "rows": rows})
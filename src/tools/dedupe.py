@@ -8,6 +8,11 @@ from ..graph.state import PaperCandidate
 from .text_utils import normalize_title
 
 
+def paper_key(paper: PaperCandidate) -> str:
+    """Identity of a candidate across claims: S2 id, else DOI, else normalized title."""
+    return paper.paper_id or (paper.doi or "").lower() or normalize_title(paper.title or "")
+
+
 def _better(a: PaperCandidate, b: PaperCandidate) -> PaperCandidate:
     score_a = int(bool(a.abstract)) + int(bool(a.doi)) + int(a.citation_count or 0 > 0)
     score_b = int(bool(b.abstract)) + int(bool(b.doi)) + int(b.citation_count or 0 > 0)
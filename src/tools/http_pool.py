@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from .logger import get_logger
+from .metrics import record_http_request
+from .rate_limit import TokenBucket, get_backend_semaphore
+
+logger = get_logger(__name__)
+
+_settings: Dict[str, Any] = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "http2": False,
+    "timeout": 30.0,
+    "max_retries": 4,
+    "backoff_base": 1.0,
+    "backoff_max": 30.0,
+}
+_clients: Dict[str, httpx.Client] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def configure_http(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = False,
+    timeout: float = 30.0,
+    max_retries: int = 4,
+    backoff_base: float = 1.0,
+    backoff_max: float = 30.0,
+) -> None:
+    """Set pool and retry options for backend clients. Open clients are closed."""
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    close_http_clients()
+    _settings.update(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2,
+        timeout=timeout,
+        max_retries=max_retries,
+        backoff_base=backoff_base,
+        backoff_max=backoff_max,
+    )
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_settings["max_connections"],
+        max_keepalive_connections=_settings["max_keepalive_connections"],
+        keepalive_expiry=_settings["keepalive_expiry"],
+    )
+
+
+def get_http_client(name: str) -> httpx.Client:
+    """Return the shared, pooled client for a backend (e.g. "s2", "crossref").
+
+    httpx.Client is thread-safe, so one instance per backend is shared by all
+    worker threads and keeps connections alive between requests.
+    """
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = httpx.Client(timeout=_settings["timeout"], http2=_settings["http2"], limits=_limits())
+            _clients[name] = client
+        return client
+
+
+def get_async_http_client(name: str) -> httpx.AsyncClient:
+    """Async counterpart of `get_http_client`, one pool per backend per event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        client = per_loop.get(name)
+        if client is None:
+            client = httpx.AsyncClient(timeout=_settings["timeout"], http2=_settings["http2"], limits=_limits())
+            per_loop[name] = client
+        return client
+
+
+async def aclose_http_clients() -> None:
+    """Close the async pools opened on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_async_clients.pop(loop, {}).values())
+    for client in clients:
+        await client.aclose()
+
+
+def close_http_clients() -> None:
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _record(backend: str, **deltas: float) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(
+            backend,
+            {"requests": 0, "retries": 0, "retry_wait_seconds": 0.0, "rate_limit_wait_seconds": 0.0},
+        )
+        for name, delta in deltas.items():
+            stats[name] += delta
+
+
+def http_stats() -> Dict[str, Dict[str, float]]:
+    """Per-backend request, retry and wait counters since process start."""
+    with _stats_lock:
+        return {
+            backend: {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+            for backend, stats in _stats.items()
+        }
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    ceiling = min(_settings["backoff_max"], _settings["backoff_base"] * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _retry_delay(resp: httpx.Response, attempt: int, limiter: Optional[TokenBucket]) -> float:
+    retry_after = _retry_after(resp)
+    # `Retry-After: 0` means retry now, not "no hint".
+    delay = _backoff(attempt) if retry_after is None else retry_after
+    delay = min(delay, _settings["backoff_max"] * 2)
+    # A retryable 4xx is the backend throttling us (429, or 403 for S2).
+    if resp.status_code < 500 and limiter is not None:
+        limiter.pause(delay)
+    return delay
+
+
+def request_with_retry(
+    client: httpx.Client,
+    method: str,
+    url: str,
+    backend: str,
+    limiter: Optional[TokenBucket] = None,
+    retry_statuses: Iterable[int] = RETRY_STATUSES,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send a request, retrying throttling, 5xx and transport errors.
+
+    Waits honour `Retry-After` when present and otherwise use jittered
+    exponential backoff. On a retried 4xx (throttling) the backend's rate
+    limiter is paused so other threads back off too instead of piling onto
+    the throttled API.
+    The final response is returned as-is; callers still `raise_for_status`.
+    """
+    retry_statuses = frozenset(retry_statuses)
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        if limiter is not None:
+            waited = limiter.acquire()
+            if waited:
+                _record(backend, rate_limit_wait_seconds=waited)
+        _record(backend, requests=1)
+        try:
+            resp = client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            if attempt >= _settings["max_retries"]:
+                record_http_request(time.perf_counter() - started, retries=attempt, error=True)
+                raise
+            delay = _backoff(attempt)
+            logger.debug("%s transport error (%s); retrying in %.1fs", backend, exc, delay)
+        else:
+            if resp.status_code not in retry_statuses or attempt >= _settings["max_retries"]:
+                record_http_request(time.perf_counter() - started, retries=attempt, error=resp.is_error)
+                return resp
+            delay = _retry_delay(resp, attempt, limiter)
+            logger.debug("%s returned %d; retrying in %.1fs", backend, resp.status_code, delay)
+        _record(backend, retries=1, retry_wait_seconds=delay)
+        time.sleep(delay)
+        attempt += 1
+
+
+async def arequest_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    backend: str,
+    limiter: Optional[TokenBucket] = None,
+    retry_statuses: Iterable[int] = RETRY_STATUSES,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Async `request_with_retry`; in-flight requests are capped per backend."""
+    retry_statuses = frozenset(retry_statuses)
+    semaphore = get_backend_semaphore(backend)
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        if limiter is not None:
+            waited = await limiter.aacquire()
+            if waited:
+                _record(backend, rate_limit_wait_seconds=waited)
+        _record(backend, requests=1)
+        try:
+            async with semaphore:
+                resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            if attempt >= _settings["max_retries"]:
+                record_http_request(time.perf_counter() - started, retries=attempt, error=True)
+                raise
+            delay = _backoff(attempt)
+            logger.debug("%s transport error (%s); retrying in %.1fs", backend, exc, delay)
+        else:
+            if resp.status_code not in retry_statuses or attempt >= _settings["max_retries"]:
+                record_http_request(time.perf_counter() - started, retries=attempt, error=resp.is_error)
+                return resp
+            delay = _retry_delay(resp, attempt, limiter)
+            logger.debug("%s returned %d; retrying in %.1fs", backend, resp.status_code, delay)
+        _record(backend, retries=1, retry_wait_seconds=delay)
+        await asyncio.sleep(delay)
+        attempt += 1
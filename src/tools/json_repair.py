@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Tuple
+
+_FENCE_RE = re.compile(r"^```[A-Za-z]*\s*|\s*```$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _close(prefix: str, stack: List[str]) -> str:
+    return prefix.rstrip().rstrip(",") + "".join(_CLOSERS[ch] for ch in reversed(stack))
+
+
+def _repair_candidates(text: str) -> List[str]:
+    """Scan the first JSON value in `text` and return repaired versions of it.
+
+    Drops trailing commas and anything after the value. If the value is cut
+    off, the first candidate closes the open string and brackets as they are,
+    and the rest cut back to each earlier element boundary, nearest first.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            out.append(ch)
+            if stack:
+                stack.pop()
+            if not stack:
+                return ["".join(out)]
+            continue
+        out.append(ch)
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            # Cutting here drops the whole nested container; the outermost
+            # one is kept empty instead.
+            cuts.append((len(out) - 1, list(stack)) if stack else (len(out), [ch]))
+            stack.append(ch)
+        elif ch == ",":
+            cuts.append((len(out) - 1, list(stack)))
+    prefix = "".join(out)
+    candidates = [_close(prefix + ('"' if in_string else ""), stack)]
+    candidates.extend(_close(prefix[:pos], cut_stack) for pos, cut_stack in reversed(cuts))
+    return candidates
+
+
+def loads_lenient(content: str) -> Tuple[Any, bool]:
+    """Parse an LLM reply as JSON, repairing it locally if needed.
+
+    Returns (value, repaired). Handles code fences, prose around the JSON,
+    trailing commas and replies truncated mid-array or mid-object. Raises
+    ValueError when no repair parses.
+    """
+    text = _FENCE_RE.sub("", (content or "").strip())
+    if not text:
+        raise ValueError("Empty LLM response")
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError as exc:
+        error = exc
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError(f"No JSON object in LLM response: {error}")
+    for candidate in _repair_candidates(text[min(starts) :]):
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+    raise ValueError(f"Could not repair JSON in LLM response: {error}")
@@ -1,73 +1,325 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import Any, Optional
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Type
 
-from openai import OpenAI
+import openai
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from ..graph.state import AgentConfig
+from .caching import cache_get, cache_set
+from .json_repair import loads_lenient
+from .llm_scheduler import get_llm_scheduler
+from .logger import get_logger
+from .metrics import record_json_outcome, record_llm_cache_hit, record_llm_call
+from .rate_limit import get_rate_limiter
+from .text_utils import estimate_tokens
 
-class LlmClient:
+logger = get_logger(__name__)
+
+LLM_CACHE_MODES = ("off", "read", "readwrite")
+
+# Transient failures worth resending the same request for. Malformed output
+# is not one of them: it is repaired locally or re-asked once in `chat_json`.
+_RETRYABLE = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+_retry_request = retry(
+    reraise=True,
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(_RETRYABLE),
+)
+
+_REASK_PROMPT = """Your previous reply could not be used: {error}
+
+Reply again with only the corrected JSON, matching this schema:
+{schema_hint}"""
+
+_shared: Dict[tuple, "LlmClient"] = {}
+_async_shared: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncLlmClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_shared_lock = threading.Lock()
+
+
+def stage_model(config: AgentConfig, stage: Optional[str] = None) -> str:
+    """Model for a pipeline stage: its `stage_models` entry, else `openai_model`."""
+    return config.stage_models.get(stage or "", "") or config.openai_model
+
+
+def _config_key(config: AgentConfig, model: str) -> tuple:
+    return (
+        config.openai_api_key,
+        config.openai_base_url,
+        model,
+        config.cache_dir,
+        config.llm_cache_mode,
+        config.openai_json_mode,
+    )
+
+
+class _LlmBase:
     def __init__(
         self,
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         model: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        cache_mode: str = "off",
+        temperature: float = 0.2,
+        json_mode: bool = True,
     ) -> None:
+        if cache_mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {cache_mode}")
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.zhizengzeng.com/v1")
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-5.2")
+        self.cache_dir = cache_dir
+        self.cache_mode = cache_mode if cache_dir else "off"
+        self.temperature = temperature
+        self.json_mode = json_mode
+        self.limiter = get_rate_limiter("openai")
+
+    @classmethod
+    def from_config(cls, config: AgentConfig, model: Optional[str] = None):
+        return cls(
+            api_key=config.openai_api_key,
+            base_url=config.openai_base_url,
+            model=model or config.openai_model,
+            cache_dir=config.cache_dir,
+            cache_mode=config.llm_cache_mode,
+            json_mode=config.openai_json_mode,
+        )
+
+    @staticmethod
+    def _estimate(messages: List[dict]) -> int:
+        return sum(estimate_tokens(m["content"]) for m in messages)
+
+    @staticmethod
+    def _usage(resp: Any) -> tuple[Optional[int], Optional[int]]:
+        usage = getattr(resp, "usage", None)
+        return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+
+    @staticmethod
+    def _record(started: float, resp: Any) -> Optional[int]:
+        """Record a finished request in the run metrics and return its total tokens."""
+        prompt_tokens, completion_tokens = _LlmBase._usage(resp)
+        record_llm_call(time.perf_counter() - started, prompt_tokens, completion_tokens)
+        if prompt_tokens is None and completion_tokens is None:
+            return None
+        return (prompt_tokens or 0) + (completion_tokens or 0)
+
+    def _cache_key(self, kind: str, system_prompt: str, user_prompt: str, schema_hint: str = "") -> str:
+        material = json.dumps(
+            [kind, self.base_url, self.model, system_prompt, user_prompt, schema_hint, self.temperature],
+            ensure_ascii=True,
+        )
+        return f"llm:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    def _cache_lookup(self, key: str) -> Optional[Any]:
+        if self.cache_mode == "off":
+            return None
+        cached = cache_get(self.cache_dir, key)
+        if cached is not None:
+            record_llm_cache_hit()
+        return cached
+
+    def _cache_store(self, key: str, value: Any) -> None:
+        if self.cache_mode == "readwrite":
+            cache_set(self.cache_dir, key, value)
+
+    def _messages(self, system_prompt: str, user_prompt: str) -> List[dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _request(self, messages: List[dict], json_mode: bool) -> Dict[str, Any]:
+        request: Dict[str, Any] = {"model": self.model, "messages": messages, "temperature": self.temperature}
+        if json_mode and self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _json_mode_rejected(self, exc: Exception, json_mode: bool) -> bool:
+        """Turn JSON mode off for this client if the endpoint refused it."""
+        if not (json_mode and self.json_mode and isinstance(exc, openai.BadRequestError)):
+            return False
+        if "response_format" not in str(exc) and "json" not in str(exc).lower():
+            return False
+        logger.warning("LLM endpoint rejected JSON mode for %s; falling back to plain replies: %s", self.model, exc)
+        self.json_mode = False
+        return True
+
+    @staticmethod
+    def _json_payload(schema_hint: str, user_prompt: str) -> str:
+        return f"{user_prompt}\n\nSchema hint:\n{schema_hint}"
+
+    @staticmethod
+    def _reask_messages(messages: List[dict], content: str, error: Exception, schema_hint: str) -> List[dict]:
+        return messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": _REASK_PROMPT.format(error=str(error)[:500], schema_hint=schema_hint)},
+        ]
+
+    @staticmethod
+    def _parse_json(content: str, schema: Optional[Type[BaseModel]]) -> Any:
+        """Parse (repairing locally if needed) and validate a JSON reply; raises ValueError."""
+        value, repaired = loads_lenient(content)
+        if repaired:
+            record_json_outcome("repaired")
+        if schema is None:
+            return value
+        return schema.model_validate(value).model_dump()
+
+
+class LlmClient(_LlmBase):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
         self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(4),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-    )
+    @classmethod
+    def shared(cls, config: AgentConfig, stage: Optional[str] = None, model: Optional[str] = None) -> "LlmClient":
+        """Process-wide client for `config` and the stage's model (or `model`),
+        so nodes reuse one connection pool."""
+        model = model or stage_model(config, stage)
+        key = _config_key(config, model)
+        with _shared_lock:
+            client = _shared.get(key)
+            if client is None:
+                client = _shared[key] = cls.from_config(config, model)
+            return client
+
+    @_retry_request
+    def _create(self, messages: List[dict], json_mode: bool = False) -> str:
+        scheduler = get_llm_scheduler()
+        estimate = self._estimate(messages)
+        self.limiter.acquire()
+        scheduler.acquire_tokens(estimate)
+        started = time.perf_counter()
+        try:
+            resp = self.client.chat.completions.create(**self._request(messages, json_mode))
+        except Exception as exc:
+            record_llm_call(time.perf_counter() - started, error=True)
+            if self._json_mode_rejected(exc, json_mode):
+                return self._create(messages)
+            raise
+        scheduler.record_usage(estimate, self._record(started, resp))
+        return resp.choices[0].message.content or ""
+
     def chat_text(self, system_prompt: str, user_prompt: str) -> str:
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-        )
+        key = self._cache_key("text", system_prompt, user_prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        text = self._create(self._messages(system_prompt, user_prompt))
+        self._cache_store(key, text)
+        return text
+
+    def chat_json(
+        self, schema_hint: str, system_prompt: str, user_prompt: str, schema: Optional[Type[BaseModel]] = None
+    ) -> Any:
+        """JSON reply validated against `schema` (returned as a plain dict) when given.
+
+        Malformed replies are repaired locally first; if that fails, the model
+        is asked once to correct its reply before the error is raised.
+        """
+        payload = self._json_payload(schema_hint, user_prompt)
+        key = self._cache_key("json", system_prompt, payload, schema_hint)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        messages = self._messages(system_prompt, payload)
+        content = self._create(messages, json_mode=True)
+        try:
+            result = self._parse_json(content, schema)
+        except ValueError as exc:
+            record_json_outcome("reasked")
+            content = self._create(self._reask_messages(messages, content, exc, schema_hint), json_mode=True)
+            try:
+                result = self._parse_json(content, schema)
+            except ValueError:
+                record_json_outcome("failed")
+                raise
+        self._cache_store(key, result)
+        return result
+
+
+class AsyncLlmClient(_LlmBase):
+    """asyncio counterpart of `LlmClient`; in-flight calls are capped by the LLM scheduler."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+
+    @classmethod
+    def shared(
+        cls, config: AgentConfig, stage: Optional[str] = None, model: Optional[str] = None
+    ) -> "AsyncLlmClient":
+        """Shared client for `config` and the stage's model on the running event loop."""
+        model = model or stage_model(config, stage)
+        with _shared_lock:
+            per_loop = _async_shared.setdefault(asyncio.get_running_loop(), {})
+            key = _config_key(config, model)
+            client = per_loop.get(key)
+            if client is None:
+                client = per_loop[key] = cls.from_config(config, model)
+            return client
+
+    @_retry_request
+    async def _create(self, messages: List[dict], json_mode: bool = False) -> str:
+        scheduler = get_llm_scheduler()
+        estimate = self._estimate(messages)
+        await self.limiter.aacquire()
+        await scheduler.aacquire_tokens(estimate)
+        async with scheduler.aslot():
+            started = time.perf_counter()
+            try:
+                resp = await self.client.chat.completions.create(**self._request(messages, json_mode))
+            except Exception as exc:
+                record_llm_call(time.perf_counter() - started, error=True)
+                if not self._json_mode_rejected(exc, json_mode):
+                    raise
+                resp = None
+        if resp is None:
+            return await self._create(messages)
+        scheduler.record_usage(estimate, self._record(started, resp))
         return resp.choices[0].message.content or ""
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(4),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-    )
-    def _extract_json(self, content: str) -> Any:
-        text = content.strip()
-        if not text:
-            raise ValueError("Empty LLM response")
+    async def chat_text(self, system_prompt: str, user_prompt: str) -> str:
+        key = self._cache_key("text", system_prompt, user_prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        text = await self._create(self._messages(system_prompt, user_prompt))
+        self._cache_store(key, text)
+        return text
+
+    async def chat_json(
+        self, schema_hint: str, system_prompt: str, user_prompt: str, schema: Optional[Type[BaseModel]] = None
+    ) -> Any:
+        payload = self._json_payload(schema_hint, user_prompt)
+        key = self._cache_key("json", system_prompt, payload, schema_hint)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        messages = self._messages(system_prompt, payload)
+        content = await self._create(messages, json_mode=True)
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            start = min([i for i in [text.find("{"), text.find("[")] if i != -1], default=-1)
-            end_obj = text.rfind("}")
-            end_arr = text.rfind("]")
-            end = max(end_obj, end_arr)
-            if start == -1 or end == -1 or end <= start:
+            result = self._parse_json(content, schema)
+        except ValueError as exc:
+            record_json_outcome("reasked")
+            content = await self._create(self._reask_messages(messages, content, exc, schema_hint), json_mode=True)
+            try:
+                result = self._parse_json(content, schema)
+            except ValueError:
+                record_json_outcome("failed")
                 raise
-            snippet = text[start : end + 1]
-            return json.loads(snippet)
-
-    def chat_json(self, schema_hint: str, system_prompt: str, user_prompt: str) -> Any:
-        payload = f"{user_prompt}\n\nSchema hint:\n{schema_hint}"
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": payload},
-            ],
-            temperature=0.2,
-        )
-        content = resp.choices[0].message.content or ""
-        return self._extract_json(content)
+        self._cache_store(key, result)
+        return result
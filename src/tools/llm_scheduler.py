@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .rate_limit import TokenBucket
+
+# Lower runs first. Stages further down the pipeline win so that work that is
+# already in progress drains before new work starts; anchor gates everything.
+STAGE_PRIORITIES: Dict[str, int] = {
+    "anchor": 0,
+    "rank_filter": 1,
+    "gen_queries": 2,
+    "needs_citation": 3,
+}
+_DEFAULT_PRIORITY = 5
+
+_current_stage: contextvars.ContextVar[str] = contextvars.ContextVar("llm_stage", default="")
+
+
+def current_stage() -> str:
+    return _current_stage.get()
+
+
+@contextlib.contextmanager
+def llm_stage(stage: str) -> Iterator[None]:
+    """Tag LLM calls made in this context (and tasks created from it) with a stage."""
+    token = _current_stage.set(stage)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def _priority(stage: str) -> int:
+    return STAGE_PRIORITIES.get(stage, _DEFAULT_PRIORITY)
+
+
+class _AsyncPrioritySlots:
+    """asyncio semaphore that hands free slots to the highest-priority waiter."""
+
+    def __init__(self, size: int) -> None:
+        self._free = size
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+
+class LlmScheduler:
+    """Process-wide governor for LLM traffic.
+
+    Synchronous nodes submit their LLM work items with `submit`; a fixed set
+    of worker threads (`max_in_flight`) runs them in stage-priority order.
+    Async clients take one of `max_in_flight` priority slots per event loop
+    around each request. Both paths share a tokens-per-minute budget.
+    """
+
+    def __init__(self, max_in_flight: int = 16, tokens_per_minute: int = 0) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.tokens_per_minute = tokens_per_minute
+        self._tokens = TokenBucket(tokens_per_minute / 60.0, capacity=max(1.0, float(tokens_per_minute)))
+        self._queue: List[tuple] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._closed = False
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncPrioritySlots]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"requests": {}, "tokens": 0, "token_wait_seconds": 0.0}
+
+    # -- synchronous work queue -------------------------------------------
+
+    def submit(self, stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue `fn(*args, **kwargs)` to run on a scheduler worker.
+
+        Work items must not wait on other submitted items, or the pool can
+        deadlock once every worker is blocked.
+        """
+        future: Future = Future()
+        ctx = contextvars.copy_context()
+        ctx.run(_current_stage.set, stage)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("LLM scheduler is shut down")
+            heapq.heappush(self._queue, (_priority(stage), next(self._seq), future, ctx, fn, args, kwargs))
+            self._ensure_workers_locked()
+            self._cond.notify()
+        return future
+
+    def _ensure_workers_locked(self) -> None:
+        while len(self._workers) < self.max_in_flight:
+            worker = threading.Thread(target=self._work, name=f"llm-worker-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, _, future, ctx, fn, args, kwargs = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = ctx.run(fn, *args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def shutdown(self) -> None:
+        """Let workers exit once the queue is drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # -- async slots --------------------------------------------------------
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = _AsyncPrioritySlots(self.max_in_flight)
+        await slots.acquire(_priority(current_stage()))
+        try:
+            yield
+        finally:
+            slots.release()
+
+    # -- token budget -------------------------------------------------------
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        wait = self._tokens.reserve(estimated_tokens)
+        stage = current_stage() or "other"
+        with self._stats_lock:
+            requests = self._stats["requests"]
+            requests[stage] = requests.get(stage, 0) + 1
+            self._stats["tokens"] += estimated_tokens
+            self._stats["token_wait_seconds"] += wait
+        return wait
+
+    def acquire_tokens(self, estimated_tokens: int) -> float:
+        """Take prompt tokens from the per-minute budget, sleeping if it is spent."""
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire_tokens(self, estimated_tokens: int) -> float:
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_usage(self, estimated_tokens: int, used_tokens: Optional[int]) -> None:
+        """Charge tokens used beyond the estimate; the debt delays later callers."""
+        if not used_tokens:
+            return
+        extra = used_tokens - estimated_tokens
+        with self._stats_lock:
+            self._stats["tokens"] += extra
+        if extra > 0:
+            self._tokens.reserve(extra)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests_by_stage": dict(self._stats["requests"]),
+                "tokens": self._stats["tokens"],
+                "token_wait_seconds": round(self._stats["token_wait_seconds"], 3),
+            }
+
+
+_scheduler: Optional[LlmScheduler] = None
+_lock = threading.Lock()
+
+
+def configure_llm_scheduler(max_in_flight: int = 16, tokens_per_minute: int = 0) -> None:
+    """Replace the process-wide scheduler; queued work on the old one still finishes."""
+    global _scheduler
+    with _lock:
+        if _scheduler is not None:
+            _scheduler.shutdown()
+        _scheduler = LlmScheduler(max_in_flight, tokens_per_minute)
+
+
+def get_llm_scheduler() -> LlmScheduler:
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = LlmScheduler()
+        return _scheduler
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from ..graph.state import GraphState
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Per-document record of a run's decisions, keyed by sentence hash, so an
+# incremental run only processes new or edited sentences. Bump the version
+# when the record layout changes; older manifests are then ignored.
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def sentence_hash(text: str) -> str:
+    """Hash of a sentence's text; only whitespace changes keep it the same."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def manifest_path(config: Any) -> str:
+    return os.path.join(config.output_dir, MANIFEST_NAME)
+
+
+def build_manifest(state: GraphState) -> Dict[str, Any]:
+    """Citation need, queries, selected papers and inserted keys per sentence hash.
+
+    Entries created by this run for the inserted keys are kept too, so a later
+    run can restore them when the `.bib` file was not updated in place.
+    """
+    needs = {n.sid: n for n in state.citation_needs}
+    claims = {c.sid: c for c in state.claims}
+    sentences: Dict[str, Dict[str, Any]] = {}
+    for sentence in state.sentences:
+        need = needs.get(sentence.sid)
+        if need is None:
+            continue
+        record: Dict[str, Any] = {"need": need.model_dump(exclude={"sid"})}
+        claim = claims.get(sentence.sid)
+        selected = state.selected_by_claim.get(claim.cid) if claim else None
+        if selected is not None:
+            keys = state.inserted_keys.get(sentence.sid, [])
+            record.update(
+                queries=[q.model_dump(exclude={"cid"}) for q in state.queries_by_claim.get(claim.cid, [])],
+                selected=selected.model_dump(exclude={"cid"}),
+                keys=keys,
+                entries=[state.new_bib_entries[k].model_dump() for k in keys if k in state.new_bib_entries],
+            )
+        sentences[sentence_hash(sentence.text)] = record
+    return {"version": MANIFEST_VERSION, "input": state.config.input_path, "sentences": sentences}
+
+
+def write_manifest(state: GraphState) -> str:
+    path = manifest_path(state.config)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(build_manifest(state), f, ensure_ascii=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_manifest(config: Any) -> Optional[Dict[str, Any]]:
+    """The previous run's manifest for this document, or None if there is no usable one."""
+    path = manifest_path(config)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logger.info("[manifest] No manifest at %s; processing every sentence", path)
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("[manifest] Ignoring unreadable manifest %s: %s", path, exc)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning("[manifest] Ignoring manifest %s with version %s", path, manifest.get("version"))
+        return None
+    if config.input_path and manifest.get("input") and (
+        os.path.abspath(manifest["input"]) != os.path.abspath(config.input_path)
+    ):
+        logger.warning("[manifest] Ignoring manifest %s written for %s", path, manifest["input"])
+        return None
+    return manifest
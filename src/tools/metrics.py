@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+METRICS_SCHEMA_VERSION = 1
+
+_run: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_run", default="")
+_node: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_node", default="")
+_claim: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_claim", default="")
+
+_COUNTERS = (
+    "llm_calls",
+    "llm_cache_hits",
+    "llm_errors",
+    "prompt_tokens",
+    "completion_tokens",
+    "llm_seconds",
+    "json_repaired",
+    "json_reasked",
+    "json_failed",
+    "cascade_checked",
+    "cascade_escalated",
+    "score_cache_hits",
+    "score_cache_misses",
+    "http_requests",
+    "http_retries",
+    "http_errors",
+    "http_seconds",
+    "cache_hits",
+    "cache_misses",
+    "cache_coalesced",
+)
+
+_CACHE_COUNTERS = {"hit": "cache_hits", "miss": "cache_misses", "coalesced": "cache_coalesced"}
+
+_lock = threading.Lock()
+_prices: Dict[str, float] = {"prompt_per_1k": 0.0, "completion_per_1k": 0.0}
+
+
+def configure_metrics(prompt_price_per_1k: float = 0.0, completion_price_per_1k: float = 0.0) -> None:
+    """Set LLM prices (per 1k tokens) used to estimate run cost."""
+    _prices.update(prompt_per_1k=prompt_price_per_1k, completion_per_1k=completion_price_per_1k)
+
+
+class _RunMetrics:
+    """Counters of one run (one document); batch and server modes keep several apart."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self.claims: Dict[str, Dict[str, float]] = {}
+        self.node_seconds: Dict[str, float] = {}
+
+
+_runs: Dict[str, _RunMetrics] = {}
+
+
+def _current() -> _RunMetrics:
+    # Callers hold _lock.
+    run = _run.get()
+    metrics = _runs.get(run)
+    if metrics is None:
+        metrics = _runs[run] = _RunMetrics()
+    return metrics
+
+
+def reset_metrics() -> None:
+    """Drop the counters of the current run."""
+    with _lock:
+        _runs.pop(_run.get(), None)
+
+
+@contextlib.contextmanager
+def run_scope(name: str) -> Iterator[None]:
+    """Count calls made in this context as a separate run, so concurrent documents get their own metrics."""
+    token = _run.set(name)
+    try:
+        yield
+    finally:
+        _run.reset(token)
+
+
+def in_run_scope() -> bool:
+    """Whether calls are counted under a `run_scope`, i.e. the process may be running other documents too."""
+    return bool(_run.get())
+
+
+@contextlib.contextmanager
+def node_scope(name: str, timed: bool = True) -> Iterator[None]:
+    """Attribute calls made in this context to a graph node and time the node.
+
+    Pass `timed=False` for work that overlaps other nodes and is already
+    timed by an enclosing scope, so wall time is not counted twice.
+    """
+    token = _node.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _node.reset(token)
+        if timed:
+            with _lock:
+                node_seconds = _current().node_seconds
+                node_seconds[name] = node_seconds.get(name, 0.0) + elapsed
+
+
+@contextlib.contextmanager
+def claim_scope(cid: str) -> Iterator[None]:
+    """Attribute calls made in this context to a claim."""
+    token = _claim.set(cid)
+    try:
+        yield
+    finally:
+        _claim.reset(token)
+
+
+def in_current_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap `fn` for a thread pool so each call sees the caller's node/claim tags."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def metered_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a graph node (sync or async) in `node_scope`."""
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def arun(state: Any) -> Any:
+            with node_scope(name):
+                return await fn(state)
+
+        return arun
+
+    @functools.wraps(fn)
+    def run(state: Any) -> Any:
+        with node_scope(name):
+            return fn(state)
+
+    return run
+
+
+def _add(**deltas: float) -> None:
+    node = _node.get() or "other"
+    claim = _claim.get()
+    with _lock:
+        metrics = _current()
+        targets = [metrics.nodes.setdefault(node, dict.fromkeys(_COUNTERS, 0))]
+        if claim:
+            targets.append(metrics.claims.setdefault(claim, dict.fromkeys(_COUNTERS, 0)))
+        for bucket in targets:
+            for name, delta in deltas.items():
+                bucket[name] += delta
+
+
+def record_llm_call(
+    seconds: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    error: bool = False,
+) -> None:
+    _add(
+        llm_calls=1,
+        llm_errors=int(error),
+        llm_seconds=seconds,
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+    )
+
+
+def record_llm_cache_hit() -> None:
+    _add(llm_cache_hits=1)
+
+
+def record_json_outcome(outcome: str) -> None:
+    """Record a JSON reply that was "repaired" locally, "reasked" or "failed" for good."""
+    _add(**{f"json_{outcome}": 1})
+
+
+def record_cascade(checked: int, escalated: int) -> None:
+    """Record items judged by the cascade's cheap model and how many were escalated."""
+    _add(cascade_checked=checked, cascade_escalated=escalated)
+
+
+def record_score_cache(hits: int, misses: int) -> None:
+    """Record claim-paper score lookups answered from the persistent score cache."""
+    _add(score_cache_hits=hits, score_cache_misses=misses)
+
+
+def record_http_request(seconds: float, retries: int = 0, error: bool = False) -> None:
+    _add(http_requests=1, http_retries=retries, http_errors=int(error), http_seconds=seconds)
+
+
+def record_cache(status: str) -> None:
+    """Record a backend cache lookup: "hit", "miss" or "coalesced"."""
+    _add(**{_CACHE_COUNTERS[status]: 1})
+
+
+def _finish(bucket: Dict[str, float]) -> Dict[str, float]:
+    out = {name: round(value, 3) if isinstance(value, float) else value for name, value in bucket.items()}
+    cost = (
+        bucket["prompt_tokens"] / 1000 * _prices["prompt_per_1k"]
+        + bucket["completion_tokens"] / 1000 * _prices["completion_per_1k"]
+    )
+    out["cost_usd"] = round(cost, 6)
+    return out
+
+
+def metrics_summary() -> Dict[str, Any]:
+    """Per-node and per-claim latency, token, retry and cache totals of the current run since its last reset."""
+    with _lock:
+        metrics = _current()
+        nodes = {name: dict(bucket) for name, bucket in metrics.nodes.items()}
+        claims = {cid: dict(bucket) for cid, bucket in metrics.claims.items()}
+        node_seconds = dict(metrics.node_seconds)
+    totals = dict.fromkeys(_COUNTERS, 0)
+    for bucket in nodes.values():
+        for name in _COUNTERS:
+            totals[name] += bucket[name]
+    node_summary = {}
+    for name in sorted(set(nodes) | set(node_seconds)):
+        summary = _finish(nodes.get(name, dict.fromkeys(_COUNTERS, 0)))
+        summary["wall_seconds"] = round(node_seconds.get(name, 0.0), 3)
+        node_summary[name] = summary
+    totals_summary = _finish(totals)
+    totals_summary["wall_seconds"] = round(sum(node_seconds.values()), 3)
+    return {
+        "schema_version": METRICS_SCHEMA_VERSION,
+        "totals": totals_summary,
+        "nodes": node_summary,
+        "claims": {cid: _finish(bucket) for cid, bucket in sorted(claims.items())},
+    }
@@ -5,15 +5,18 @@ from typing import List, Optional
 import httpx
 
 from ..graph.state import PaperCandidate
-from .caching import cache_get, cache_set
+from .caching import acache_get_or_fetch, cache_get_or_fetch, cache_set
+from .http_pool import arequest_with_retry, get_async_http_client, get_http_client, request_with_retry
+from .rate_limit import get_rate_limiter
 
 
-class PerplexityClient:
+class _PerplexityBase:
     def __init__(self, api_key: Optional[str], base_url: str, model: str, cache_dir: str) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.cache_dir = cache_dir
+        self.limiter = get_rate_limiter("perplexity")
 
     def _headers(self) -> dict:
         return {
@@ -22,22 +25,22 @@ class PerplexityClient:
             "Content-Type": "application/json",
         }
 
-    def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
-        payload = {
+    @staticmethod
+    def _payload(query: str, limit: int) -> dict:
+        return {
             "query": query,
             "max_results": max(1, min(20, limit)),
             "max_tokens_per_page": 512,
         }
-        key = f"pplx:search:{query}:{limit}"
-        cached = cache_get(self.cache_dir, key)
-        if cached is None:
-            with httpx.Client(timeout=30.0) as client:
-                resp = client.post(f"{self.base_url}/search", json=payload, headers=self._headers())
-                resp.raise_for_status()
-                cached = resp.json()
-            cache_set(self.cache_dir, key, cached)
+
+    @staticmethod
+    def _cache_key(query: str, limit: int) -> str:
+        return f"pplx:search:{query}:{limit}"
+
+    @staticmethod
+    def _parse_results(data: dict, limit: int) -> List[PaperCandidate]:
         results: List[PaperCandidate] = []
-        for item in cached.get("results", [])[:limit]:
+        for item in data.get("results", [])[:limit]:
             results.append(
                 PaperCandidate(
                     title=item.get("title"),
@@ -52,3 +55,71 @@ class PerplexityClient:
                 )
             )
         return results
+
+
+class PerplexityClient(_PerplexityBase):
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        model: str,
+        cache_dir: str,
+        http_client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__(api_key, base_url, model, cache_dir)
+        self.http = http_client or get_http_client("perplexity")
+
+    def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
+        key = self._cache_key(query, limit)
+
+        def _fetch() -> dict:
+            resp = request_with_retry(
+                self.http,
+                "POST",
+                f"{self.base_url}/search",
+                "perplexity",
+                self.limiter,
+                json=self._payload(query, limit),
+                headers=self._headers(),
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            cache_set(self.cache_dir, key, data)
+            return data
+
+        return self._parse_results(cache_get_or_fetch(self.cache_dir, key, _fetch), limit)
+
+
+class AsyncPerplexityClient(_PerplexityBase):
+    """asyncio counterpart of `PerplexityClient` sharing its cache keys."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        model: str,
+        cache_dir: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        super().__init__(api_key, base_url, model, cache_dir)
+        self.http = http_client or get_async_http_client("perplexity")
+
+    async def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
+        key = self._cache_key(query, limit)
+
+        async def _fetch() -> dict:
+            resp = await arequest_with_retry(
+                self.http,
+                "POST",
+                f"{self.base_url}/search",
+                "perplexity",
+                self.limiter,
+                json=self._payload(query, limit),
+                headers=self._headers(),
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            cache_set(self.cache_dir, key, data)
+            return data
+
+        return self._parse_results(await acache_get_or_fetch(self.cache_dir, key, _fetch), limit)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .latex_utils import sentence_has_any_cite
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# LaTeX that carries no citable prose: structure, floats, cross-references
+# and math. Whatever is left after stripping these is counted as words.
+_STRUCTURE_RE = re.compile(
+    r"\\(?:part|chapter|section|subsection|subsubsection|paragraph|subparagraph)\*?\s*(?:\[[^\]]*\])?\s*\{[^}]*\}"
+    r"|\\(?:begin|end)\s*\{[^}]*\}(?:\s*\[[^\]]*\])?"
+    r"|\\(?:label|ref|eqref|autoref|cref|Cref|pageref|includegraphics|input|include)\s*(?:\[[^\]]*\])?\s*\{[^}]*\}"
+    r"|\\(?:centering|hline|toprule|midrule|bottomrule|maketitle|noindent|item)\b"
+)
+_MATH_RE = re.compile(r"\$\$.*?\$\$|\$[^$]*\$|\\\[.*?\\\]|\\\(.*?\\\)", re.DOTALL)
+_WORD_RE = re.compile(r"[A-Za-z]{2,}")
+_SELF_REFERENCE_RE = re.compile(
+    r"^\s*(?:in\s+this\s+(?:paper|work|article|section|chapter)\s*,?\s+we\b"
+    r"|the\s+(?:rest|remainder)\s+of\s+(?:this|the)\s+(?:paper|article|chapter)\b"
+    r"|this\s+(?:paper|article|chapter)\s+is\s+(?:organized|structured)\b"
+    r"|(?:see\s+)?(?:section|sec\.|chapter|figure|fig\.|table|appendix)\s*~?\\ref\b)",
+    re.IGNORECASE,
+)
+_TOKEN_RE = re.compile(r"\\[A-Za-z]+|[a-z]+")
+
+DEFAULT_THRESHOLD = 0.95
+
+
+def rule_reason(text: str) -> Optional[str]:
+    """Return why a sentence plainly needs no citation, or None if unsure."""
+    if _SELF_REFERENCE_RE.search(text):
+        return "self-reference or roadmap"
+    prose = _MATH_RE.sub(" ", _STRUCTURE_RE.sub(" ", text))
+    # Only drop fragments with no prose left at all: a few words next to
+    # inline math or numbers ("GPT-3 has $175$B parameters.") are often the
+    # claims that most need a citation.
+    if not _WORD_RE.search(prose):
+        return "heading, float, label or equation"
+    return None
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class NoCiteModel:
+    """Multinomial naive Bayes over words and LaTeX commands, trained on past
+    needs-citation decisions from report.json files."""
+
+    def __init__(self, class_counts: Dict[str, int], token_counts: Dict[str, Dict[str, int]]) -> None:
+        self.class_counts = class_counts
+        self.token_counts = token_counts
+        vocab = set(token_counts.get("cite", {})) | set(token_counts.get("no_cite", {}))
+        total = sum(class_counts.values())
+        self._log_prior: Dict[str, float] = {}
+        self._log_unseen: Dict[str, float] = {}
+        self._log_likelihood: Dict[str, Dict[str, float]] = {}
+        for label in ("cite", "no_cite"):
+            counts = token_counts.get(label, {})
+            denom = sum(counts.values()) + len(vocab) + 1
+            self._log_prior[label] = math.log((class_counts.get(label, 0) + 1) / (total + 2))
+            self._log_unseen[label] = math.log(1 / denom)
+            self._log_likelihood[label] = {tok: math.log((n + 1) / denom) for tok, n in counts.items()}
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, bool]]) -> "NoCiteModel":
+        class_counts: Counter = Counter()
+        token_counts: Dict[str, Counter] = {"cite": Counter(), "no_cite": Counter()}
+        for text, needs in examples:
+            label = "cite" if needs else "no_cite"
+            class_counts[label] += 1
+            token_counts[label].update(_tokens(text))
+        return cls(dict(class_counts), {label: dict(c) for label, c in token_counts.items()})
+
+    def prob_no_cite(self, text: str) -> float:
+        scores = {}
+        for label in ("cite", "no_cite"):
+            table = self._log_likelihood[label]
+            unseen = self._log_unseen[label]
+            scores[label] = self._log_prior[label] + sum(table.get(tok, unseen) for tok in _tokens(text))
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        return exp["no_cite"] / sum(exp.values())
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"class_counts": self.class_counts, "token_counts": self.token_counts}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "NoCiteModel":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["class_counts"], data["token_counts"])
+
+
+class SentencePrefilter:
+    """Marks confident no-cite sentences so they can skip the LLM pass.
+
+    Sentences that already contain a citation are always left to the LLM,
+    which decides whether more citations are needed.
+    """
+
+    def __init__(self, model: Optional[NoCiteModel] = None, threshold: float = DEFAULT_THRESHOLD) -> None:
+        self.model = model
+        self.threshold = threshold
+
+    @classmethod
+    def from_config(cls, config) -> Optional["SentencePrefilter"]:
+        if not config.enable_prefilter:
+            return None
+        model = None
+        if config.prefilter_model_path:
+            try:
+                model = NoCiteModel.load(config.prefilter_model_path)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Could not load pre-filter model %s: %s", config.prefilter_model_path, exc)
+        return cls(model, config.prefilter_threshold)
+
+    def check(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return ("rule" | "model", reason) for a confident no-cite sentence."""
+        if sentence_has_any_cite(text):
+            return None
+        reason = rule_reason(text)
+        if reason:
+            return "rule", reason
+        if self.model is not None:
+            prob = self.model.prob_no_cite(text)
+            if prob >= self.threshold:
+                return "model", f"p(no_cite)={prob:.2f}"
+        return None
+
+
+def examples_from_reports(paths: Iterable[str]) -> List[Tuple[str, bool]]:
+    """Collect (sentence, needs_citation) pairs decided by the LLM in past runs."""
+    examples: List[Tuple[str, bool]] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        for item in report.get("sentence_decisions", []):
+            if item.get("source", "llm") == "llm" and item.get("text"):
+                examples.append((item["text"], bool(item.get("needs"))))
+    return examples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the needs-citation pre-filter model.")
+    parser.add_argument("reports", nargs="+", help="report.json files from previous runs")
+    parser.add_argument("--output", required=True, help="Where to write the model JSON")
+    args = parser.parse_args()
+
+    examples = examples_from_reports(args.reports)
+    if not examples:
+        raise SystemExit("No sentence decisions found in the given reports")
+    NoCiteModel.train(examples).save(args.output)
+    no_cite = sum(1 for _, needs in examples if not needs)
+    print(f"Trained on {len(examples)} sentences ({no_cite} no-cite); wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
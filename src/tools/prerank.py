@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence
+
+from ..graph.state import ClaimItem, PaperCandidate
+from .dedupe import paper_key
+
+_LATEX_COMMAND_RE = re.compile(r"\\[A-Za-z]+\*?(?:\{[^}]*\})?")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or our such that the their these this "
+    "those to was we were which with".split()
+)
+
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words, without LaTeX commands (and their first argument) or stopwords."""
+    text = _LATEX_COMMAND_RE.sub(" ", text or "").lower()
+    return [tok for tok in _WORD_RE.findall(text) if tok not in _STOPWORDS and len(tok) > 1]
+
+
+class Bm25Index:
+    """Okapi BM25 over a fixed set of documents."""
+
+    def __init__(self, documents: Sequence[List[str]]) -> None:
+        self.term_counts = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(documents)) if documents else 0.0
+        df: Counter = Counter()
+        for counts in self.term_counts:
+            df.update(counts.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def score(self, query: Iterable[str], doc: int) -> float:
+        counts = self.term_counts[doc]
+        norm = K1 * (1 - B + B * self.lengths[doc] / self.avg_length) if self.avg_length else K1
+        total = 0.0
+        for term in set(query):
+            tf = counts.get(term)
+            if tf:
+                total += self.idf[term] * tf * (K1 + 1) / (tf + norm)
+        return total
+
+
+def prerank_candidates(
+    claims: Sequence[ClaimItem],
+    candidates_by_claim: Dict[str, List[PaperCandidate]],
+    top_m: int,
+) -> Dict[str, List[PaperCandidate]]:
+    """Score every claim's candidates with BM25 and keep the best `top_m` per claim.
+
+    Claim text plus the claim's anchor terms is the query; title and abstract
+    are the document. Document frequencies come from the unique papers across
+    all claims, so a paper retrieved for every claim counts once. The score is
+    stored on `prerank_score`; `top_m <= 0` keeps every candidate (in ranked
+    order).
+    """
+    keys: Dict[str, int] = {}
+    documents: List[List[str]] = []
+    for candidates in candidates_by_claim.values():
+        for paper in candidates:
+            key = paper_key(paper)
+            if key not in keys:
+                keys[key] = len(documents)
+                documents.append(tokenize(f"{paper.title or ''} {paper.abstract or ''}"))
+    index = Bm25Index(documents)
+
+    ranked: Dict[str, List[PaperCandidate]] = {}
+    for claim in claims:
+        candidates = candidates_by_claim.get(claim.cid, [])
+        query = tokenize(" ".join([claim.text, *claim.anchor_tags]))
+        for paper in candidates:
+            paper.prerank_score = round(index.score(query, keys[paper_key(paper)]), 4)
+        # sorted() is stable, so ties keep the search order.
+        ordered = sorted(candidates, key=lambda p: p.prerank_score, reverse=True)
+        ranked[claim.cid] = ordered[:top_m] if top_m > 0 else ordered
+    return ranked
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import inspect
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Progress events for callers that watch a run as it goes (the server streams
+# them to its clients). A sink is set per run with `progress_scope`; the graph
+# nodes call `emit`, which does nothing when no sink is set. Sinks may be
+# called from worker threads.
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+_sink: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar("progress_sink", default=None)
+
+
+@contextlib.contextmanager
+def progress_scope(sink: ProgressSink) -> Iterator[None]:
+    """Send events emitted in this context (and thread pools started from it) to `sink`."""
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def emit(event: str, **fields: Any) -> None:
+    sink = _sink.get()
+    if sink is not None:
+        sink({"event": event, **fields})
+
+
+def emit_claim(stage: str, cid: str, **fields: Any) -> None:
+    """A claim finished a per-claim stage."""
+    emit("claim", stage=stage, cid=cid, **fields)
+
+
+def reported_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a graph node (sync or async) to emit `node` events when it starts and finishes."""
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def arun(state: Any) -> Any:
+            emit("node", node=name, status="started")
+            state = await fn(state)
+            emit("node", node=name, status="done")
+            return state
+
+        return arun
+
+    @functools.wraps(fn)
+    def run(state: Any) -> Any:
+        emit("node", node=name, status="started")
+        state = fn(state)
+        emit("node", node=name, status="done")
+        return state
+
+    return run
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+DEFAULT_RATE_LIMITS: Dict[str, float] = {
+    "s2": 1.0,
+    "s2_public": 0.3,
+    "crossref": 5.0,
+    "crossref_polite": 10.0,
+    "perplexity": 3.0,
+    "openai": 10.0,
+}
+
+DEFAULT_CONCURRENCY: Dict[str, int] = {
+    "s2": 4,
+    "crossref": 8,
+    "perplexity": 4,
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Callers reserve tokens up front (the balance may go negative) and then
+    sleep only for their own share of the deficit, so concurrent callers are
+    spaced out at `rate` per second instead of polling. A non-positive rate
+    disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` from the bucket and return how long to wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill_locked()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for at least `seconds`, e.g. after a 429."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill_locked()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_limits: Dict[str, float] = dict(DEFAULT_RATE_LIMITS)
+_buckets: Dict[str, TokenBucket] = {}
+_lock = threading.Lock()
+
+
+def configure_rate_limits(limits: Dict[str, float]) -> None:
+    """Set requests-per-second limits by backend name. Existing buckets are reset."""
+    with _lock:
+        _limits.update(limits)
+        _buckets.clear()
+
+
+def get_rate_limiter(name: str) -> TokenBucket:
+    """Return the process-wide bucket for a backend, shared by all threads."""
+    with _lock:
+        bucket = _buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(_limits.get(name, 0.0))
+            _buckets[name] = bucket
+        return bucket
+
+
+_concurrency: Dict[str, int] = dict(DEFAULT_CONCURRENCY)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def configure_concurrency(limits: Dict[str, int]) -> None:
+    """Set max in-flight requests per backend for async execution."""
+    with _lock:
+        _concurrency.update(limits)
+        _semaphores.clear()
+
+
+def get_backend_semaphore(name: str) -> asyncio.Semaphore:
+    """Return the semaphore capping in-flight requests to a backend on the running loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _semaphores.setdefault(loop, {})
+        semaphore = per_loop.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, _concurrency.get(name, 8)))
+            per_loop[name] = semaphore
+        return semaphore
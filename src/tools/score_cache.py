@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..graph.state import PaperCandidate
+from .caching import cache_get, cache_set
+from .dedupe import paper_key
+from .metrics import record_score_cache
+
+SCORE_CACHE_MODES = ("off", "read", "readwrite")
+SCORE_FIELDS = ("relevance", "support", "authority", "evidence_snippet", "why")
+
+_CITE_RE = re.compile(r"~?\\cite\w*\s*(?:\[[^\]]*\]\s*)*\{[^}]*\}")
+_SPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([.,;:!?])")
+
+
+def normalize_claim(text: str) -> str:
+    """Claim text as a cache identity: no cite commands, lowercased, single-spaced.
+
+    Adding a citation to a sentence or reflowing it does not change what the
+    papers are scored against, so it should not invalidate cached scores.
+    """
+    text = _SPACE_RE.sub(" ", _CITE_RE.sub(" ", text or ""))
+    return _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text).strip().lower()
+
+
+def score_key(claim_text: str, paper: PaperCandidate, model: str, prompt_version: str) -> str:
+    claim_hash = hashlib.sha256(normalize_claim(claim_text).encode("utf-8")).hexdigest()
+    material = json.dumps([claim_hash, paper_key(paper), model, prompt_version], ensure_ascii=True)
+    return f"score:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+
+class ScoreCache:
+    """Claim-paper LLM scores persisted in the cache store across runs.
+
+    Entries are keyed by the normalized claim text, the paper's identity, the
+    scoring model and the scorer prompt version, and hold the raw LLM scores
+    (before the authority heuristic and the evidence cap are applied).
+    """
+
+    def __init__(self, cache_dir: Optional[str], mode: str, model: str, prompt_version: str) -> None:
+        if mode not in SCORE_CACHE_MODES:
+            raise ValueError(f"Unknown score cache mode: {mode}")
+        self.cache_dir = cache_dir
+        self.mode = mode if cache_dir else "off"
+        self.model = model
+        self.prompt_version = prompt_version
+
+    def split(
+        self, claim_text: str, papers: Sequence[PaperCandidate]
+    ) -> Tuple[Tuple[List[PaperCandidate], List[dict]], List[PaperCandidate]]:
+        """Return ((cached papers, their scores), papers still to score).
+
+        The first item has the (batch, scores) shape `_apply_scores` takes.
+        """
+        if self.mode == "off":
+            return ([], []), list(papers)
+        hits: List[PaperCandidate] = []
+        scores: List[dict] = []
+        missing: List[PaperCandidate] = []
+        for paper in papers:
+            cached = cache_get(self.cache_dir, score_key(claim_text, paper, self.model, self.prompt_version))
+            if cached is None:
+                missing.append(paper)
+            else:
+                hits.append(paper)
+                scores.append(dict(cached, paper_id=paper_key(paper)))
+        record_score_cache(len(hits), len(missing))
+        return (hits, scores), missing
+
+    def store(self, claim_text: str, papers: Sequence[PaperCandidate], scores: List[dict]) -> None:
+        """Persist the scores a reply returned for `papers` (matched by `paper_key`)."""
+        if self.mode != "readwrite":
+            return
+        by_key: Dict[Optional[str], dict] = {s.get("paper_id"): s for s in scores}
+        for paper in papers:
+            score = by_key.get(paper_key(paper))
+            if score is not None:
+                value = {field: score.get(field) for field in SCORE_FIELDS}
+                cache_set(self.cache_dir, score_key(claim_text, paper, self.model, self.prompt_version), value)
@@ -1,23 +1,71 @@
 from __future__ import annotations
 
-import time
-from typing import List, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
 
 import httpx
 
 from ..graph.state import PaperCandidate
-from .caching import cache_get, cache_set
+from .caching import acache_get_or_fetch, cache_get, cache_get_or_fetch, cache_set
+from .http_pool import (
+    RETRY_STATUSES,
+    arequest_with_retry,
+    get_async_http_client,
+    get_http_client,
+    request_with_retry,
+)
 from .logger import get_logger
+from .metrics import in_current_context
+from .rate_limit import get_rate_limiter
 from .text_utils import normalize_title
 
 logger = get_logger(__name__)
 
+_PAPER_FIELDS = "title,authors,year,venue,abstract,url,externalIds,citationCount"
+# Maximum number of ids accepted by one /paper/batch request.
+BATCH_MAX_IDS = 500
+# Semantic Scholar throttles with 403 as well as 429, mostly without an API key.
+S2_RETRY_STATUSES = RETRY_STATUSES | {403}
 
-class SemanticScholarClient:
+
+def _paper_from_item(item: dict, seed_boost: float = 0.0) -> PaperCandidate:
+    external = item.get("externalIds") or {}
+    doi = external.get("DOI") if isinstance(external, dict) else None
+    return PaperCandidate(
+        paper_id=item.get("paperId"),
+        title=item.get("title"),
+        authors=[a.get("name") for a in item.get("authors") or [] if a.get("name")],
+        year=item.get("year"),
+        venue=item.get("venue"),
+        abstract=item.get("abstract"),
+        doi=doi,
+        url=item.get("url"),
+        citation_count=item.get("citationCount"),
+        source="s2",
+        seed_boost=seed_boost,
+    )
+
+
+def _best_title_match(title: str, data: List[PaperCandidate]) -> Optional[PaperCandidate]:
+    norm = normalize_title(title)
+    best = None
+    for cand in data:
+        if not cand.title:
+            continue
+        if normalize_title(cand.title) == norm:
+            return cand
+        if best is None:
+            best = cand
+    return best
+
+
+class _SemanticScholarBase:
     def __init__(self, base_url: str, api_key: Optional[str], cache_dir: str) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.cache_dir = cache_dir
+        self.limiter = get_rate_limiter("s2" if api_key else "s2_public")
 
     def _headers(self) -> dict:
         headers = {"User-Agent": "auto-citation-agent/0.1"}
@@ -25,78 +73,151 @@ class SemanticScholarClient:
             headers["x-api-key"] = self.api_key
         return headers
 
+    def _cache_key(self, url: str, params: dict) -> str:
+        return f"s2:{url}:{sorted(params.items())}"
+
+    @staticmethod
+    def _raise_for_status(resp: httpx.Response) -> None:
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            if resp.status_code == 403:
+                error_msg = (
+                    "Semantic Scholar returned 403. "
+                    "Set SEMANTIC_SCHOLAR_API_KEY or reduce request rate."
+                )
+                logger.error(error_msg)
+                raise RuntimeError(error_msg) from exc
+            logger.error("Semantic Scholar API error: %s", exc)
+            raise
+
+    @staticmethod
+    def _search_params(query: str, limit: int) -> dict:
+        return {"query": query, "limit": limit, "fields": _PAPER_FIELDS}
+
+    @staticmethod
+    def _references_params(limit: int) -> dict:
+        return {"fields": _PAPER_FIELDS, "limit": limit}
+
+    def _batch_cache_key(self, paper_id: str, fields: str) -> str:
+        return f"s2:{self.base_url}/paper/batch:{paper_id}:{fields}"
+
+    def _batch_cached(self, ids: Sequence[str], fields: str) -> tuple[Dict[str, Optional[dict]], List[str]]:
+        found: Dict[str, Optional[dict]] = {}
+        missing: List[str] = []
+        for paper_id in dict.fromkeys(ids):
+            cached = cache_get(self.cache_dir, self._batch_cache_key(paper_id, fields))
+            if cached is None:
+                missing.append(paper_id)
+            else:
+                # Unknown ids are cached as {} so they are not re-requested.
+                found[paper_id] = cached or None
+        return found, missing
+
+    def _store_batch(self, chunk: Sequence[str], data: list, fields: str, found: Dict[str, Optional[dict]]) -> None:
+        for paper_id, item in zip(chunk, data):
+            cache_set(self.cache_dir, self._batch_cache_key(paper_id, fields), item or {})
+            found[paper_id] = item or None
+
+    @staticmethod
+    def _chunks(ids: Sequence[str], size: int) -> List[Sequence[str]]:
+        size = max(1, min(size, BATCH_MAX_IDS))
+        return [ids[i : i + size] for i in range(0, len(ids), size)]
+
+    @staticmethod
+    def _parse_references(data: dict) -> List[PaperCandidate]:
+        return [_paper_from_item(item.get("citedPaper") or {}, seed_boost=0.1) for item in data.get("data", [])]
+
+    @staticmethod
+    def _parse_citations(data: dict) -> List[PaperCandidate]:
+        return [_paper_from_item(item.get("citingPaper") or {}, seed_boost=0.1) for item in data.get("data", [])]
+
+
+class SemanticScholarClient(_SemanticScholarBase):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        cache_dir: str,
+        http_client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__(base_url, api_key, cache_dir)
+        self.http = http_client or get_http_client("s2")
+
     def _get(self, path: str, params: dict) -> dict:
         url = f"{self.base_url}{path}"
-        key = f"s2:{url}:{sorted(params.items())}"
-        cached = cache_get(self.cache_dir, key)
-        if cached is not None:
-            return cached
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.get(url, params=params, headers=self._headers())
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                if resp.status_code == 403:
-                    error_msg = (
-                        "Semantic Scholar returned 403. "
-                        "Set SEMANTIC_SCHOLAR_API_KEY or reduce request rate."
-                    )
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg) from exc
-                logger.error("Semantic Scholar API error: %s", exc)
-                raise
+        key = self._cache_key(url, params)
+
+        def _fetch() -> dict:
+            resp = request_with_retry(
+                self.http,
+                "GET",
+                url,
+                "s2",
+                self.limiter,
+                S2_RETRY_STATUSES,
+                params=params,
+                headers=self._headers(),
+            )
+            self._raise_for_status(resp)
             data = resp.json()
-        cache_set(self.cache_dir, key, data)
-        time.sleep(0.2)
-        return data
+            cache_set(self.cache_dir, key, data)
+            return data
 
-    def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
-        data = self._get(
-            "/paper/search",
-            {
-                "query": query,
-                "limit": limit,
-                "fields": "title,authors,year,venue,abstract,url,externalIds,citationCount",
-            },
-        )
-        results = []
-        for item in data.get("data", []):
-            doi = None
-            external = item.get("externalIds") or {}
-            if isinstance(external, dict):
-                doi = external.get("DOI")
-            results.append(
-                PaperCandidate(
-                    paper_id=item.get("paperId"),
-                    title=item.get("title"),
-                    authors=[a.get("name") for a in item.get("authors", []) if a.get("name")],
-                    year=item.get("year"),
-                    venue=item.get("venue"),
-                    abstract=item.get("abstract"),
-                    doi=doi,
-                    url=item.get("url"),
-                    citation_count=item.get("citationCount"),
-                    source="s2",
-                )
+        return cache_get_or_fetch(self.cache_dir, key, _fetch)
+
+    def batch_papers(
+        self, ids: Sequence[str], fields: str = "paperId,title", batch_size: int = BATCH_MAX_IDS
+    ) -> Dict[str, Optional[dict]]:
+        """Fetch many papers by id ("DOI:...", S2 ids, ...) via /paper/batch.
+
+        Returns a mapping from each requested id to its record, or None when
+        Semantic Scholar does not know the id.
+        """
+        found, missing = self._batch_cached(ids, fields)
+        for chunk in self._chunks(missing, batch_size):
+            resp = request_with_retry(
+                self.http,
+                "POST",
+                f"{self.base_url}/paper/batch",
+                "s2",
+                self.limiter,
+                S2_RETRY_STATUSES,
+                params={"fields": fields},
+                json={"ids": list(chunk)},
+                headers=self._headers(),
             )
-        return results
+            self._raise_for_status(resp)
+            self._store_batch(chunk, resp.json(), fields, found)
+        return found
+
+    def resolve_dois(self, dois: Sequence[str], batch_size: int = BATCH_MAX_IDS) -> Dict[str, Optional[dict]]:
+        records = self.batch_papers([f"DOI:{doi}" for doi in dois], batch_size=batch_size)
+        return {doi: records.get(f"DOI:{doi}") for doi in dois}
+
+    def lookup_titles(self, titles: Sequence[str], max_workers: int = 8) -> List[Optional[PaperCandidate]]:
+        """Resolve titles concurrently; failed lookups yield None."""
+
+        def _lookup(title: str) -> Optional[PaperCandidate]:
+            try:
+                return self.lookup_by_title(title)
+            except Exception as exc:
+                logger.warning("Semantic Scholar title lookup failed for '%s': %s", title, exc)
+                return None
+
+        if not titles:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(titles)))) as executor:
+            return list(executor.map(in_current_context(_lookup), titles))
+
+    def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
+        data = self._get("/paper/search", self._search_params(query, limit))
+        return [_paper_from_item(item) for item in data.get("data", [])]
 
     def lookup_by_title(self, title: str) -> Optional[PaperCandidate]:
-        data = self.search_papers(title, limit=3)
-        if not data:
-            return None
-        norm = normalize_title(title)
-        best = None
-        for cand in data:
-            if not cand.title:
-                continue
-            if normalize_title(cand.title) == norm:
-                return cand
-            if best is None:
-                best = cand
-        return best
-
-    def related_from_seed(self, doi: Optional[str], title: Optional[str], limit: int = 10) -> List[PaperCandidate]:
+        return _best_title_match(title, self.search_papers(title, limit=3))
+
+    def resolve_seed_id(self, doi: Optional[str], title: Optional[str]) -> Optional[str]:
         paper_id = None
         if doi:
             try:
@@ -111,33 +232,159 @@ class SemanticScholarClient:
             match = self.lookup_by_title(title)
             if match and match.paper_id:
                 paper_id = match.paper_id
-        if paper_id is None:
+        return paper_id
+
+    def references(self, paper_id: str, limit: int = 10) -> List[PaperCandidate]:
+        try:
+            data = self._get(f"/paper/{paper_id}/references", self._references_params(limit))
+        except Exception:
             return []
+        return self._parse_references(data)
+
+    def citations(self, paper_id: str, limit: int = 10) -> List[PaperCandidate]:
         try:
-            data = self._get(
-                f"/paper/{paper_id}/references",
-                {"fields": "title,authors,year,venue,abstract,url,externalIds,citationCount", "limit": limit},
-            )
+            data = self._get(f"/paper/{paper_id}/citations", self._references_params(limit))
         except Exception:
             return []
-        results = []
-        for item in data.get("data", []):
-            ref = item.get("citedPaper") or {}
-            external = ref.get("externalIds") or {}
-            doi_val = external.get("DOI") if isinstance(external, dict) else None
-            results.append(
-                PaperCandidate(
-                    paper_id=ref.get("paperId"),
-                    title=ref.get("title"),
-                    authors=[a.get("name") for a in ref.get("authors", []) if a.get("name")],
-                    year=ref.get("year"),
-                    venue=ref.get("venue"),
-                    abstract=ref.get("abstract"),
-                    doi=doi_val,
-                    url=ref.get("url"),
-                    citation_count=ref.get("citationCount"),
-                    source="s2",
-                    seed_boost=0.1,
-                )
+        return self._parse_citations(data)
+
+    def related_from_seed(
+        self,
+        doi: Optional[str],
+        title: Optional[str],
+        limit: int = 10,
+        paper_id: Optional[str] = None,
+        citations_limit: int = 0,
+    ) -> List[PaperCandidate]:
+        paper_id = paper_id or self.resolve_seed_id(doi, title)
+        if paper_id is None:
+            return []
+        related = self.references(paper_id, limit)
+        if citations_limit > 0:
+            related.extend(self.citations(paper_id, citations_limit))
+        return related
+
+
+class AsyncSemanticScholarClient(_SemanticScholarBase):
+    """asyncio counterpart of `SemanticScholarClient` sharing its cache keys."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        cache_dir: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        super().__init__(base_url, api_key, cache_dir)
+        self.http = http_client or get_async_http_client("s2")
+
+    async def _get(self, path: str, params: dict) -> dict:
+        url = f"{self.base_url}{path}"
+        key = self._cache_key(url, params)
+
+        async def _fetch() -> dict:
+            resp = await arequest_with_retry(
+                self.http,
+                "GET",
+                url,
+                "s2",
+                self.limiter,
+                S2_RETRY_STATUSES,
+                params=params,
+                headers=self._headers(),
             )
-        return results
+            self._raise_for_status(resp)
+            data = resp.json()
+            cache_set(self.cache_dir, key, data)
+            return data
+
+        return await acache_get_or_fetch(self.cache_dir, key, _fetch)
+
+    async def batch_papers(
+        self, ids: Sequence[str], fields: str = "paperId,title", batch_size: int = BATCH_MAX_IDS
+    ) -> Dict[str, Optional[dict]]:
+        found, missing = self._batch_cached(ids, fields)
+        for chunk in self._chunks(missing, batch_size):
+            resp = await arequest_with_retry(
+                self.http,
+                "POST",
+                f"{self.base_url}/paper/batch",
+                "s2",
+                self.limiter,
+                S2_RETRY_STATUSES,
+                params={"fields": fields},
+                json={"ids": list(chunk)},
+                headers=self._headers(),
+            )
+            self._raise_for_status(resp)
+            self._store_batch(chunk, resp.json(), fields, found)
+        return found
+
+    async def resolve_dois(
+        self, dois: Sequence[str], batch_size: int = BATCH_MAX_IDS
+    ) -> Dict[str, Optional[dict]]:
+        records = await self.batch_papers([f"DOI:{doi}" for doi in dois], batch_size=batch_size)
+        return {doi: records.get(f"DOI:{doi}") for doi in dois}
+
+    async def lookup_titles(self, titles: Sequence[str]) -> List[Optional[PaperCandidate]]:
+        async def _lookup(title: str) -> Optional[PaperCandidate]:
+            try:
+                return await self.lookup_by_title(title)
+            except Exception as exc:
+                logger.warning("Semantic Scholar title lookup failed for '%s': %s", title, exc)
+                return None
+
+        return list(await asyncio.gather(*(_lookup(t) for t in titles)))
+
+    async def search_papers(self, query: str, limit: int) -> List[PaperCandidate]:
+        data = await self._get("/paper/search", self._search_params(query, limit))
+        return [_paper_from_item(item) for item in data.get("data", [])]
+
+    async def lookup_by_title(self, title: str) -> Optional[PaperCandidate]:
+        return _best_title_match(title, await self.search_papers(title, limit=3))
+
+    async def resolve_seed_id(self, doi: Optional[str], title: Optional[str]) -> Optional[str]:
+        paper_id = None
+        if doi:
+            try:
+                data = await self._get(f"/paper/DOI:{doi}", {"fields": "paperId,title"})
+                paper_id = data.get("paperId")
+            except Exception:
+                paper_id = None
+        if paper_id is None and title:
+            match = await self.lookup_by_title(title)
+            if match and match.paper_id:
+                paper_id = match.paper_id
+        return paper_id
+
+    async def references(self, paper_id: str, limit: int = 10) -> List[PaperCandidate]:
+        try:
+            data = await self._get(f"/paper/{paper_id}/references", self._references_params(limit))
+        except Exception:
+            return []
+        return self._parse_references(data)
+
+    async def citations(self, paper_id: str, limit: int = 10) -> List[PaperCandidate]:
+        try:
+            data = await self._get(f"/paper/{paper_id}/citations", self._references_params(limit))
+        except Exception:
+            return []
+        return self._parse_citations(data)
+
+    async def related_from_seed(
+        self,
+        doi: Optional[str],
+        title: Optional[str],
+        limit: int = 10,
+        paper_id: Optional[str] = None,
+        citations_limit: int = 0,
+    ) -> List[PaperCandidate]:
+        paper_id = paper_id or await self.resolve_seed_id(doi, title)
+        if paper_id is None:
+            return []
+        if citations_limit <= 0:
+            return await self.references(paper_id, limit)
+        refs, cites = await asyncio.gather(
+            self.references(paper_id, limit), self.citations(paper_id, citations_limit)
+        )
+        return refs + cites
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
 
 
 _ABBREVIATIONS = {"e.g.", "i.e.", "et al.", "fig.", "sec.", "cf.", "etc."}
@@ -11,6 +13,39 @@ def normalize_title(text: str) -> str:
     return re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip()
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (about four characters per token)."""
+    return (len(text or "") + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` at a word boundary to roughly `max_tokens` tokens (0 = no limit)."""
+    limit = max_tokens * 4
+    if not text or max_tokens <= 0 or len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return f"{cut} ..."
+
+
+def pack_by_tokens(items: Sequence[T], cost: Callable[[T], int], max_items: int, max_tokens: int) -> List[List[T]]:
+    """Group items, in order, into batches of at most `max_items` items and
+    about `max_tokens` tokens; an item over the budget gets a batch of its own."""
+    max_items = max(1, max_items)
+    batches: List[List[T]] = []
+    current: List[T] = []
+    tokens = 0
+    for item in items:
+        item_cost = cost(item)
+        if current and (len(current) >= max_items or tokens + item_cost > max_tokens):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(item)
+        tokens += item_cost
+    if current:
+        batches.append(current)
+    return batches
+
+
 def split_sentences(text: str) -> List[Tuple[str, int, int]]:
     sentences = []
     start = 0
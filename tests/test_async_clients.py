@@ -0,0 +1,147 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import httpx
+
+from src.graph.build_graph import build_graph
+from src.graph.prompts import ANCHOR_SYSTEM, NEEDS_CITATION_SYSTEM, QUERY_GEN_SYSTEM, SCORER_SYSTEM
+from src.graph.state import AgentConfig, GraphState
+from src.tools import crossref, llm, perplexity, rate_limit, semantic_scholar
+from src.tools.crossref import AsyncCrossrefClient, CrossrefClient
+from src.tools.rate_limit import TokenBucket
+from src.tools.semantic_scholar import AsyncSemanticScholarClient, SemanticScholarClient
+
+
+def _s2_paper(i):
+    return {
+        "paperId": f"p{i}",
+        "title": f"Planning agents {i}",
+        "year": 2021,
+        "abstract": "LLM agents plan.",
+        "externalIds": {"DOI": f"10.1/p{i}"},
+        "citationCount": 40,
+        "authors": [{"name": "Ann Lee"}],
+    }
+
+
+def _backends(requests):
+    def handler(request):
+        requests.append(request.url.path)
+        if request.url.path == "/graph/v1/paper/batch":
+            return httpx.Response(200, json=[{"paperId": i, "title": i} for i in json.loads(request.content)["ids"]])
+        if request.url.path == "/graph/v1/paper/search":
+            return httpx.Response(200, json={"data": [_s2_paper(0), _s2_paper(1)]})
+        if request.url.path.endswith("/transform/application/x-bibtex"):
+            doi = request.url.path.split("/works/")[1].split("/transform")[0]
+            key = re.sub(r"\W", "", doi)
+            return httpx.Response(200, text=f"@article{{lee{key}, title={{Planning}}, doi={{{doi}}}, year={{2021}}}}")
+        if request.url.path.startswith("/works/"):
+            return httpx.Response(200, json={"message": {"DOI": request.url.path[len("/works/"):]}})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def _clients(tmp_path, requests):
+    transport = _backends(requests)
+    s2 = ("https://s2.example/graph/v1", "key", str(tmp_path))
+    sync = SemanticScholarClient(*s2, http_client=httpx.Client(transport=transport))
+    async_ = AsyncSemanticScholarClient(*s2, http_client=httpx.AsyncClient(transport=transport))
+    cr = ("https://crossref.example", str(tmp_path))
+    sync_cr = CrossrefClient(*cr, http_client=httpx.Client(transport=transport))
+    async_cr = AsyncCrossrefClient(*cr, http_client=httpx.AsyncClient(transport=transport))
+    for client in (sync, async_, sync_cr, async_cr):
+        client.limiter = TokenBucket(0)
+    return sync, async_, sync_cr, async_cr
+
+
+def test_async_semantic_scholar_client_shares_the_sync_cache(tmp_path):
+    requests = []
+    sync, async_, _, _ = _clients(tmp_path, requests)
+
+    async def fetch():
+        return (
+            await async_.search_papers("agent planning", 2),
+            await async_.resolve_dois(["10.1/a", "10.1/b"]),
+        )
+
+    papers, records = asyncio.run(fetch())
+    assert [p.paper_id for p in papers] == ["p0", "p1"] and papers[0].doi == "10.1/p0"
+    assert records["10.1/a"]["paperId"] == "DOI:10.1/a"
+    assert requests == ["/graph/v1/paper/search", "/graph/v1/paper/batch"]
+
+    # The sync client finds both replies under the same cache keys.
+    assert sync.search_papers("agent planning", 2) == papers
+    assert sync.resolve_dois(["10.1/a", "10.1/b"]) == records
+    assert len(requests) == 2
+
+
+def test_async_crossref_client_shares_the_sync_cache(tmp_path):
+    requests = []
+    _, _, sync, async_ = _clients(tmp_path, requests)
+    assert sync.lookup_by_doi("10.1/x") == {"message": {"DOI": "10.1/x"}}
+
+    async def fetch():
+        return await async_.lookup_by_doi("10.1/x"), await async_.bibtex_from_doi("10.1/y")
+
+    work, bibtex = asyncio.run(fetch())
+    assert work == {"message": {"DOI": "10.1/x"}} and "doi={10.1/y}" in bibtex
+    assert sync.bibtex_from_doi("10.1/y") == bibtex
+    assert requests == ["/works/10.1/x", "/works/10.1/y/transform/application/x-bibtex"]
+
+
+def _fake_reply(system, user):
+    if system == ANCHOR_SYSTEM:
+        return {"topic": "agents", "key_terms": ["LLM agents"], "subareas": [], "likely_venues": [], "exclusions": []}
+    if system == NEEDS_CITATION_SYSTEM:
+        need = {"needs_citation": True, "claim_type": "prior_work", "rationale": "r", "scope": "sentence"}
+        sids = re.findall(r'"sid": "(S\d+)"', user)
+        return {"results": [dict(need, sid=sid) for sid in sids]} if sids else need
+    if system == QUERY_GEN_SYSTEM:
+        return {"queries": ["llm agent planning"]}
+    if system == SCORER_SYSTEM:
+        ids = re.findall(r"'paper_id': '([^']+)'", user)
+        score = {"relevance": 0.9, "support": 0.9, "authority": 0.5, "evidence_snippet": "plan", "why": "y"}
+        return {"scores": [dict(score, paper_id=pid) for pid in ids]}
+    return {}
+
+
+class _FakeCompletions:
+    async def create(self, messages, **kwargs):
+        content = json.dumps(_fake_reply(messages[0]["content"], messages[1]["content"]))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=10),
+        )
+
+
+def test_async_graph_runs_end_to_end(tmp_path, monkeypatch):
+    requests = []
+    transport = _backends(requests)
+    openai_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    monkeypatch.setattr(llm, "AsyncOpenAI", lambda **kwargs: openai_client)
+    for module in (semantic_scholar, crossref, perplexity):
+        monkeypatch.setattr(module, "get_async_http_client", lambda name: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(rate_limit, "_limits", {})
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+
+    draft = tmp_path / "draft.tex"
+    draft.write_text("LLM agents can plan multi-step tasks with tools.\n\nWe evaluate our agent on two suites.\n")
+    (tmp_path / "references.bib").write_text("")
+    config = AgentConfig(
+        openai_api_key="k",
+        semantic_scholar_api_key="k",
+        s2_base_url="https://s2.example/graph/v1",
+        crossref_base_url="https://crossref.example",
+        input_path=str(draft),
+        output_dir=str(tmp_path / "out"),
+        cache_dir=str(tmp_path / "cache"),
+    )
+    result = asyncio.run(build_graph(async_mode=True).ainvoke(GraphState(config=config)))
+
+    assert "\\cite{" in result["revised_text"]
+    assert [claim["status"] for claim in result["report"]["claims"]] == ["OK", "OK"]
+    assert "/graph/v1/paper/search" in requests
+    assert any(path.endswith("/x-bibtex") for path in requests)
@@ -0,0 +1,71 @@
+import os
+import time
+
+from src import batch
+from src.batch import bib_groups, collect_inputs, output_dirs, summarize
+from src.graph.state import AgentConfig
+
+
+def test_inputs_from_a_directory_skip_the_output_dir(tmp_path):
+    for name in ("b/draft.tex", "a/draft.tex", "a/notes.txt", "out/a__draft/revised.tex"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    inputs = collect_inputs(str(tmp_path), exclude=str(tmp_path / "out"))
+    assert inputs == [str(tmp_path / "a" / "draft.tex"), str(tmp_path / "b" / "draft.tex")]
+    assert output_dirs(inputs, "out") == [os.path.join("out", "a__draft"), os.path.join("out", "b__draft")]
+
+
+def test_inputs_from_a_manifest_are_relative_to_it(tmp_path):
+    manifest = tmp_path / "drafts.txt"
+    manifest.write_text(f"# nightly\none/paper.tex\n\n{tmp_path / 'two' / 'paper.tex'}\none/paper.tex\n")
+    inputs = collect_inputs(str(manifest))
+    assert inputs[:2] == [str(tmp_path / "one" / "paper.tex"), str(tmp_path / "two" / "paper.tex")]
+    names = [os.path.basename(d) for d in output_dirs(inputs, "out")]
+    assert names == ["one__paper", "two__paper", "one__paper-2"]
+
+
+def test_summary_totals_and_throughput_count_finished_documents():
+    def item(status, claims, llm_calls):
+        metrics = {"llm_calls": llm_calls, "cost_usd": 0.1}
+        return {"status": status, "seconds": 30.0, "claims": claims, "claims_ok": claims, "new_entries": 1,
+                "metrics": metrics}
+
+    summary = summarize([item("done", 4, 10), item("done", 2, 6), item("failed", 0, 0)], wall_seconds=60.0)
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    assert summary["totals"]["claims"] == 6 and summary["totals"]["cost_usd"] == 0.2
+    throughput = summary["throughput"]
+    assert (throughput["documents_per_minute"], throughput["claims_per_minute"]) == (2.0, 6.0)
+    assert throughput["llm_calls_per_minute"] == 16.0
+    assert summary["document_seconds"] == 90.0
+
+
+class _AppendingGraph:
+    """Adds one entry to the draft's .bib with a slow read-modify-write, like the references node."""
+
+    def invoke(self, state):
+        bib = os.path.join(os.path.dirname(state.config.input_path), "references.bib")
+        with open(bib) as f:
+            text = f.read()
+        time.sleep(0.05)
+        name = os.path.basename(state.config.input_path)
+        with open(bib, "w") as f:
+            f.write(text + f"@misc{{{name},}}\n")
+        return {"revised_text": f"\\cite{{{name}}}", "report": {}}
+
+
+def test_drafts_sharing_a_bib_run_one_after_another(tmp_path, monkeypatch):
+    for name in ("shared/a.tex", "shared/b.tex", "other/c.tex"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("Text.")
+    for folder in ("shared", "other"):
+        (tmp_path / folder / "references.bib").write_text("")
+    inputs = collect_inputs(str(tmp_path))
+    base = AgentConfig(output_dir=str(tmp_path / "out"), enable_checkpoints=False)
+    configs = [base.model_copy(update={"input_path": path}) for path in inputs]
+    assert bib_groups(configs) == [[0], [1, 2]]
+
+    monkeypatch.setattr(batch, "build_graph", lambda **kwargs: _AppendingGraph())
+    summary = batch.run_batch(base, inputs, jobs=3)
+    assert summary["succeeded"] == 3
+    assert (tmp_path / "shared" / "references.bib").read_text() == "@misc{a.tex,}\n@misc{b.tex,}\n"
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.tools import caching
+from src.tools.caching import MemoryCache, SqliteCacheBackend, _hash_key
+
+
+def test_sqlite_roundtrip(tmp_path):
+    store = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"))
+    store.set("s2:query", {"data": [1, 2]})
+    assert store.get("s2:query") == {"data": [1, 2]}
+    assert store.get("s2:missing") is None
+    store.close()
+
+
+def test_sqlite_namespace_ttl(tmp_path):
+    store = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"), ttls={"pplx": -1})
+    store.set("pplx:search:q", {"results": []})
+    store.set("s2:q", {"data": []})
+    assert store.get("pplx:search:q") is None
+    assert store.get("s2:q") == {"data": []}
+    store.close()
+
+
+def test_sqlite_lru_eviction(tmp_path):
+    store = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"), max_bytes=300, ttls={})
+    for i in range(10):
+        store.set(f"s2:{i}", "x" * 50)
+    assert store.get("s2:0") is None
+    assert store.get("s2:9") == "x" * 50
+    store.close()
+
+
+def test_import_file_cache(tmp_path):
+    legacy = tmp_path / f"{_hash_key('crossref:bibtex:10.1/x')}.json"
+    legacy.write_text(json.dumps("@article{x}"), encoding="utf-8")
+    store = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"))
+    assert store.import_file_cache(str(tmp_path), remove=True) == 1
+    assert store.get("crossref:bibtex:10.1/x") == "@article{x}"
+    assert not os.path.exists(legacy)
+    store.close()
+
+
+def test_memory_cache_bounds():
+    mem = MemoryCache(max_entries=2, max_bytes=100)
+    mem.set("d", "a", 1, 10)
+    mem.set("d", "b", 2, 10)
+    assert mem.get("d", "a") == (True, 1)
+    mem.set("d", "c", 3, 10)
+    assert mem.get("d", "b") == (False, None)
+    mem.set("d", "big", 4, 95)
+    assert len(mem) == 1
+    assert mem.get("d", "big") == (True, 4)
+
+
+def test_concurrent_misses_are_coalesced(tmp_path):
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        caching.cache_set(str(tmp_path), "s2:coalesce", {"v": 1})
+        return {"v": 1}
+
+    before = caching.cache_stats()["coalesced"]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(caching.cache_get_or_fetch, str(tmp_path), "s2:coalesce", fetch) for _ in range(4)
+        ]
+        while caching.cache_stats()["coalesced"] - before < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+    assert calls == [1]
+    assert results == [{"v": 1}] * 4
+
+
+def test_async_misses_are_coalesced(tmp_path):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"v": 2}
+
+    async def run():
+        return await asyncio.gather(
+            *(caching.acache_get_or_fetch(str(tmp_path), "s2:acoalesce", fetch) for _ in range(3))
+        )
+
+    assert asyncio.run(run()) == [{"v": 2}] * 3
+    assert calls == [1]
+
+
+def test_waiters_retry_when_the_async_leader_is_cancelled(tmp_path):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05 if len(calls) == 1 else 0)
+        return {"v": len(calls)}
+
+    async def run():
+        leader = asyncio.ensure_future(caching.acache_get_or_fetch(str(tmp_path), "s2:acancel", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(caching.acache_get_or_fetch(str(tmp_path), "s2:acancel", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await waiter == {"v": 2}
+        assert leader.cancelled()
+
+    asyncio.run(run())
+    assert calls == [1, 1]
@@ -0,0 +1,89 @@
+import asyncio
+import re
+
+from src.graph.nodes.rank_filter import _arank_claims
+from src.graph.nodes.search import _search_claim_queries
+from src.graph.state import AgentConfig, ClaimItem, GraphState, PaperCandidate
+from src.tools.checkpoint import checkpointed_node, close_checkpoint_stores, get_checkpoint_store, record_claim
+
+
+def _config(tmp_path, **kwargs):
+    return AgentConfig(run_id="run-1", checkpoint_path=str(tmp_path / "checkpoints.sqlite3"), **kwargs)
+
+
+def test_completed_nodes_are_saved_and_skipped_on_resume(tmp_path):
+    calls = []
+
+    def segment(state):
+        calls.append("segment")
+        state.raw_text = "segmented"
+        return state
+
+    async def anchor(state):
+        calls.append("anchor")
+        state.anchor_summary = {"topic": "t"}
+        return state
+
+    state = GraphState(config=_config(tmp_path, openai_api_key="secret"))
+    state = checkpointed_node("segment", segment)(state)
+    state = asyncio.run(checkpointed_node("anchor", anchor)(state))
+
+    completed, state_json, _ = get_checkpoint_store(state.config.checkpoint_path).load("run-1")
+    assert completed == ["segment", "anchor"]
+    assert "secret" not in state_json
+    resumed = GraphState.model_validate_json(state_json)
+    assert resumed.anchor_summary == {"topic": "t"}
+
+    checkpointed_node("segment", segment)(resumed)
+    assert calls == ["segment", "anchor"]
+    close_checkpoint_stores()
+
+
+def test_fan_out_nodes_skip_claims_finished_before_the_resume(tmp_path):
+    config = _config(tmp_path)
+    claim = ClaimItem(cid="C1", sid="S1", text="claim")
+    record_claim(config, "search", "C1", [PaperCandidate(paper_id="p1", title="Saved").model_dump()])
+
+    # No clients: a real search would fail, so the saved result must be used.
+    candidates = _search_claim_queries(claim, [], None, None, config, [])
+    assert [p.title for p in candidates] == ["Saved"]
+    close_checkpoint_stores()
+
+
+class _ScoringLlm:
+    model = "fake"
+
+    def __init__(self):
+        self.claims = []
+
+    async def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        self.claims.append(re.search(r"claim \w+", user_prompt).group(0))
+        ids = re.findall(r"'paper_id': '([^']+)'", user_prompt)
+        return {"scores": [{"paper_id": pid, "relevance": 0.9, "support": 0.9, "evidence_snippet": "s"} for pid in ids]}
+
+
+def test_rank_filter_reuses_claims_scored_before_the_resume(tmp_path):
+    config = _config(tmp_path, score_cache_mode="off", cache_dir=str(tmp_path / "cache"))
+    claims = [ClaimItem(cid=cid, sid=cid, text=f"claim {cid}") for cid in ("C1", "C2")]
+    papers = {cid: [PaperCandidate(paper_id=f"{cid}-p", title="Paper", abstract="a")] for cid in ("C1", "C2")}
+    state = GraphState(config=config, claims=claims, candidates_by_claim=papers)
+    saved = PaperCandidate(paper_id="C1-p", title="Paper", relevance=0.9, support=0.9, authority=0.5, final=0.9)
+    record_claim(config, "rank_filter", "C1", [saved.model_dump()])
+
+    llm = _ScoringLlm()
+    selected = asyncio.run(_arank_claims(state, llm, llm))
+    assert llm.claims == ["claim C2"]
+    assert [p.paper_id for p in selected["C1"].papers] == ["C1-p"]
+    assert get_checkpoint_store(config.checkpoint_path).get_claim("run-1", "rank_filter", "C2")[0]["support"] == 0.9
+    close_checkpoint_stores()
+
+
+def test_finished_runs_are_deleted(tmp_path):
+    config = _config(tmp_path)
+    store = get_checkpoint_store(config.checkpoint_path)
+    store.start_run("run-1")
+    record_claim(config, "search", "C1", [])
+    store.delete_run("run-1")
+    assert store.load("run-1") is None
+    assert store.get_claim("run-1", "search", "C1") is None
+    close_checkpoint_stores()
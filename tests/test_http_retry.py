@@ -0,0 +1,56 @@
+import httpx
+
+from src.tools import http_pool
+from src.tools.rate_limit import TokenBucket
+from src.tools.semantic_scholar import SemanticScholarClient
+
+
+def test_retry_honours_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_pool.time, "sleep", sleeps.append)
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"ok": True}),
+        ]
+    )
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: next(responses)))
+    resp = http_pool.request_with_retry(client, "GET", "https://example.org", "test_backend", TokenBucket(0))
+    assert resp.json() == {"ok": True}
+    assert sleeps[0] == 2.0
+    assert len(sleeps) == 2
+    stats = http_pool.http_stats()["test_backend"]
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+
+
+def test_no_retry_on_client_error(monkeypatch):
+    monkeypatch.setattr(http_pool.time, "sleep", lambda s: None)
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+    resp = http_pool.request_with_retry(client, "GET", "https://example.org", "test_404")
+    assert resp.status_code == 404
+    assert http_pool.http_stats()["test_404"]["retries"] == 0
+
+
+def test_retry_after_zero_retries_immediately(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_pool.time, "sleep", sleeps.append)
+    responses = iter([httpx.Response(503, headers={"Retry-After": "0"}), httpx.Response(200)])
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: next(responses)))
+    resp = http_pool.request_with_retry(client, "GET", "https://example.org", "test_zero")
+    assert resp.status_code == 200
+    assert sleeps == [0.0]
+
+
+def test_semantic_scholar_403_throttling_is_retried(monkeypatch, tmp_path):
+    monkeypatch.setattr(http_pool.time, "sleep", lambda s: None)
+    responses = iter([httpx.Response(403, headers={"Retry-After": "0"}), httpx.Response(200, json={"data": []})])
+    client = SemanticScholarClient(
+        "https://s2.example",
+        None,
+        str(tmp_path),
+        http_client=httpx.Client(transport=httpx.MockTransport(lambda request: next(responses))),
+    )
+    client.limiter = TokenBucket(0)
+    assert client.search_papers("retrieval agents", 5) == []
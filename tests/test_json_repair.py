@@ -0,0 +1,28 @@
+import pytest
+
+from src.tools.json_repair import loads_lenient
+
+
+def test_valid_json_is_not_marked_repaired():
+    assert loads_lenient('{"a": [1, 2]}') == ({"a": [1, 2]}, False)
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ('```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}),
+        ('Here you go: {"a": "}"} hope that helps}', {"a": "}"}),
+        ('{"scores": [{"id": 1}, {"id": 2', {"scores": [{"id": 1}, {"id": 2}]}),
+        ('{"scores": [{"id": 1}, {"id":', {"scores": [{"id": 1}]}),
+        ('{"a": 1, "b": tru', {"a": 1}),
+        ('{"a": "trunc', {"a": "trunc"}),
+    ],
+)
+def test_repairs(content, expected):
+    assert loads_lenient(content) == (expected, True)
+
+
+@pytest.mark.parametrize("content", ["", "no json here"])
+def test_unrepairable_raises_value_error(content):
+    with pytest.raises(ValueError):
+        loads_lenient(content)
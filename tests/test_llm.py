@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.graph.schemas import QueryGenResult
+from src.tools.llm import LlmClient
+
+
+class _Completions:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def create(self, **request):
+        self.requests.append(request)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=None)
+
+
+def _client(replies):
+    llm = LlmClient(api_key="k", base_url="http://llm.invalid/v1", model="m")
+    llm.limiter = SimpleNamespace(acquire=lambda: None)
+    completions = _Completions(replies)
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return llm, completions
+
+
+def test_truncated_reply_is_repaired_without_another_call():
+    llm, completions = _client(['{"queries": ["a", "b"'])
+    result = llm.chat_json("{}", "sys", "user", QueryGenResult)
+    assert result["queries"] == ["a", "b"]
+    assert len(completions.requests) == 1
+    assert completions.requests[0]["response_format"] == {"type": "json_object"}
+
+
+def test_invalid_reply_is_reasked_once():
+    llm, completions = _client(['{"queries": "not a list"}', '{"queries": ["fixed"]}'])
+    assert llm.chat_json("{}", "sys", "user", QueryGenResult)["queries"] == ["fixed"]
+    reask = completions.requests[1]["messages"]
+    assert reask[-2] == {"role": "assistant", "content": '{"queries": "not a list"}'}
+    assert "queries" in reask[-1]["content"]
+
+    llm, completions = _client(["nope", "still nope"])
+    with pytest.raises(ValueError):
+        llm.chat_json("{}", "sys", "user", QueryGenResult)
+    assert len(completions.requests) == 2
+
+
+def test_rejected_json_mode_falls_back_to_plain_requests():
+    response = httpx.Response(400, request=httpx.Request("POST", "http://llm.invalid/v1/chat/completions"))
+    rejected = openai.BadRequestError("response_format is not supported", response=response, body=None)
+    llm, completions = _client([rejected, '{"queries": []}', '{"queries": ["q"]}'])
+    assert llm.chat_json("{}", "sys", "user", QueryGenResult)["queries"] == []
+    assert "response_format" not in completions.requests[1]
+    assert llm.json_mode is False
+    llm.chat_json("{}", "sys", "other", QueryGenResult)
+    assert "response_format" not in completions.requests[2]
+
+
+def test_stage_models_fall_back_to_the_default_model():
+    from src.graph.state import AgentConfig
+    from src.tools.llm import stage_model
+
+    config = AgentConfig(openai_api_key="k", openai_model="big", stage_models={"needs_citation": "small"})
+    assert stage_model(config, "needs_citation") == "small"
+    assert stage_model(config, "rank_filter") == "big"
+    assert LlmClient.shared(config, "needs_citation").model == "small"
+    assert LlmClient.shared(config, "anchor") is LlmClient.shared(config, model="big")
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+from src.tools.llm_scheduler import LlmScheduler, _AsyncPrioritySlots, current_stage
+
+
+def test_submit_caps_in_flight_and_orders_by_stage():
+    scheduler = LlmScheduler(max_in_flight=1)
+    gate = threading.Event()
+    order = []
+
+    def blocker():
+        gate.wait(5)
+
+    def record(name):
+        order.append((name, current_stage()))
+
+    first = scheduler.submit("anchor", blocker)
+    time.sleep(0.05)
+    futures = [
+        scheduler.submit("needs_citation", record, "a"),
+        scheduler.submit("rank_filter", record, "b"),
+        scheduler.submit("gen_queries", record, "c"),
+    ]
+    gate.set()
+    first.result(5)
+    for future in futures:
+        future.result(5)
+    scheduler.shutdown()
+    assert order == [("b", "rank_filter"), ("c", "gen_queries"), ("a", "needs_citation")]
+
+
+def test_async_slots_prefer_higher_priority():
+    async def run():
+        slots = _AsyncPrioritySlots(1)
+        order = []
+        await slots.acquire(0)
+
+        async def waiter(name, priority):
+            await slots.acquire(priority)
+            order.append(name)
+            slots.release()
+
+        tasks = [asyncio.create_task(waiter("low", 3)), asyncio.create_task(waiter("high", 1))]
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["high", "low"]
@@ -0,0 +1,85 @@
+import json
+
+from src.graph.nodes.gen_queries import _sentences_needing_cites
+from src.graph.nodes.incremental import incremental_node
+from src.graph.nodes.needs_citation import _apply_prefilter
+from src.graph.state import (
+    AgentConfig,
+    BibliographyEntry,
+    CitationNeed,
+    ClaimItem,
+    GraphState,
+    PaperCandidate,
+    QueryItem,
+    SelectedForClaim,
+    SentenceItem,
+)
+from src.tools.manifest import load_manifest, manifest_path, write_manifest
+
+
+def _need(sid, needs):
+    return CitationNeed(
+        sid=sid, needs=needs, needs_more_citations=needs, claim_type="prior_work", rationale="r", scope="sentence"
+    )
+
+
+def _sentences(*texts):
+    return [SentenceItem(sid=f"S{i}", text=t, start=0, end=len(t), index=i) for i, t in enumerate(texts)]
+
+
+def _previous_run(config):
+    state = GraphState(config=config, sentences=_sentences("Intro.", "Agents plan.", "Agents act."))
+    state.citation_needs = [_need("S0", False), _need("S1", True), _need("S2", True)]
+    paper = PaperCandidate(paper_id="p", title="Planning", doi="10.1/plan")
+    for sid in ("S1", "S2"):
+        state.claims.append(ClaimItem(cid=f"C{sid}", sid=sid, text="x"))
+        state.queries_by_claim[f"C{sid}"] = [QueryItem(cid=f"C{sid}", query="agent planning", type="hybrid")]
+        state.selected_by_claim[f"C{sid}"] = SelectedForClaim(cid=f"C{sid}", papers=[paper])
+        state.inserted_keys[sid] = ["lee2021planning"]
+    state.new_bib_entries["lee2021planning"] = BibliographyEntry(bibkey="lee2021planning", doi="10.1/plan")
+    write_manifest(state)
+
+
+def test_unchanged_sentences_reuse_the_previous_run(tmp_path):
+    config = AgentConfig(output_dir=str(tmp_path), input_path="draft.tex", incremental=True)
+    _previous_run(config)
+
+    # A sentence was inserted before the others and "Agents act." was edited.
+    state = GraphState(
+        config=config, sentences=_sentences("New claim.", "Intro.", "Agents  plan.", "Agents act quickly.")
+    )
+    incremental_node(state)
+
+    assert state.reused_sids == {"S1", "S2"}
+    assert [(n.sid, n.needs) for n in state.citation_needs] == [("S1", False), ("S2", True)]
+    assert [c.cid for c in state.claims] == ["CS2"]
+    assert state.queries_by_claim["CS2"][0].query == "agent planning"
+    assert state.selected_by_claim["CS2"].papers[0].doi == "10.1/plan"
+    # The .bib was not updated in place, so the entry the reused claim cites is restored.
+    assert state.bib_entries_by_doi["10.1/plan"].bibkey == "lee2021planning"
+
+    decided, remaining = _apply_prefilter(state)
+    assert sorted(decided) == ["S1", "S2"] and [s.sid for s in remaining] == ["S0", "S3"]
+    state.citation_needs += [_need("S0", True), _need("S3", True)]
+    assert [s.sid for s in _sentences_needing_cites(state)] == ["S0", "S3"]
+
+
+def test_entries_already_in_the_bib_are_not_restored(tmp_path):
+    config = AgentConfig(output_dir=str(tmp_path), input_path="draft.tex", incremental=True)
+    _previous_run(config)
+    state = GraphState(config=config, sentences=_sentences("Agents plan."))
+    state.existing_doi_index["10.1/plan"] = "lee2021planning"
+    incremental_node(state)
+    assert state.reused_sids == {"S0"} and state.new_bib_entries == {}
+
+
+def test_manifest_is_ignored_when_off_stale_or_for_another_draft(tmp_path):
+    config = AgentConfig(output_dir=str(tmp_path), input_path="draft.tex")
+    _previous_run(config)
+    state = GraphState(config=config, sentences=_sentences("Agents plan."))
+    assert incremental_node(state).reused_sids == set()
+
+    assert load_manifest(config.model_copy(update={"input_path": "other.tex"})) is None
+    with open(manifest_path(config), "w", encoding="utf-8") as f:
+        json.dump({"version": 0, "sentences": {}}, f)
+    assert load_manifest(config) is None
@@ -0,0 +1,100 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.graph.nodes.report import report_node
+from src.graph.state import AgentConfig, GraphState
+from src.tools import metrics
+from src.tools.metrics import (
+    claim_scope,
+    configure_metrics,
+    in_current_context,
+    metered_node,
+    metrics_summary,
+    record_http_request,
+    record_llm_call,
+    reset_metrics,
+    run_scope,
+)
+
+
+def test_calls_in_worker_threads_are_attributed_to_node_and_claim():
+    reset_metrics()
+    configure_metrics(prompt_price_per_1k=1.0, completion_price_per_1k=2.0)
+
+    def node(state):
+        with claim_scope("c1"), ThreadPoolExecutor(max_workers=2) as executor:
+            call = in_current_context(lambda _: record_llm_call(0.5, prompt_tokens=500, completion_tokens=250))
+            list(executor.map(call, range(2)))
+        record_http_request(0.1, retries=2)
+        return state
+
+    metered_node("rank_filter", node)({})
+    summary = metrics_summary()
+    configure_metrics()
+
+    node_stats = summary["nodes"]["rank_filter"]
+    assert node_stats["llm_calls"] == 2
+    assert node_stats["prompt_tokens"] == 1000
+    assert node_stats["http_retries"] == 2
+    assert node_stats["cost_usd"] == 2.0
+    assert node_stats["wall_seconds"] >= 0
+    assert summary["claims"]["c1"]["llm_calls"] == 2
+    assert summary["claims"]["c1"]["http_requests"] == 0
+    assert summary["totals"]["completion_tokens"] == 500
+    assert summary["schema_version"] == metrics.METRICS_SCHEMA_VERSION
+
+
+def test_async_node_and_unscoped_calls():
+    reset_metrics()
+
+    async def call():
+        await asyncio.sleep(0)
+        record_llm_call(0.1, error=True)
+
+    async def node(state):
+        with claim_scope("c2"):
+            await asyncio.gather(*(call() for _ in range(3)))
+        return state
+
+    asyncio.run(metered_node("search", node)({}))
+    record_http_request(0.2, error=True)
+    summary = metrics_summary()
+
+    assert summary["nodes"]["search"]["llm_errors"] == 3
+    assert summary["claims"]["c2"]["llm_calls"] == 3
+    assert summary["nodes"]["other"]["http_errors"] == 1
+
+
+def test_runs_keep_separate_metrics():
+    reset_metrics()
+
+    async def document(name, calls):
+        with run_scope(name):
+            for _ in range(calls):
+                with claim_scope("CS0"):
+                    record_llm_call(0.1, prompt_tokens=10)
+                await asyncio.sleep(0)
+            summary = metrics_summary()
+            reset_metrics()
+            return summary
+
+    async def main():
+        return await asyncio.gather(document("a", 1), document("b", 3))
+
+    a, b = asyncio.run(main())
+    assert a["totals"]["llm_calls"] == 1 and a["claims"]["CS0"]["llm_calls"] == 1
+    assert b["totals"]["llm_calls"] == 3
+    assert metrics_summary()["totals"]["llm_calls"] == 0
+
+
+def test_process_wide_stats_stay_out_of_reports_of_scoped_runs(tmp_path):
+    def report(output_dir):
+        state = GraphState(config=AgentConfig(input_path="draft.tex", output_dir=str(output_dir)))
+        return report_node(state).report
+
+    assert {"cache", "http", "llm"} <= set(report(tmp_path / "cli"))
+    with run_scope("doc"):
+        scoped = report(tmp_path / "batch")
+        reset_metrics()
+    assert not {"cache", "http", "llm"} & set(scoped) and "metrics" in scoped
+    assert "- hits: 0, misses: 0, coalesced: 0" in (tmp_path / "batch" / "report.md").read_text()
@@ -0,0 +1,74 @@
+from src.graph.nodes.needs_citation import _cascade_batch, _process_batch, _sentence_batches
+from src.graph.state import AgentConfig, SentenceItem
+
+
+def _sentences(n, text="Transformers dominate language modelling."):
+    return [SentenceItem(sid=f"S{i}", text=text, start=0, end=len(text), index=i) for i in range(n)]
+
+
+def test_batches_respect_size_and_token_budget():
+    config = AgentConfig(needs_citation_batch_size=4, needs_citation_batch_tokens=25)
+    batches = _sentence_batches(_sentences(10), config)
+    assert [len(b) for b in batches] == [2, 2, 2, 2, 2]
+    config = AgentConfig(needs_citation_batch_size=4, needs_citation_batch_tokens=10_000)
+    assert [len(b) for b in _sentence_batches(_sentences(10), config)] == [4, 4, 2]
+
+
+class _FakeLlm:
+    def __init__(self):
+        self.single_calls = 0
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        if '"results"' in schema_hint:
+            # Drop S1 and add an unknown sid.
+            return {
+                "results": [
+                    {"sid": "S0", "needs_citation": True, "claim_type": "prior_work"},
+                    {"sid": "S2", "needs_citation": False, "claim_type": "no_cite"},
+                    {"sid": "S9", "needs_citation": True, "claim_type": "prior_work"},
+                ]
+            }
+        self.single_calls += 1
+        return {"needs_citation": True, "claim_type": "comparison"}
+
+
+def test_missing_sids_fall_back_to_single_calls():
+    llm = _FakeLlm()
+    needs = _process_batch(_sentences(3), {}, llm)
+    assert [n.sid for n in needs] == ["S0", "S1", "S2"]
+    assert [n.claim_type for n in needs] == ["prior_work", "comparison", "no_cite"]
+    assert llm.single_calls == 1
+
+
+class _ConfidenceLlm:
+    def __init__(self, confidence):
+        self.confidence = confidence
+        self.prompts = []
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        self.prompts.append(user_prompt)
+        sids = [s for s in ("S0", "S1", "S2") if f'"sid": "{s}"' in user_prompt]
+        results = [{"sid": sid, "needs_citation": True, "claim_type": "prior_work"} for sid in sids]
+        for result in results:
+            if self.confidence[result["sid"]] is not None:
+                result["confidence"] = self.confidence[result["sid"]]
+        return {"results": results}
+
+
+def test_cascade_escalates_only_low_confidence_sentences():
+    cheap = _ConfidenceLlm({"S0": 0.9, "S1": 0.3, "S2": 0.5})
+    strong = _ConfidenceLlm({"S0": 1.0, "S1": 1.0, "S2": 1.0})
+    config = AgentConfig(cascade_model="small", cascade_min_confidence=0.6)
+    needs = _cascade_batch(_sentences(3), {}, strong, cheap, config)
+    assert [n.escalated for n in needs] == [False, True, True]
+    assert [n.confidence for n in needs] == [0.9, 1.0, 1.0]
+    assert len(strong.prompts) == 1 and '"S0"' not in strong.prompts[0]
+
+
+def test_cascade_escalates_replies_without_a_confidence():
+    cheap = _ConfidenceLlm({"S0": 0.9, "S1": None})
+    strong = _ConfidenceLlm({"S0": 1.0, "S1": 1.0})
+    config = AgentConfig(cascade_model="small", cascade_min_confidence=0.6)
+    needs = _cascade_batch(_sentences(2), {}, strong, cheap, config)
+    assert [n.escalated for n in needs] == [False, True]
+    assert len(strong.prompts) == 1
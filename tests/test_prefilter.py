@@ -0,0 +1,39 @@
+import json
+
+from src.tools.prefilter import NoCiteModel, SentencePrefilter, examples_from_reports, rule_reason
+
+
+def test_rules_catch_non_prose():
+    assert rule_reason("\\section{Related Work}")
+    assert rule_reason("\\begin{figure}[t] \\centering \\includegraphics[width=\\linewidth]{a.pdf}")
+    assert rule_reason("\\label{eq:loss} $L = -\\sum_i y_i \\log p_i$.")
+    assert rule_reason("In this paper, we propose a retrieval agent.")
+    assert rule_reason("Section~\\ref{sec:method} describes the pipeline.")
+
+
+def test_rules_keep_claims():
+    assert rule_reason("BERT dominates NLP.") is None
+    assert rule_reason("\\section{Intro} Large language models have transformed machine translation.") is None
+    assert rule_reason("GPT-3 has $175$B parameters.") is None
+    assert rule_reason("ResNet reaches $3.6\\%$ error.") is None
+
+
+def test_cited_sentences_go_to_llm():
+    assert SentencePrefilter().check("In this paper, we extend \\cite{smith2020}.") is None
+
+
+def test_model_trained_from_reports(tmp_path):
+    decisions = [{"text": "we thank the reviewers for feedback", "needs": False, "source": "llm"}] * 20
+    decisions += [{"text": "prior work showed transformers outperform rnns", "needs": True, "source": "llm"}] * 20
+    decisions += [{"text": "prior work showed transformers outperform rnns", "needs": False, "source": "rule"}] * 50
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps({"sentence_decisions": decisions}))
+    examples = examples_from_reports([str(path)])
+    assert len(examples) == 40
+
+    model_path = str(tmp_path / "model.json")
+    NoCiteModel.train(examples).save(model_path)
+    prefilter = SentencePrefilter(NoCiteModel.load(model_path), threshold=0.9)
+    verdict = prefilter.check("We thank the reviewers for their feedback and support.")
+    assert verdict is not None and verdict[0] == "model"
+    assert prefilter.check("Prior work showed that transformers outperform recurrent networks.") is None
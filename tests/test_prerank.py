@@ -0,0 +1,35 @@
+from src.graph.state import ClaimItem, PaperCandidate
+from src.tools.prerank import prerank_candidates, tokenize
+
+
+def test_tokenize_drops_latex_and_stopwords():
+    assert tokenize(r"The \textbf{Transformer} of \cite{x} uses self-attention.") == ["uses", "self-attention"]
+
+
+def _paper(pid, title, abstract=""):
+    return PaperCandidate(paper_id=pid, title=title, abstract=abstract)
+
+
+def test_keeps_top_m_by_bm25_and_records_scores():
+    claim = ClaimItem(cid="C1", sid="S1", text="Retrieval augmented generation reduces hallucination.",
+                      anchor_tags=["language models"])
+    candidates = [
+        _paper("a", "Protein folding at scale"),
+        _paper("b", "Retrieval augmented generation", "We study hallucination in language models."),
+        _paper("c", "Language models are few-shot learners"),
+        _paper("d", "Graph neural networks"),
+    ]
+    other = ClaimItem(cid="C2", sid="S2", text="Protein structure prediction.")
+    ranked = prerank_candidates([claim, other], {"C1": candidates, "C2": [_paper("a", "Protein folding at scale")]}, 2)
+
+    assert [p.paper_id for p in ranked["C1"]] == ["b", "c"]
+    assert ranked["C1"][0].prerank_score > ranked["C1"][1].prerank_score > 0
+    assert candidates[3].prerank_score == 0
+    assert ranked["C2"][0].prerank_score > 0
+
+
+def test_top_m_zero_keeps_everything_in_ranked_order():
+    claim = ClaimItem(cid="C1", sid="S1", text="graph networks")
+    candidates = [_paper("a", "Unrelated"), _paper("b", "Graph networks")]
+    ranked = prerank_candidates([claim], {"C1": candidates}, 0)
+    assert [p.paper_id for p in ranked["C1"]] == ["b", "a"]
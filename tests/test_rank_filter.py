@@ -0,0 +1,164 @@
+import re
+
+import httpx
+import openai
+import pytest
+
+from src.graph.nodes.rank_filter import (
+    _ambiguous,
+    _apply_escalated,
+    _apply_scores,
+    _claim_groups,
+    _pair_batches,
+    _score_batch,
+    _score_pair_batch,
+    _split_pair_scores,
+)
+from src.graph.state import AgentConfig, ClaimItem, PaperCandidate
+from src.tools.dedupe import paper_key
+
+
+def _claim(cid):
+    return ClaimItem(cid=cid, sid=cid, text=f"claim {cid}")
+
+
+def _papers(*ids):
+    return [PaperCandidate(paper_id=pid, title=f"Paper {pid}") for pid in ids]
+
+
+def test_claims_sharing_papers_are_grouped_up_to_the_cap():
+    claims = [_claim("C1"), _claim("C2"), _claim("C3"), _claim("C4")]
+    candidates = {"C1": _papers("a", "b"), "C2": _papers("x"), "C3": _papers("b", "c"), "C4": _papers("a")}
+    groups = _claim_groups(claims, candidates, max_claims=2)
+    # C4 shares a paper with the full C1/C3 group, and nothing with C2.
+    assert [[c.cid for c in group] for group in groups] == [["C1", "C3"], ["C2"], ["C4"]]
+
+
+def test_each_paper_is_scored_once_and_split_back_per_claim():
+    group = [_claim("C1"), _claim("C2")]
+    candidates = {"C1": _papers("a", "b"), "C2": _papers("b")}
+    (batch,) = _pair_batches(group, candidates, AgentConfig())
+    assert [paper.paper_id for paper, _ in batch] == ["a", "b"]
+    assert list(batch[1][1]) == ["C1", "C2"]
+    assert batch[1][1]["C2"] is candidates["C2"][0]
+
+    scores = [
+        {"paper_id": "P0", "claim_id": "C1", "relevance": 0.1},
+        {"paper_id": "P1", "claim_id": "C1", "relevance": 0.2},
+        {"paper_id": "P1", "claim_id": "C2", "relevance": 0.9},
+        {"paper_id": "P0", "claim_id": "C2", "relevance": 1.0},
+    ]
+    split = _split_pair_scores(batch, scores)
+    papers, claim_scores = split["C2"]
+    assert papers == candidates["C2"]
+    assert claim_scores == [{"paper_id": "b", "claim_id": "C2", "relevance": 0.9}]
+    assert [s["paper_id"] for s in split["C1"][1]] == ["a", "b"]
+
+
+class _SplittingLlm:
+    """Fails any scoring prompt with more than two papers, and any prompt mentioning paper "bad"."""
+
+    model = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        self.calls += 1
+        ids = re.findall(r"'paper_id': '([^']+)'", user_prompt)
+        if len(ids) > 2 or "Paper bad" in user_prompt:
+            raise ValueError("context length exceeded")
+        claim_ids = re.findall(r"'claim_id': '([^']+)'", user_prompt)
+        return {"scores": [{"paper_id": pid, "claim_id": cid} for pid in ids for cid in claim_ids or [None]]}
+
+
+def test_failed_batches_are_split_instead_of_zeroed():
+    llm = _SplittingLlm()
+    config = AgentConfig(score_cache_mode="off")
+    scores = _score_batch(llm, _claim("C1"), _papers("a", "b", "bad", "d"), config)
+    assert [s["paper_id"] for s in scores] == ["a", "b", "d"]
+
+    group = [_claim("C1")]
+    (batch,) = _pair_batches(group, {"C1": _papers("a", "b", "c", "d")}, AgentConfig())
+    scores = _score_pair_batch(llm, group, batch, AgentConfig())
+    # Halves keep the paper numbers of the full batch.
+    assert [s["paper_id"] for s in scores] == ["P0", "P1", "P2", "P3"]
+
+
+def _bad_request(code, message):
+    response = httpx.Response(400, request=httpx.Request("POST", "https://llm.example/chat/completions"))
+    return openai.BadRequestError(message, response=response, body={"code": code, "message": message})
+
+
+class _FailingLlm:
+    model = "fake"
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.mark.parametrize(
+    "error",
+    [RuntimeError("service unavailable"), _bad_request("model_not_found", "The model `gpt-x` does not exist")],
+)
+def test_errors_a_smaller_batch_cannot_fix_are_not_split(error):
+    llm = _FailingLlm(error)
+    with pytest.raises(type(error)):
+        _score_batch(llm, _claim("C1"), _papers("a", "b", "c", "d"), AgentConfig(score_cache_mode="off"))
+    assert llm.calls == 1
+
+
+def test_context_length_errors_are_split_down_to_single_papers():
+    llm = _FailingLlm(_bad_request("context_length_exceeded", "This model's maximum context length is 8192 tokens"))
+    scores = _score_batch(llm, _claim("C1"), _papers("a", "b", "c", "d"), AgentConfig(score_cache_mode="off"))
+    assert scores == [] and llm.calls == 7
+
+
+def test_ambiguous_papers_are_rescored_and_others_keep_cheap_scores():
+    config = AgentConfig(support_score_min=0.6, final_score_threshold=0.72, cascade_score_band=0.05)
+    sure, near = _papers("sure", "near")
+    sure.support, sure.final = 0.95, 0.9
+    near.support, near.final = 0.62, 0.8
+    assert _ambiguous([sure, near], config) == [near]
+
+    _apply_escalated([sure, near], [{"paper_id": "near", "support": 0.2, "relevance": 0.1}], config)
+    assert (sure.support, sure.final) == (0.95, 0.9)
+    assert near.support == 0.2 and near.final < 0.72
+
+
+class _ByTitleLlm:
+    """Scores each paper by the id it was sent with: "...strong..." papers high, others low."""
+
+    model = "fake"
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        papers = re.findall(r"'paper_id': '([^']+)', 'title': '([^']+)'", user_prompt)
+        claim_ids = re.findall(r"'claim_id': '([^']+)'", user_prompt) or [None]
+        return {
+            "scores": [
+                {"paper_id": pid, "claim_id": cid, "relevance": 0.9 if "strong" in title else 0.1}
+                for pid, title in papers
+                for cid in claim_ids
+            ]
+        }
+
+
+def test_papers_without_an_s2_id_keep_their_own_scores():
+    config = AgentConfig(score_cache_mode="off")
+    claim = _claim("C1")
+    weak = PaperCandidate(paper_id=None, title="A weak match", doi="10.1/weak")
+    strong = PaperCandidate(paper_id=None, title="A strong match")
+    scores = _score_batch(_ByTitleLlm(), claim, [weak, strong], config)
+    assert [p.relevance for p in _apply_scores([([weak, strong], scores)], config)] == [0.1, 0.9]
+
+    (batch,) = _pair_batches([claim], {"C1": [weak, strong]}, config)
+    split = _split_pair_scores(batch, _score_pair_batch(_ByTitleLlm(), [claim], batch, config))
+    assert [p.relevance for p in _apply_scores([split["C1"]], config)] == [0.1, 0.9]
+
+    _apply_escalated([weak, strong], [{"paper_id": paper_key(strong), "relevance": 0.3}], config)
+    assert (weak.relevance, strong.relevance) == (0.1, 0.3)
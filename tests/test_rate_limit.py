@@ -0,0 +1,15 @@
+from src.tools.rate_limit import TokenBucket
+
+
+def test_token_bucket_spaces_out_reservations():
+    bucket = TokenBucket(rate=10.0, capacity=1.0)
+    assert bucket.reserve() == 0.0
+    waits = [bucket.reserve() for _ in range(3)]
+    assert 0.05 < waits[0] <= 0.1
+    assert waits[0] < waits[1] < waits[2]
+    assert abs(waits[2] - 0.3) < 0.02
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(rate=0.0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
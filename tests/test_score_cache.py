@@ -0,0 +1,36 @@
+from src.graph.nodes.rank_filter import _prompt_version, _score_batch
+from src.graph.state import AgentConfig, ClaimItem, PaperCandidate
+from src.tools.score_cache import ScoreCache, normalize_claim
+
+
+class _FakeLlm:
+    model = "small"
+
+    def __init__(self):
+        self.prompts = []
+
+    def chat_json(self, schema_hint, system_prompt, user_prompt, schema=None):
+        self.prompts.append(user_prompt)
+        return {"scores": [{"paper_id": "a", "relevance": 0.8, "support": 0.7, "evidence_snippet": "shown"}]}
+
+
+def test_normalize_claim_ignores_cites_case_and_spacing():
+    assert normalize_claim("Transformers  scale~\\citep[p.~3]{a,b}.\n") == "transformers scale."
+
+
+def test_scores_are_reused_and_only_missing_pairs_are_scored(tmp_path):
+    config = AgentConfig(cache_dir=str(tmp_path))
+    llm = _FakeLlm()
+    papers = [PaperCandidate(paper_id="a", title="A"), PaperCandidate(paper_id="b", title="B")]
+    _score_batch(llm, ClaimItem(cid="C1", sid="S1", text="Transformers scale."), papers, config)
+    version = _prompt_version(config.scoring_abstract_tokens)
+
+    cache = ScoreCache(str(tmp_path), "readwrite", "small", version)
+    (hits, scores), missing = cache.split("Transformers scale \\cite{vaswani}.", papers)
+    assert [p.paper_id for p in hits] == ["a"]
+    assert scores[0]["support"] == 0.7 and scores[0]["evidence_snippet"] == "shown"
+    assert [p.paper_id for p in missing] == ["b"]
+
+    other_model = ScoreCache(str(tmp_path), "readwrite", "large", version)
+    assert other_model.split("Transformers scale.", papers)[1] == papers
+    assert ScoreCache(str(tmp_path), "off", "small", version).split("x", papers)[1] == papers
@@ -0,0 +1,31 @@
+import json
+
+import httpx
+
+from src.tools.semantic_scholar import SemanticScholarClient
+
+
+def test_batch_papers_chunks_and_caches(tmp_path):
+    requests = []
+
+    def handler(request):
+        ids = json.loads(request.content)["ids"]
+        requests.append(ids)
+        return httpx.Response(
+            200, json=[None if i == "DOI:missing" else {"paperId": f"p-{i}", "title": i} for i in ids]
+        )
+
+    client = SemanticScholarClient(
+        "https://s2.example",
+        None,
+        str(tmp_path),
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    dois = ["a", "b", "c", "missing"]
+    records = client.resolve_dois(dois, batch_size=3)
+    assert [len(ids) for ids in requests] == [3, 1]
+    assert records["a"]["paperId"] == "p-DOI:a"
+    assert records["missing"] is None
+
+    assert client.resolve_dois(dois, batch_size=3) == records
+    assert len(requests) == 2
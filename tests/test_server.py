@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from src.graph.state import AgentConfig
+from src.server import CitationServer, RequestError
+from src.tools.progress import emit_claim
+
+
+class _SlowGraph:
+    async def ainvoke(self, state):
+        emit_claim("search", "CS0", candidates=3)
+        await asyncio.sleep(0.2)
+        state.revised_text = state.raw_text + " \\cite{x}"
+        return state
+
+
+def _server(tmp_path):
+    server = CitationServer(AgentConfig(output_dir=str(tmp_path), enable_checkpoints=False))
+    server.graph = _SlowGraph()
+    return server
+
+
+def test_request_config_applies_overrides_but_not_runtime_settings(tmp_path):
+    server = _server(tmp_path)
+    config = server.request_config(
+        {"input_path": "draft.tex", "session": "../notes", "config": {"incremental": True}}, "run1"
+    )
+    assert config.incremental and config.async_mode and config.run_id is None
+    assert config.output_dir == str(tmp_path / "_notes")
+    with pytest.raises(RequestError, match="http2"):
+        server.request_config({"input_path": "draft.tex", "config": {"http2": True}}, "run1")
+    with pytest.raises(RequestError, match="Unknown"):
+        server.request_config({"input_path": "draft.tex", "config": {"nope": 1}}, "run1")
+    with pytest.raises(RequestError, match="input_path"):
+        server.request_config({}, "run1")
+
+
+def test_requests_cannot_redirect_backends_or_write_outside_their_directories(tmp_path):
+    server = _server(tmp_path / "out")
+    draft = str(tmp_path / "paper" / "draft.tex")
+    for field in ("openai_base_url", "s2_base_url", "perplexity_base_url", "crossref_base_url", "output_dir"):
+        with pytest.raises(RequestError, match=field):
+            server.request_config({"input_path": draft, "config": {field: "http://evil.example"}}, "run1")
+    for key in ("output_dir", "bib_path"):
+        with pytest.raises(RequestError, match=key):
+            server.request_config({"input_path": draft, key: str(tmp_path / "elsewhere" / "x")}, "run1")
+    paper = tmp_path / "paper"
+    config = server.request_config(
+        {"input_path": draft, "output_dir": str(paper / "out"), "bib_path": str(paper / "a.bib")}, "run1"
+    )
+    assert config.output_dir == str(tmp_path / "paper" / "out")
+    assert config.bib_path_override == str(tmp_path / "paper" / "a.bib")
+
+
+def test_requests_from_web_pages_or_without_a_json_body_are_refused(tmp_path):
+    server = _server(tmp_path)
+
+    async def post(*headers):
+        body = b'{"input_path": "draft.tex"}'
+        head = "".join(f"{header}\r\n" for header in headers)
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /runs HTTP/1.1\r\n{head}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        reader.feed_eof()
+        written = bytearray()
+
+        class _Writer:
+            write = written.extend
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        await server.handle(reader, _Writer())
+        return bytes(written).split(b"\r\n", 1)[0]
+
+    assert asyncio.run(post("Content-Type: text/plain")) == b"HTTP/1.1 415 Unsupported Media Type"
+    assert asyncio.run(post("Content-Type: application/json", "Origin: http://evil.example")) == (
+        b"HTTP/1.1 403 Forbidden"
+    )
+
+
+def test_a_new_request_supersedes_the_running_one_of_its_session(tmp_path):
+    server = _server(tmp_path)
+    first, second = [], []
+
+    async def main():
+        request = {"input_path": str(tmp_path / "draft.tex"), "session": "doc"}
+        _, old = server.start(dict(request, draft="Old."), first.append)
+        await asyncio.sleep(0.05)
+        _, new = server.start(dict(request, draft="New."), second.append)
+        await asyncio.gather(old, new, return_exceptions=True)
+        return old
+
+    old = asyncio.run(main())
+    assert old.cancelled()
+    assert [e["event"] for e in first] == ["started", "claim", "cancelled"]
+    assert first[-1]["reason"] == "superseded"
+    assert second[-1]["event"] == "done" and second[-1]["revised_text"] == "New. \\cite{x}"
+    assert server.running() == {}
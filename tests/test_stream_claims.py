@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.graph.build_graph import build_graph
+from src.graph.nodes import gen_queries, rank_filter, search, stream_claims, synthesize
+from src.graph.nodes.stream_claims import _DONE, _run_stage, astream_claims_node
+from src.graph.state import AgentConfig, CitationNeed, GraphState, SelectedForClaim, SentenceItem
+
+
+def test_items_flow_through_stages_without_waiting_for_the_whole_stage():
+    events = []
+
+    async def slow_first(item):
+        await asyncio.sleep(0.05 if item == 0 else 0)
+        if item == 3:
+            raise ValueError("bad item")
+        events.append(("first", item))
+        return item
+
+    async def second(item):
+        events.append(("second", item))
+
+    async def main():
+        inbox, middle = asyncio.Queue(maxsize=1), asyncio.Queue(maxsize=1)
+
+        async def feed():
+            for item in range(5):
+                await inbox.put(item)
+            await inbox.put(_DONE)
+
+        await asyncio.gather(
+            feed(),
+            _run_stage("first", inbox, middle, 2, slow_first),
+            _run_stage("second", middle, None, 1, second),
+        )
+
+    asyncio.run(main())
+    # Item 1 reaches the second stage while item 0 is still in the first; item 3 is dropped.
+    assert events.index(("second", 1)) < events.index(("first", 0))
+    assert sorted(item for stage, item in events if stage == "second") == [0, 1, 2, 4]
+
+
+def test_streaming_needs_async_mode():
+    with pytest.raises(ValueError):
+        build_graph(streaming=True)
+    build_graph(async_mode=True, streaming=True)
+
+
+def test_a_claim_whose_stage_fails_is_reported_as_need_manual(monkeypatch):
+    async def generate(sentence, *args):
+        return gen_queries._claim_for(sentence, []), []
+
+    async def find(claim, *args):
+        if claim.sid == "S1":
+            raise RuntimeError("search backend down")
+        return []
+
+    async def rank(single, *args):
+        return {claim.cid: SelectedForClaim(cid=claim.cid) for claim in single.claims}
+
+    async def resolve(*args):
+        pass
+
+    monkeypatch.setattr(stream_claims, "AsyncLlmClient", SimpleNamespace(shared=lambda *args: None))
+    monkeypatch.setattr(stream_claims, "AsyncCrossrefClient", lambda *args, **kwargs: None)
+    monkeypatch.setattr(rank_filter, "_async_clients", lambda config: (None, None))
+    monkeypatch.setattr(search, "_async_clients", lambda config: (None, None))
+    monkeypatch.setattr(gen_queries, "_agenerate_queries_for_sentence", generate)
+    monkeypatch.setattr(search, "_asearch_claim_queries", find)
+    monkeypatch.setattr(rank_filter, "_arank_claims", rank)
+    monkeypatch.setattr(synthesize, "_aresolve_claim", resolve)
+
+    texts = ["Agents plan.", "Agents act.", "Agents learn."]
+    state = GraphState(
+        config=AgentConfig(),
+        sentences=[SentenceItem(sid=f"S{i}", text=t, start=0, end=len(t), index=i) for i, t in enumerate(texts)],
+        citation_needs=[
+            CitationNeed(
+                sid=f"S{i}", needs=True, needs_more_citations=True, claim_type="c", rationale="r", scope="sentence"
+            )
+            for i in range(3)
+        ],
+    )
+    asyncio.run(astream_claims_node(state))
+
+    assert [claim.cid for claim in state.claims] == ["CS0", "CS1", "CS2"]
+    assert [s.status for s in state.selected_by_claim.values()] == ["OK", "NEED_MANUAL", "OK"]
+    assert state.selected_by_claim["CS1"].notes == "Error in search: search backend down"
@@ -1,4 +1,4 @@
-from src.tools.text_utils import split_sentences
+from src.tools.text_utils import pack_by_tokens, split_sentences, truncate_to_tokens
 
 
 def test_split_sentences_abbrev():
@@ -12,3 +12,15 @@ def test_split_sentences_latex():
     text = "See Fig. 1 for details. We propose \\textbf{method}."
     sents = [s[0] for s in split_sentences(text)]
     assert len(sents) == 2
+
+
+def test_truncate_to_tokens_cuts_at_word_boundary():
+    text = "word " * 100
+    assert truncate_to_tokens(text, 5) == "word word word word ..."
+    assert truncate_to_tokens("short", 5) == "short"
+    assert truncate_to_tokens(text, 0) == text
+
+
+def test_pack_by_tokens_respects_count_and_budget():
+    assert pack_by_tokens([1, 1, 1, 1, 1], lambda x: x, 2, 100) == [[1, 1], [1, 1], [1]]
+    assert pack_by_tokens([3, 3, 9, 1], lambda x: x, 10, 6) == [[3, 3], [9], [1]]